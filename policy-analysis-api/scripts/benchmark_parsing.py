@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Phase 2 Output Parsing
+
+Measures YAML parse time for real-sized Phase 2 outputs (30-90 KB) with the
+pure-Python SafeLoader versus the libyaml CSafeLoader, and the longest
+event-loop stall when parsing on the loop versus in a worker thread.
+
+Usage:
+    python scripts/benchmark_parsing.py [--repeat 5] [--json results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")
+
+from synthetic_analysis import build_analysis_data  # noqa: E402
+from services.claude_analyzer import _parse_yaml_or_json  # noqa: E402
+
+# (items per section, carriers, note sentences) → roughly 30 KB to 90 KB of YAML
+CORPUS_SHAPES = [(3, 1, 3), (4, 1, 3), (4, 1, 5), (5, 1, 5), (4, 2, 4)]
+
+
+def build_corpus():
+    corpus = []
+    for seed, (items, carriers, sentences) in enumerate(CORPUS_SHAPES):
+        data = build_analysis_data(
+            items_per_section=items,
+            carriers=carriers,
+            note_sentences=sentences,
+            seed=seed,
+        )
+        corpus.append(yaml.safe_dump(data, sort_keys=False, allow_unicode=True))
+    return corpus
+
+
+def time_loader(text: str, loader, repeat: int) -> float:
+    """Median seconds to load text with the given loader"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        yaml.load(text, Loader=loader)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+async def max_loop_stall(text: str, off_loop: bool) -> float:
+    """Longest gap (seconds) seen by a 1 ms ticker while the text is parsed"""
+    gaps = []
+    done = asyncio.Event()
+
+    async def ticker():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    await asyncio.to_thread(lambda: None)  # Start the worker thread before measuring
+    tick_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    if off_loop:
+        await asyncio.to_thread(_parse_yaml_or_json, text)
+    else:
+        _parse_yaml_or_json(text)
+    await asyncio.sleep(0.01)
+    done.set()
+    await tick_task
+    return max(gaps) if gaps else 0.0
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="Benchmark Phase 2 output parsing")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions per document")
+    parser.add_argument("--json", dest="json_path", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    has_libyaml = hasattr(yaml, "CSafeLoader")
+    results = []
+
+    print(f"libyaml available: {has_libyaml}")
+    print(f"{'size KB':>8} {'SafeLoader ms':>14} {'CSafeLoader ms':>15} {'speedup':>8} {'stall on-loop ms':>17} {'stall thread ms':>16}")
+
+    corpus = build_corpus()
+    _parse_yaml_or_json(corpus[0])  # Warm-up
+
+    for text in corpus:
+        size_kb = len(text.encode()) / 1024
+        pure = time_loader(text, yaml.SafeLoader, args.repeat)
+        fast = time_loader(text, yaml.CSafeLoader, args.repeat) if has_libyaml else None
+        stall_on_loop = asyncio.run(max_loop_stall(text, off_loop=False))
+        stall_thread = asyncio.run(max_loop_stall(text, off_loop=True))
+
+        row = {
+            "size_kb": round(size_kb, 1),
+            "safe_loader_ms": round(pure * 1000, 2),
+            "c_safe_loader_ms": round(fast * 1000, 2) if fast else None,
+            "speedup": round(pure / fast, 1) if fast else None,
+            "max_loop_stall_on_loop_ms": round(stall_on_loop * 1000, 2),
+            "max_loop_stall_thread_ms": round(stall_thread * 1000, 2),
+        }
+        results.append(row)
+        print(
+            f"{row['size_kb']:>8} {row['safe_loader_ms']:>14} {str(row['c_safe_loader_ms']):>15} "
+            f"{str(row['speedup']):>8} {row['max_loop_stall_on_loop_ms']:>17} {row['max_loop_stall_thread_ms']:>16}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"libyaml": has_libyaml, "results": results}, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PDF Report Rendering
+
+Renders synthetic analysis documents of increasing size and reports the
+time spent in each ReportGenerator section builder and in doc.build, the
+peak Python memory of a full render, and the PDF size — with and without
+page-stream compression, to show what compression costs in build time and
+saves in bytes — and the time to produce the HTML and JSON views of the
+same document. Results can be written as JSON and compared against a saved baseline to catch rendering
+regressions before a release.
+
+Usage:
+    python scripts/benchmark_reports.py [--repeat 3] [--json results.json]
+    python scripts/benchmark_reports.py --baseline results.json [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")
+
+from reportlab.platypus import PageBreak  # noqa: E402
+
+from synthetic_analysis import build_analysis_data  # noqa: E402
+from services.report_formats import report_formatter  # noqa: E402
+from services.report_generator import generator  # noqa: E402
+
+# name → (sections, items per section, carriers, red flags, recommendations)
+SIZES = {
+    "small": (14, 2, 1, 4, 3),
+    "typical": (14, 4, 1, 8, 6),
+    "large": (14, 8, 2, 20, 12),
+    "xlarge": (16, 25, 3, 60, 30),
+    "huge": (20, 50, 3, 150, 60),
+}
+
+
+def build_document(size: str) -> dict:
+    sections, items, carriers, red_flags, recommendations = SIZES[size]
+    return build_analysis_data(
+        sections=sections,
+        items_per_section=items,
+        carriers=carriers,
+        red_flags=red_flags,
+        recommendations=recommendations,
+    )
+
+
+def time_render(data: dict, compress: bool = True) -> dict:
+    """Seconds per section builder and for doc.build, plus the PDF size"""
+    t = generator.template
+    timings = {}
+    story = []
+    for builder, page_break in generator.SECTIONS:
+        started = time.perf_counter()
+        story.extend(getattr(generator, builder)(data, t))
+        timings[builder] = time.perf_counter() - started
+        if page_break:
+            story.append(PageBreak())
+
+    started = time.perf_counter()
+    pdf_bytes = generator.build_document(story, t, compress=compress)
+    timings["doc.build"] = time.perf_counter() - started
+    return {"timings": timings, "pdf_bytes": len(pdf_bytes)}
+
+
+def time_format(data: dict, fmt: str) -> float:
+    """Seconds to produce the full HTML or JSON view"""
+    started = time.perf_counter()
+    for _ in report_formatter.render(fmt, data):
+        pass
+    return time.perf_counter() - started
+
+
+def peak_memory(data: dict) -> int:
+    """Peak traced allocation (bytes) for one full render"""
+    tracemalloc.start()
+    try:
+        generator.render_pdf(data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def benchmark(size: str, repeat: int) -> dict:
+    data = build_document(size)
+    generator.render_pdf(data)  # Warm-up (fonts, glyph widths)
+
+    runs = [time_render(data) for _ in range(repeat)]
+    raw_runs = [time_render(data, compress=False) for _ in range(repeat)]
+    stages = {
+        stage: round(statistics.median(run["timings"][stage] for run in runs) * 1000, 2)
+        for stage in runs[0]["timings"]
+    }
+    sections, items, carriers, red_flags, recommendations = SIZES[size]
+    return {
+        "size": size,
+        "sections": sections,
+        "items": sections * items,
+        "carriers": carriers,
+        "red_flags": red_flags,
+        "recommendations": recommendations,
+        "stages_ms": stages,
+        "total_ms": round(sum(stages.values()), 2),
+        "peak_memory_mb": round(peak_memory(data) / 1e6, 2),
+        "pdf_kb": round(runs[0]["pdf_bytes"] / 1024, 1),
+        "uncompressed_build_ms": round(statistics.median(run["timings"]["doc.build"] for run in raw_runs) * 1000, 2),
+        "uncompressed_pdf_kb": round(raw_runs[0]["pdf_bytes"] / 1024, 1),
+        "html_ms": round(statistics.median(time_format(data, "html") for _ in range(repeat)) * 1000, 2),
+        "json_ms": round(statistics.median(time_format(data, "json") for _ in range(repeat)) * 1000, 2),
+    }
+
+
+def compare(results: list, baseline_path: str, tolerance: float) -> list:
+    """Sizes whose total render time grew by more than tolerance over the baseline"""
+    with open(baseline_path) as f:
+        baseline = {row["size"]: row for row in json.load(f)["results"]}
+
+    regressions = []
+    for row in results:
+        before = baseline.get(row["size"])
+        if not before:
+            continue
+        change = row["total_ms"] / before["total_ms"] - 1
+        print(f"  {row['size']:<8} {before['total_ms']:>9} ms → {row['total_ms']:>9} ms ({change:+.0%})")
+        if change > tolerance:
+            regressions.append(row["size"])
+    return regressions
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="Benchmark PDF report rendering")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES), help="Document sizes to render")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions per size")
+    parser.add_argument("--json", dest="json_path", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previous --json result")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    stage_names = [builder.replace("_create_", "") for builder, _ in generator.SECTIONS] + ["doc.build"]
+    print(f"{'size':<8} {'items':>6} {'total ms':>9} {'peak MB':>8} {'PDF KB':>8} {'raw KB':>8} {'raw build ms':>12} {'html ms':>8} {'json ms':>8}   " + "  ".join(stage_names))
+
+    results = []
+    for size in args.sizes:
+        row = benchmark(size, args.repeat)
+        results.append(row)
+        stages = "  ".join(f"{ms:.1f}" for ms in row["stages_ms"].values())
+        print(
+            f"{size:<8} {row['items']:>6} {row['total_ms']:>9} {row['peak_memory_mb']:>8} {row['pdf_kb']:>8} "
+            f"{row['uncompressed_pdf_kb']:>8} {row['uncompressed_build_ms']:>12} {row['html_ms']:>8} {row['json_ms']:>8}   {stages}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"repeat": args.repeat, "results": results}, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+    if args.baseline:
+        print(f"Compared with {args.baseline}:")
+        regressions = compare(results, args.baseline, args.tolerance)
+        if regressions:
+            print(f"Rendering regressed beyond {args.tolerance:.0%} for: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
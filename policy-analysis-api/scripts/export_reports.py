@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Export Stored Reports
+
+Renders a tenant's stored analyses (or some of them) into one ZIP of
+PDF reports, e.g. to refresh a whole portfolio before renewal season.
+Reports stream through a pre-warmed render pool and are written to the
+archive as they finish. No analysis is re-run and no Claude tokens are used.
+
+Usage:
+    # Every stored report for a tenant
+    python scripts/export_reports.py --tenant <tenant_id> --output portfolio.zip
+
+    # Specific analyses of the tenant, with four render workers
+    python scripts/export_reports.py --tenant <tenant_id> --analysis <analysis_id> --analysis <analysis_id> --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import asdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "export")
+
+from services.render_pool import render_pool  # noqa: E402
+from services.report_export import export_reports  # noqa: E402
+
+
+async def run(args):
+    if args.workers is not None:
+        render_pool.workers = args.workers
+    render_pool.start()
+    try:
+        return await export_reports(
+            args.output,
+            args.tenant,
+            analysis_ids=args.analysis,
+            concurrency=args.concurrency,
+        )
+    finally:
+        render_pool.shutdown()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Render stored analyses into a ZIP of PDF reports")
+    parser.add_argument("--tenant", required=True, help="Export this tenant's reports")
+    parser.add_argument("--analysis", action="append", help="Export only this of the tenant's analyses (repeatable)")
+    parser.add_argument("--output", default="reports_export.zip", help="ZIP archive to write")
+    parser.add_argument("--workers", type=int, help="Render processes (default: REPORT_RENDER_WORKERS)")
+    parser.add_argument("--concurrency", type=int, help="Reports in flight (default: one per worker)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    result = asyncio.run(run(args))
+    summary = asdict(result)
+    summary["elapsed_seconds"] = round(time.perf_counter() - started, 1)
+    print(json.dumps({**summary, "exported": len(result.exported)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
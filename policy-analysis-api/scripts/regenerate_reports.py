@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Regenerate Stored Reports
+
+Re-renders every stored analysis report with the current report template
+and uploads it over the existing report in Supabase Storage. No analysis
+is re-run and no Claude tokens are used. Use after a report rendering fix
+or a branding change.
+
+Usage:
+    # Count the reports that would be rebuilt
+    python scripts/regenerate_reports.py --dry-run
+
+    # Rebuild one tenant's reports, four at a time
+    python scripts/regenerate_reports.py --tenant <tenant_id> --concurrency 4
+
+    # Rebuild specific analyses
+    python scripts/regenerate_reports.py --analysis <analysis_id> --analysis <analysis_id>
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "regenerate")
+
+from services.render_pool import render_pool  # noqa: E402
+from services.report_regeneration import regenerate_report, regenerate_reports  # noqa: E402
+
+
+async def run(args) -> dict:
+    render_pool.start()
+    try:
+        if args.analysis:
+            results, failed = [], []
+            for analysis_id in args.analysis:
+                try:
+                    results.append(await regenerate_report(analysis_id))
+                except Exception as e:
+                    logging.error(f"{analysis_id}: {e}")
+                    failed.append(analysis_id)
+            return {"total": len(args.analysis), "regenerated": len(results), "failed": failed, "reports": results}
+
+        return await regenerate_reports(
+            tenant_id=args.tenant,
+            concurrency=args.concurrency,
+            dry_run=args.dry_run,
+        )
+    finally:
+        render_pool.shutdown()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Re-render stored reports without re-running analysis")
+    parser.add_argument("--tenant", help="Only regenerate this tenant's reports")
+    parser.add_argument("--analysis", action="append", help="Regenerate only this analysis (repeatable)")
+    parser.add_argument("--concurrency", type=int, help="Reports rendered at once (default: REPORT_RENDER_WORKERS)")
+    parser.add_argument("--dry-run", action="store_true", help="Count stored reports without rendering")
+    parser.add_argument("--json", dest="json_path", help="Write the result to this JSON file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    result = asyncio.run(run(args))
+    result["elapsed_seconds"] = round(time.perf_counter() - started, 1)
+
+    print(json.dumps({k: v for k, v in result.items() if k != "reports"}, indent=2))
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
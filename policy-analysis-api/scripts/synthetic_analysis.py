@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Synthetic analysis_data Generator
+
+Builds Phase 2-shaped analysis documents of configurable size for the
+benchmark scripts. The defaults produce a document comparable to a real
+single-carrier analysis (14 coverage sections, ~60 scored items, ~60 KB
+of YAML).
+
+Usage:
+    python synthetic_analysis.py --items 8 --carriers 2 > sample.yaml
+"""
+
+import argparse
+import random
+import sys
+from typing import Any, Dict, List
+
+SECTION_NAMES = [
+    ("Incident Response", "incident_response", "first_party"),
+    ("Business Interruption", "business_interruption", "first_party"),
+    ("Data Recovery", "data_recovery", "first_party"),
+    ("Cyber Extortion", "cyber_extortion", "first_party"),
+    ("Cyber Crime", "cyber_crime", "first_party"),
+    ("Reputational Harm", "reputational_harm", "first_party"),
+    ("System Failure", "system_failure", "first_party"),
+    ("Privacy Liability", "privacy_liability", "third_party"),
+    ("Network Security Liability", "network_security_liability", "third_party"),
+    ("Technology E&O", "technology_eo", "third_party"),
+    ("Media Liability", "media_liability", "third_party"),
+    ("Regulatory Defense & Penalties", "regulatory", "third_party"),
+    ("PCI-DSS Fines & Assessments", "pci_dss", "third_party"),
+    ("Contractual Liability", "contractual_liability", "third_party"),
+    ("Coverage Wording Comparison", "additional_coverage_features", "policy_features"),
+    ("Notable Exclusions and Deficiencies", "exclusions", "policy_limitations"),
+]
+
+_NOTE_FRAGMENTS = [
+    "Coverage applies on a pay-on-behalf basis subject to the retention shown in the declarations.",
+    "Sublimit is shared with the aggregate and erodes available limits for third-party claims.",
+    "Trigger requires a security event; non-malicious system failure is not addressed.",
+    "Endorsement CY-204 broadens the definition of computer system to include BYOD devices.",
+    "Waiting period of 8 hours applies before business income loss is recoverable.",
+    "Prior written consent is required before any extortion payment is made.",
+    "Retroactive date matches policy inception, leaving prior acts uncovered.",
+    "Exclusion 4(k) removes coverage for unencrypted portable devices without a carve-back.",
+]
+
+
+def _notes(rng: random.Random, sentences: int) -> str:
+    return " ".join(rng.choice(_NOTE_FRAGMENTS) for _ in range(sentences))
+
+
+def build_analysis_data(
+    sections: int = 14,
+    items_per_section: int = 4,
+    carriers: int = 1,
+    red_flags: int = 8,
+    recommendations: int = 6,
+    note_sentences: int = 3,
+    seed: int = 7,
+) -> Dict[str, Any]:
+    """Build one synthetic analysis document."""
+    rng = random.Random(seed)
+    carrier_names = [f"Carrier {chr(65 + i)} Cyber Pro" for i in range(carriers)]
+
+    section_list: List[Dict[str, Any]] = []
+    for s in range(sections):
+        name, coverage_type, category = SECTION_NAMES[s % len(SECTION_NAMES)]
+        items = []
+        for i in range(items_per_section):
+            items.append({
+                "name": f"{name} Item {i + 1}",
+                "carrier_values": {
+                    carrier: {
+                        "maturity_score": rng.randint(0, 10),
+                        "value": f"${rng.choice([250, 500, 1000, 2000]):,},000",
+                        "value_type": "monetary",
+                        "retention": f"${rng.choice([10, 25, 50]):,},000",
+                        "notes": _notes(rng, note_sentences),
+                        "page_reference": f"Page {rng.randint(1, 60)}",
+                    }
+                    for carrier in carrier_names
+                },
+            })
+        section_list.append({
+            "name": name if s < len(SECTION_NAMES) else f"{name} {s // len(SECTION_NAMES) + 1}",
+            "coverage_type": coverage_type,
+            "category": category,
+            "items": items,
+        })
+
+    return {
+        "client_company": "Synthetic Holdings, Inc.",
+        "client_industry": "MSP/Technology Services",
+        "analysis_date": "June 21, 2025",
+        "prepared_by": "Rhône Risk Advisory",
+        "policy_type": "new",
+        "carriers": carrier_names,
+        "program_details": {
+            carrier: {
+                "carrier": carrier,
+                "policy_number": f"POL-{10000 + n}",
+                "primary_limits": "$5,000,000 Aggregate",
+                "deductible": "$25,000 Each Claim",
+                "total_premium": "$48,250.00",
+                "policy_deficiencies": [_notes(rng, 1) for _ in range(4)],
+            }
+            for n, carrier in enumerate(carrier_names)
+        },
+        "sections": section_list,
+        "maturity_dimensions": {
+            "coverage_breadth": {"score": 7.5, "weight": 1.5, "notes": _notes(rng, 2)},
+            "coverage_depth": {"score": 6.0, "weight": 1.3, "notes": _notes(rng, 2)},
+            "policy_structure": {"score": 7.0, "weight": 1.0, "notes": _notes(rng, 2)},
+            "risk_management": {"score": 5.5, "weight": 1.2, "notes": _notes(rng, 2)},
+            "financial_strength": {"score": 8.0, "weight": 1.1, "notes": _notes(rng, 2)},
+        },
+        "executive_summary": {
+            "overview": _notes(rng, 12),
+            "key_metrics": {
+                "overall_maturity_score": 6.7,
+                "maturity_level": "Defined",
+                "coverage_comprehensiveness": 82,
+                "total_coverage_limit": 5000000,
+                "annual_premium": 48250,
+                "primary_carrier_rating": "A (Excellent)",
+            },
+            "critical_action_items": [_notes(rng, 1) for _ in range(5)],
+            "recommendation": "BIND WITH CONDITIONS",
+            "recommendation_rationale": _notes(rng, 4),
+        },
+        "policy_summary": {
+            "strengths": [_notes(rng, 1) for _ in range(5)],
+            "critical_deficiencies": [_notes(rng, 1) for _ in range(4)],
+            "moderate_concerns": [_notes(rng, 1) for _ in range(4)],
+        },
+        "red_flags": [
+            {
+                "flag": f"Red flag {n + 1}: {_notes(rng, 1)}",
+                "severity": rng.choice(["HIGH", "MEDIUM"]),
+                "impact": _notes(rng, 2),
+                "policy_reference": f"Page {rng.randint(1, 60)}, Section {rng.randint(1, 12)}",
+                "recommendation": _notes(rng, 1),
+            }
+            for n in range(red_flags)
+        ],
+        "recommendations": {
+            "immediate_actions": [
+                {
+                    "priority": n + 1,
+                    "item": _notes(rng, 1),
+                    "rationale": _notes(rng, 2),
+                    "expected_impact": _notes(rng, 1),
+                }
+                for n in range(recommendations)
+            ],
+            "renewal_considerations": [_notes(rng, 1) for _ in range(recommendations)],
+            "risk_management_suggestions": [_notes(rng, 1) for _ in range(recommendations)],
+        },
+    }
+
+
+def main():
+    import yaml
+
+    parser = argparse.ArgumentParser(description="Emit a synthetic analysis document as YAML")
+    parser.add_argument("--sections", type=int, default=14)
+    parser.add_argument("--items", type=int, default=4, help="Items per section")
+    parser.add_argument("--carriers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    data = build_analysis_data(
+        sections=args.sections,
+        items_per_section=args.items,
+        carriers=args.carriers,
+        seed=args.seed,
+    )
+    yaml.safe_dump(data, sys.stdout, sort_keys=False, allow_unicode=True)
+
+
+if __name__ == "__main__":
+    main()
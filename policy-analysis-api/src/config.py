@@ -33,6 +33,41 @@ class Settings(BaseSettings):
     EXTRACTION_MODEL: str = "claude-haiku-4-5-20251001"
     CLAUDE_MAX_TOKENS: int = 16384
     USE_TWO_PHASE: bool = True  # Use two-phase extract→analyze pipeline
+    USE_STRUCTURED_OUTPUT: bool = False  # Phase 2 records analysis via schema-constrained tool call
+    CLAUDE_MAX_CONCURRENT_REQUESTS: int = 16  # Shared in-flight request budget (hedges included)
+    YAML_REPAIR_ENABLED: bool = True  # Send unparseable Phase 2 fragments to EXTRACTION_MODEL for a syntax fix
+    YAML_REPAIR_MAX_FRAGMENTS: int = 8  # Above this many broken fragments, skip repair (output needs a re-run)
+    ANALYSIS_COMPLETION_ENABLED: bool = True  # Follow-up requests for sections validation flags as missing
+    ANALYSIS_COMPLETION_MAX_ROUNDS: int = 1
+    USE_LOCAL_SCORING: bool = False  # Claude emits factor points; scores computed by the local scoring engine
+    RED_FLAG_PRESCAN_ENABLED: bool = True  # Pattern-scan Phase 1 output for red flag candidates (Phase 2 hints)
+
+    # Phase 1 hedged requests (tail latency)
+    PHASE1_HEDGING_ENABLED: bool = False
+    PHASE1_HEDGE_PERCENTILE: float = 95.0  # Hedge once a call passes this percentile of recent latencies
+    PHASE1_HEDGE_WINDOW: int = 200  # Number of recent Phase 1 latencies tracked
+    PHASE1_HEDGE_MIN_SAMPLES: int = 20  # Latencies required before hedging starts
+
+    # Report rendering
+    REPORT_RENDER_WORKERS: int = 2  # Pre-warmed render processes (0 = render in a thread)
+    REPORT_RENDER_QUEUE_SIZE: int = 8  # Renders allowed to wait for a worker before callers time out
+    REPORT_RENDER_TIMEOUT_SECONDS: float = 120.0  # Per render (and per wait for a queue slot)
+    REPORT_RENDER_MODE: str = "eager"  # eager (before callback), background (after callback) or lazy (first download)
+    REPORT_CACHE_MAX_MB: int = 256  # In-process cache of rendered PDFs, keyed by analysis_data + template version
+    REPORT_PDF_COMPRESSION: bool = True  # Flate-compress page content streams (off only to inspect raw PDF output)
+    REPORT_DOWNLOAD_MODE: str = "redirect"  # Stored reports: redirect (signed storage URL) or stream (proxied, Range/ETag)
+    REPORT_SIGNED_URL_TTL_SECONDS: int = 300  # Lifetime of signed report download URLs
+    REPORT_EXPORT_MAX_CONCURRENT: int = 1  # Bulk ZIP exports running at once (more get HTTP 429)
+
+    # Job queue (durable, SQLite in WAL mode; keep the path on a persistent volume)
+    JOB_QUEUE_PATH: str = "data/jobs.sqlite3"
+    JOB_QUEUE_WORKERS: int = 4  # Analyses run at once
+    JOB_VISIBILITY_TIMEOUT_SECONDS: float = 600.0  # Lease per claim; running jobs renew it, lost workers' jobs are reclaimed after it
+    JOB_MAX_ATTEMPTS: int = 3  # Crashed or interrupted runs before a job is dead-lettered
+    JOB_RETRY_DELAY_SECONDS: float = 30.0  # Backoff per attempt before a failed job is retried
+    JOB_PRIORITY_AGING_SECONDS: float = 600.0  # Waiting jobs move up one priority class per interval
+    JOB_URGENT_WORKERS: int = 1  # Extra workers reserved for priority=urgent jobs
+    JOB_RENEWAL_LEAD_DAYS: int = 7  # Renewal analyses are due this long before the renewal date
 
     # CORS
     CORS_ORIGINS: List[str] = ["*"]
@@ -44,6 +79,8 @@ class Settings(BaseSettings):
     COMPANY_NAME: str = "Rhône Risk Advisory"
     PRIMARY_COLOR: str = "#162B4D"
     ACCENT_COLOR: str = "#0CBDDB"
+    TENANT_BRANDING_CACHE_SIZE: int = 64  # Tenants whose branding and compiled report template stay cached
+    TENANT_BRANDING_TTL_SECONDS: int = 300  # Re-read a tenant's branding after this long
 
     class Config:
         env_file = ".env"
@@ -15,6 +15,8 @@ from slowapi.errors import RateLimitExceeded
 
 from routes import webhook, analysis
 from config import settings
+from services.job_queue import job_queue
+from services.render_pool import render_pool
 
 # Configure logging
 logging.basicConfig(
@@ -40,9 +42,17 @@ async def lifespan(app: FastAPI):
     os.makedirs("temp", exist_ok=True)
     os.makedirs("reports", exist_ok=True)
 
+    # Spawn and pre-warm report render workers
+    render_pool.start()
+
+    # Resume persisted analysis jobs
+    await job_queue.start()
+
     yield
 
     logger.info("Shutting down Policy Analysis API")
+    await job_queue.shutdown()
+    render_pool.shutdown()
 
 
 app = FastAPI(
@@ -121,6 +131,7 @@ async def health_check():
         "anthropic_configured": bool(settings.ANTHROPIC_API_KEY),
         "supabase_configured": bool(settings.SUPABASE_URL and settings.SUPABASE_SERVICE_KEY),
         "environment": settings.ENVIRONMENT,
+        "jobs": await job_queue.counts(),
     }
 
 
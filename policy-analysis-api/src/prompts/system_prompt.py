@@ -979,6 +979,52 @@ NOTE: This example is truncated. Your output must include ALL 14+ sections with
 """
 
 
+# =============================================================================
+# MODULE 9: OUTPUT MODE INSTRUCTIONS
+# =============================================================================
+
+YAML_ONLY_INSTRUCTIONS = """IMPORTANT: Your response must be ONLY valid YAML. No preamble, no explanation, no code fences."""
+
+STRUCTURED_OUTPUT_INSTRUCTIONS = """## OUTPUT MODE — STRUCTURED TOOL CALL
+
+IMPORTANT: Do NOT write the analysis as YAML text. Instead, record the complete analysis
+by calling the `record_policy_analysis` tool exactly once. The YAML structure above
+describes the fields the tool expects — use the same keys, nesting, and scoring rules.
+Include ALL 14+ sections with ALL sub-items in the single tool call."""
+
+
+LOCAL_SCORING_INSTRUCTIONS = """## SCORING MODE — FACTOR FACTS ONLY
+
+Scores are computed by Rhône Risk's scoring engine from the factor points you record.
+For EVERY carrier value, do NOT write `maturity_score`. Instead write a `factors` mapping
+with the points for each of the five factors, using the 5-Factor rubric above:
+
+          factors:
+            sublimit_adequacy: 1.5   # Factor 1, 0-2
+            scope: 2.5               # Factor 2, 0-3
+            exclusions_impact: 1.0   # Factor 3, 0-2
+            prior_acts: 1.5          # Factor 4, 0-1.5
+            conditions: 1.0          # Factor 5, 0-1.5
+
+For `maturity_dimensions`, write only the `notes` for each dimension — no `score` or `weight`.
+In `executive_summary.key_metrics`, omit `overall_maturity_score` and `maturity_level`."""
+
+# =============================================================================
+# MODULE 10: YAML FRAGMENT REPAIR
+# =============================================================================
+
+YAML_REPAIR_PROMPT = """You repair malformed YAML fragments from a cyber insurance policy analysis.
+
+You will receive ONE fragment that failed to parse, together with the parser error.
+Return the same fragment as valid YAML:
+- Fix only syntax: quoting, escaping, indentation, unterminated strings or brackets
+- Keep every key, value, score and note exactly as written — do not add, remove, or rephrase content
+- Keep the same top-level shape (a single "- " list item stays a single list item; a "key:" mapping stays that key)
+- If text is cut off mid-value, close the value where it ends rather than inventing the rest
+
+IMPORTANT: Your response must be ONLY the repaired YAML fragment. No preamble, no explanation, no code fences."""
+
+
 # =============================================================================
 # PROMPT ASSEMBLY FUNCTIONS
 # =============================================================================
@@ -1074,7 +1120,12 @@ IMPORTANT: Extract EVERYTHING. Do not summarize or skip sections.
 """
 
 
-def get_analysis_prompt(client_industry: str = "Other/General", is_renewal: bool = False) -> str:
+def get_analysis_prompt(
+    client_industry: str = "Other/General",
+    is_renewal: bool = False,
+    structured_output: bool = False,
+    local_scoring: bool = False,
+) -> str:
     """
     Build the Phase 2 analysis prompt.
 
@@ -1084,6 +1135,10 @@ def get_analysis_prompt(client_industry: str = "Other/General", is_renewal: bool
     Args:
         client_industry: The industry classification of the client
         is_renewal: Whether this is a renewal policy
+        structured_output: Record the analysis via the schema-constrained
+            tool call instead of emitting YAML text
+        local_scoring: Emit factor points only; scores are computed by
+            services/scoring_engine.py
 
     Returns:
         Complete system prompt string for the analysis phase
@@ -1133,7 +1188,9 @@ Follow this exact sequence:
 8. **Formulate Recommendation**: BIND / BIND WITH CONDITIONS / NEGOTIATE / DECLINE
 9. **Generate Recommendations**: Specific, actionable, prioritized by impact
 
-IMPORTANT: Your response must be ONLY valid YAML. No preamble, no explanation, no code fences.
+{LOCAL_SCORING_INSTRUCTIONS if local_scoring else ""}
+
+{STRUCTURED_OUTPUT_INSTRUCTIONS if structured_output else YAML_ONLY_INSTRUCTIONS}
 """
     return prompt
 
@@ -2,23 +2,39 @@
 Direct analysis endpoints for testing without webhooks
 """
 
+import asyncio
+import hashlib
 import logging
 import uuid
 import os
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
-from fastapi.responses import FileResponse
+import aiohttp
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 
 from config import settings
-from services.orchestrator import run_policy_analysis, analysis_status_store
+from services.branding import branding_service
+from services.job_queue import DEAD, DONE, QUEUED, RUNNING, job_queue
+from services.orchestrator import analysis_status_store, ensure_report, signed_report_url
+from services.report_formats import FORMATS, report_formatter
+from services.report_export import ExportBusy, export_reports
+from services.report_regeneration import AnalysisNotFound, regenerate_report
+from services.rescoring import levels_with_overrides, rescore_stored_analyses
+from routes.webhook import verify_signature
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Storage response headers passed through when streaming a stored report
+STREAMED_HEADERS = ("Content-Length", "Content-Range", "Accept-Ranges", "ETag", "Last-Modified")
+STREAM_CHUNK_BYTES = 64 * 1024
+STORAGE_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60)
+
 
 class AnalysisRequest(BaseModel):
     """Direct analysis request"""
@@ -37,16 +53,31 @@ class AnalysisStatusResponse(BaseModel):
     completed_at: Optional[str] = None
     error: Optional[str] = None
     result: Optional[dict] = None
+    preliminary_red_flags: Optional[list] = None  # Pre-scan candidates, available while Phase 2 runs
+
+
+class RescoreRequest(BaseModel):
+    """Methodology change to apply to stored analyses"""
+    weights: Optional[Dict[str, float]] = None  # Dimension → weight overrides
+    levels: Optional[Dict[str, float]] = None  # Maturity level → new minimum overall score
+    tenant_id: Optional[str] = None  # Limit to one tenant
+    dry_run: bool = False  # Compute and report only, write nothing
+
+
+class ReportExportRequest(BaseModel):
+    """Reports to render into one ZIP archive"""
+    tenant_id: Optional[str] = None  # Tenant whose stored analyses are exported
+    analysis_ids: Optional[List[str]] = None  # Only these of the tenant's analyses
 
 
 @router.post("/upload")
 async def analyze_uploaded_policy(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(..., description="Policy PDF file"),
     client_name: str = Form(..., description="Client company name"),
     client_industry: str = Form("Other/General", description="Client industry"),
     policy_type: str = Form("cyber", description="Policy type"),
     renewal: bool = Form(False, description="Is this a renewal?"),
+    priority: str = Form("normal", description="urgent, high, normal or low"),
 ):
     """
     Upload a policy PDF directly for analysis (without webhook integration).
@@ -65,11 +96,10 @@ async def analyze_uploaded_policy(
     # Generate analysis ID
     analysis_id = f"analysis_{uuid.uuid4().hex[:12]}"
 
-    # Save uploaded file temporarily
-    temp_path = os.path.join(settings.TEMP_DIR, f"{analysis_id}_{file.filename}")
-    os.makedirs(settings.TEMP_DIR, exist_ok=True)
+    # Save the upload beside the job queue (persistent volume); deleted when the job is done or dead
+    upload_path = job_queue.upload_path(analysis_id, file.filename)
 
-    with open(temp_path, "wb") as f:
+    with open(upload_path, "wb") as f:
         content = await file.read()
         f.write(content)
 
@@ -90,16 +120,19 @@ async def analyze_uploaded_policy(
         "file_size": len(content),
         "policy_type": policy_type,
         "renewal": renewal,
+        "priority": priority,
         "callback_url": None,
-        "_local_file_path": temp_path,  # Internal: path to saved file
+        "_local_file_path": upload_path,  # Internal: path to saved file
+        "_queued_upload": True,  # Internal: the job queue owns (and deletes) the file
     }
 
-    # Queue analysis
-    background_tasks.add_task(
-        run_policy_analysis,
-        analysis_id=analysis_id,
-        payload=payload,
-    )
+    # Queue analysis (persisted before responding)
+    try:
+        await job_queue.enqueue(analysis_id, payload)
+    except Exception as e:
+        logger.error(f"Failed to queue analysis {analysis_id}: {e}")
+        os.remove(upload_path)
+        raise HTTPException(status_code=503, detail="Could not queue analysis, please retry")
 
     return {
         "success": True,
@@ -109,6 +142,41 @@ async def analyze_uploaded_policy(
     }
 
 
+async def _verified_body(request: Request) -> bytes:
+    """Request body, checked against X-Webhook-Signature when WEBHOOK_SECRET is set"""
+    raw_body = await request.body()
+    signature = request.headers.get("X-Webhook-Signature", "")
+    if settings.WEBHOOK_SECRET and not verify_signature(raw_body, signature, settings.WEBHOOK_SECRET):
+        raise HTTPException(status_code=401, detail="Invalid or missing signature")
+    return raw_body
+
+
+@router.post("/rescore")
+async def rescore_analyses(request: Request):
+    """
+    Re-apply dimension weights and maturity-level thresholds to stored analyses.
+
+    Recomputes overall scores and maturity levels from the stored dimension
+    scores in one vectorized pass and writes changed rows back — no Claude
+    calls. Signed like webhooks (X-Webhook-Signature) when WEBHOOK_SECRET is set.
+    """
+    raw_body = await _verified_body(request)
+    body = RescoreRequest.model_validate_json(raw_body or b"{}")
+
+    try:
+        levels = levels_with_overrides(body.levels) if body.levels else None
+        return await rescore_stored_analyses(
+            weights=body.weights,
+            levels=levels,
+            tenant_id=body.tenant_id,
+            dry_run=body.dry_run,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
 @router.get("/{analysis_id}/status", response_model=AnalysisStatusResponse)
 async def get_analysis_status(analysis_id: str):
     """
@@ -116,16 +184,53 @@ async def get_analysis_status(analysis_id: str):
 
     Returns the analysis progress and results when complete.
     """
-    if analysis_id not in analysis_status_store:
+    if analysis_id in analysis_status_store:
+        return AnalysisStatusResponse(**analysis_status_store[analysis_id])
+
+    # Not seen by this process (e.g. dead-lettered before a restart): report the queue's record
+    job = await job_queue.get(analysis_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Analysis not found")
+    return _status_from_job(job)
 
-    return AnalysisStatusResponse(**analysis_status_store[analysis_id])
+
+_JOB_STATUSES = {
+    QUEUED: ("queued", "Waiting for a worker..."),
+    RUNNING: ("started", "Running..."),
+    DONE: ("completed", "Analysis complete"),
+    DEAD: ("failed", "Dead-lettered; requeue to retry"),
+}
+
+
+def _status_from_job(job: Dict) -> AnalysisStatusResponse:
+    """Status of a job known only to the durable queue"""
+    status, progress = _JOB_STATUSES.get(job["status"], (job["status"], None))
+    return AnalysisStatusResponse(
+        analysis_id=job["id"],
+        status=status,
+        progress=progress,
+        started_at=datetime.utcfromtimestamp(job["created_at"]).isoformat(),
+        completed_at=datetime.utcfromtimestamp(job["updated_at"]).isoformat() if job["status"] in (DONE, DEAD) else None,
+        error=job["last_error"],
+    )
 
 
 @router.get("/{analysis_id}/report")
-async def download_report(analysis_id: str):
+async def download_report(
+    analysis_id: str,
+    request: Request,
+    format: str = Query("pdf", pattern="^(pdf|html|json)$"),
+):
     """
-    Download the generated PDF report for a completed analysis.
+    Download the generated report for a completed analysis.
+
+    format=html or format=json streams a browser / machine-readable view of
+    the same report sections, rendered directly from the analysis data.
+
+    Stored reports redirect to a short-lived signed storage URL, so the
+    bytes never pass through the API. With REPORT_DOWNLOAD_MODE=stream they
+    are proxied from storage instead, forwarding Range and If-None-Match.
+    Local and in-memory reports are served with an ETag and range support.
     """
     if analysis_id not in analysis_status_store:
         raise HTTPException(status_code=404, detail="Analysis not found")
@@ -137,14 +242,195 @@ async def download_report(analysis_id: str):
             detail=f"Analysis not complete. Current status: {status.get('status')}"
         )
 
-    report_path = status.get("result", {}).get("report_path")
-    if not report_path or not os.path.exists(report_path):
+    result = status.get("result") or {}
+    if format in FORMATS:
+        if not isinstance(result.get("analysis_data"), dict):
+            raise HTTPException(status_code=404, detail="Analysis data not found")
+        branding = await branding_service.for_tenant(result.get("tenant_id"))
+        return StreamingResponse(
+            report_formatter.render(format, result["analysis_data"], branding, analysis_id=analysis_id),
+            media_type=FORMATS[format],
+        )
+
+    storage_path = result.get("report_storage_path")
+    if storage_path:
+        filename = os.path.basename(storage_path)
+        if settings.REPORT_DOWNLOAD_MODE == "stream":
+            url = await signed_report_url(storage_path)
+            response = url and await _stream_stored_report(request, url, filename)
+        else:
+            url = await signed_report_url(storage_path, filename)
+            response = url and RedirectResponse(url, status_code=307)
+        if response:
+            return response
+
+    report_path = result.get("report_path")
+    if report_path and os.path.exists(report_path):
+        content = await asyncio.to_thread(_read_file, report_path)
+        return _pdf_response(request, content, os.path.basename(report_path))
+
+    # Deferred, pending or unreachable stored report: render (cached) on demand
+    report = await ensure_report(analysis_id)
+    if report is None or not report.success:
         raise HTTPException(status_code=404, detail="Report file not found")
 
+    return _pdf_response(request, report.report_bytes, report.filename)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _attachment(filename: str) -> str:
+    return f'attachment; filename="{filename}"'
+
+
+def _byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single "bytes=" range; None when unsatisfiable.
+
+    Raises:
+        ValueError: malformed or multi-range header (answered with the full report)
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        raise ValueError(f"Unsupported range: {header}")
+
+    first, _, last = spec.strip().partition("-")
+    if not first:  # Suffix range: the last N bytes
+        length = int(last)
+        return (max(0, size - length), size - 1) if length and size else None
+
+    start = int(first)
+    if last and int(last) < start:
+        raise ValueError(f"Invalid range: {header}")
+    if start >= size:
+        return None
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def _pdf_response(request: Request, content: bytes, filename: str) -> Response:
+    """PDF response with an ETag, honouring If-None-Match, Range and If-Range"""
+    size = len(content)
+    etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Content-Disposition": _attachment(filename)}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            bounds = _byte_range(range_header, size)
+        except ValueError:
+            bounds = (0, size - 1)
+        if bounds is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        start, end = bounds
+        if (start, end) != (0, size - 1):
+            return Response(
+                content=content[start:end + 1],
+                status_code=206,
+                media_type="application/pdf",
+                headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"},
+            )
+
+    return Response(content=content, media_type="application/pdf", headers=headers)
+
+
+async def _stream_stored_report(request: Request, url: str, filename: str) -> Optional[Response]:
+    """
+    Proxy a stored report from its signed URL in chunks.
+
+    Range and conditional headers go to storage, which answers them; its
+    status (200/206/304/416) and range headers come back unchanged. Returns
+    None when storage can't be reached, so the caller can fall back.
+    """
+    forwarded = {name: request.headers[name] for name in ("range", "if-range", "if-none-match") if name in request.headers}
+    forwarded["Accept-Encoding"] = "identity"  # Keep Content-Length/Content-Range byte-accurate
+
+    session = aiohttp.ClientSession(timeout=STORAGE_TIMEOUT)
+    try:
+        upstream = await session.get(url, headers=forwarded)
+    except Exception as e:
+        await session.close()
+        logger.warning(f"   Failed to stream report {filename} from storage: {e}")
+        return None
+
+    headers = {name: upstream.headers[name] for name in STREAMED_HEADERS if name in upstream.headers}
+    headers["Content-Disposition"] = _attachment(filename)
+
+    if upstream.status not in (200, 206):
+        upstream.release()
+        await session.close()
+        if upstream.status in (304, 416):
+            return Response(status_code=upstream.status, headers=headers)
+        logger.warning(f"   Storage returned HTTP {upstream.status} for report {filename}")
+        return None
+
+    async def body():
+        try:
+            async for chunk in upstream.content.iter_chunked(STREAM_CHUNK_BYTES):
+                yield chunk
+        finally:
+            upstream.release()
+            await session.close()
+
+    return StreamingResponse(body(), status_code=upstream.status, media_type="application/pdf", headers=headers)
+
+
+@router.post("/{analysis_id}/report:regenerate")
+async def regenerate_analysis_report(analysis_id: str, request: Request):
+    """
+    Re-render and re-upload a report from the stored analysis data.
+
+    No re-analysis: the persisted analysis_data is rendered with the current
+    report template. Signed like webhooks when WEBHOOK_SECRET is set.
+    """
+    await _verified_body(request)
+
+    try:
+        return await regenerate_report(analysis_id)
+    except AnalysisNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@router.post("/reports:export")
+async def export_analysis_reports(request: Request):
+    """
+    Render a tenant's stored analyses into one ZIP of PDF reports.
+
+    Takes a tenant_id and optionally analysis_ids (IDs of other tenants are
+    skipped); reports stream through the render pool and are written to the
+    archive as they finish. Returns 429 while REPORT_EXPORT_MAX_CONCURRENT
+    exports are already running. Signed like webhooks when WEBHOOK_SECRET
+    is set.
+    """
+    raw_body = await _verified_body(request)
+    body = ReportExportRequest.model_validate_json(raw_body or b"{}")
+    if not body.tenant_id:
+        raise HTTPException(status_code=422, detail="Provide tenant_id")
+
+    archive_path = os.path.join(settings.TEMP_DIR, f"reports_{uuid.uuid4().hex[:12]}.zip")
+    try:
+        result = await export_reports(archive_path, body.tenant_id, analysis_ids=body.analysis_ids, wait=False)
+    except ExportBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    if not result.exported:
+        await asyncio.to_thread(os.remove, archive_path)
+        raise HTTPException(status_code=404, detail="No stored reports to export")
+
     return FileResponse(
-        report_path,
-        media_type="application/pdf",
-        filename=os.path.basename(report_path),
+        archive_path,
+        media_type="application/zip",
+        filename=f"{body.tenant_id}_reports_{datetime.utcnow():%Y%m%d}.zip",
+        headers={"X-Reports-Exported": str(len(result.exported)), "X-Reports-Failed": str(len(result.failed))},
+        background=BackgroundTask(os.remove, archive_path),
     )
 
 
@@ -158,7 +444,7 @@ async def list_analyses():
             {
                 "analysis_id": aid,
                 "status": data.get("status"),
-                "client_name": data.get("result", {}).get("client_name", "Unknown"),
+                "client_name": (data.get("result") or {}).get("client_name", "Unknown"),
                 "started_at": data.get("started_at"),
             }
             for aid, data in analysis_status_store.items()
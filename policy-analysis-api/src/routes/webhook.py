@@ -6,14 +6,14 @@ import hmac
 import hashlib
 import logging
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Header, BackgroundTasks, Request
+from fastapi import APIRouter, HTTPException, Header, Request
 from pydantic import BaseModel, HttpUrl
 
 from config import settings
-from services.orchestrator import run_policy_analysis
+from services.job_queue import job_queue
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +33,8 @@ class PolicyUploadedPayload(BaseModel):
     uploaded_by: Optional[str] = None
     policy_type: Optional[str] = "cyber"
     renewal: Optional[bool] = False
-    priority: Optional[str] = "normal"
+    renewal_date: Optional[date] = None  # Pulls the job's deadline forward (JOB_RENEWAL_LEAD_DAYS before it)
+    priority: Optional[str] = "normal"  # urgent, high, normal or low (e.g. bulk backfills)
     callback_url: Optional[HttpUrl] = None
     tenant_id: Optional[str] = None
 
@@ -63,10 +64,7 @@ def verify_signature(payload: bytes, signature: str, secret: str) -> bool:
 
 
 @router.post("/policy-uploaded", response_model=WebhookResponse)
-async def handle_policy_uploaded(
-    request: Request,
-    background_tasks: BackgroundTasks,
-):
+async def handle_policy_uploaded(request: Request):
     """
     Receive notification that a policy has been uploaded.
 
@@ -79,8 +77,10 @@ async def handle_policy_uploaded(
     6. Uploads report to Supabase Storage
     7. POSTs HMAC-signed results to the callback_url (if provided)
 
-    The analysis runs in the background - this endpoint returns immediately
-    with an analysis_id that can be used to track progress.
+    The analysis runs in the background - this endpoint returns as soon as
+    the job is persisted to the durable job queue, with an analysis_id that
+    can be used to track progress. If the job can't be persisted it returns
+    503, so the sender retries rather than losing the upload.
     """
     # STEP 0: Enforce signature verification
     raw_body = await request.body()
@@ -107,12 +107,12 @@ async def handle_policy_uploaded(
     # Generate unique analysis ID
     analysis_id = f"analysis_{uuid.uuid4().hex[:12]}"
 
-    # Queue the analysis to run in background
-    background_tasks.add_task(
-        run_policy_analysis,
-        analysis_id=analysis_id,
-        payload=payload.model_dump(),
-    )
+    # Persist the job; a queue worker runs the analysis
+    try:
+        await job_queue.enqueue(analysis_id, payload.model_dump(mode="json"))
+    except Exception as e:
+        logger.error(f"Failed to queue analysis {analysis_id}: {e}")
+        raise HTTPException(status_code=503, detail="Could not queue analysis, please retry")
 
     logger.info(f"Analysis queued: {analysis_id}")
 
@@ -0,0 +1,379 @@
+"""
+Typed Phase 2 Analysis Schema
+
+Pydantic models mirroring the YAML output format in prompts/system_prompt.py.
+Used to:
+    - Generate the JSON schema for schema-constrained (tool-use) Phase 2 output
+    - Validate and normalize a structured Phase 2 response in a single decode
+    - Summarize a parsed analysis (scores, maturity level, completeness
+      warnings, scored-item counts) in a single traversal
+
+Models are deliberately lenient (optional fields, extra keys allowed) so a
+slightly incomplete response still validates; completeness is reported by
+_validate_analysis rather than by rejecting the whole result.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Name of the tool Claude is forced to call in structured-output mode
+ANALYSIS_TOOL_NAME = "record_policy_analysis"
+
+
+class _SchemaModel(BaseModel):
+    """Base model: keep unknown keys so nothing Claude adds is dropped"""
+    model_config = ConfigDict(extra="allow")
+
+
+# ---------------------------------------------------------------------------
+# Coverage sections
+# ---------------------------------------------------------------------------
+
+class ItemFactors(_SchemaModel):
+    """5-factor rubric points (local scoring mode)"""
+    sublimit_adequacy: Optional[float] = None
+    scope: Optional[float] = None
+    exclusions_impact: Optional[float] = None
+    prior_acts: Optional[float] = None
+    conditions: Optional[float] = None
+
+
+class CarrierValue(_SchemaModel):
+    """Per-carrier scoring of a single coverage item"""
+    maturity_score: Optional[float] = None
+    factors: Optional[ItemFactors] = None
+    value: Optional[Union[bool, float, str]] = None
+    value_type: Optional[str] = None
+    retention: Optional[str] = None
+    waiting_period: Optional[str] = None
+    period_of_restoration: Optional[str] = None
+    notes: Optional[str] = None
+    page_reference: Optional[str] = None
+
+
+class CoverageItem(_SchemaModel):
+    """A coverage sub-item scored for each carrier"""
+    name: str
+    carrier_values: Dict[str, CarrierValue] = {}
+
+
+class CoverageSection(_SchemaModel):
+    """One of the 14+ coverage categories"""
+    name: str
+    coverage_type: Optional[str] = None
+    category: Optional[str] = None
+    items: List[CoverageItem] = []
+
+
+# ---------------------------------------------------------------------------
+# Program details & maturity dimensions
+# ---------------------------------------------------------------------------
+
+class ProgramDetails(_SchemaModel):
+    """Declarations-level details for one policy/product"""
+    carrier: Optional[str] = None
+    policy_number: Optional[str] = None
+    primary_limits: Optional[str] = None
+    financial_rating: Optional[str] = None
+    deductible: Optional[str] = None
+    cyber_retroactive_date: Optional[str] = None
+    tech_prof_retroactive_date: Optional[str] = None
+    media_retroactive_date: Optional[str] = None
+    total_premium: Optional[str] = None
+    payment_structure: Optional[str] = None
+    policy_period: Optional[str] = None
+    defense_costs_structure: Optional[str] = None
+    territory: Optional[str] = None
+    policy_deficiencies: List[str] = []
+
+
+class MaturityDimension(_SchemaModel):
+    """A single weighted maturity dimension"""
+    score: Optional[float] = None
+    weight: Optional[float] = None
+    notes: Optional[str] = None
+
+
+class MaturityDimensions(_SchemaModel):
+    """The 5-dimension maturity assessment"""
+    coverage_breadth: Optional[MaturityDimension] = None
+    coverage_depth: Optional[MaturityDimension] = None
+    policy_structure: Optional[MaturityDimension] = None
+    risk_management: Optional[MaturityDimension] = None
+    financial_strength: Optional[MaturityDimension] = None
+
+
+# ---------------------------------------------------------------------------
+# Executive summary, findings, recommendations
+# ---------------------------------------------------------------------------
+
+class KeyMetrics(_SchemaModel):
+    overall_maturity_score: Optional[float] = None
+    maturity_level: Optional[str] = None
+    coverage_comprehensiveness: Optional[float] = None
+    total_coverage_limit: Optional[float] = None
+    annual_premium: Optional[float] = None
+    primary_carrier_rating: Optional[str] = None
+
+
+class PolicyAdequacy(_SchemaModel):
+    coverage_adequacy: Optional[float] = None
+    value_for_money: Optional[float] = None
+    risk_protection_level: Optional[float] = None
+
+
+class ExecutiveSummary(_SchemaModel):
+    overview: Optional[str] = None
+    key_metrics: Optional[KeyMetrics] = None
+    critical_action_items: List[str] = []
+    policy_adequacy: Optional[PolicyAdequacy] = None
+    recommendation: Optional[str] = None
+    recommendation_rationale: Optional[str] = None
+
+
+class PolicySummary(_SchemaModel):
+    strengths: List[str] = []
+    critical_deficiencies: List[str] = []
+    moderate_concerns: List[str] = []
+    industry_specific_findings: List[str] = []
+
+
+class RedFlag(_SchemaModel):
+    flag: str
+    severity: Optional[str] = None
+    impact: Optional[str] = None
+    policy_reference: Optional[str] = None
+    recommendation: Optional[str] = None
+
+
+class ImmediateAction(_SchemaModel):
+    priority: Optional[int] = None
+    item: str
+    rationale: Optional[str] = None
+    expected_impact: Optional[str] = None
+
+
+class Recommendations(_SchemaModel):
+    immediate_actions: List[ImmediateAction] = []
+    renewal_considerations: List[str] = []
+    risk_management_suggestions: List[str] = []
+
+
+class PolicyAnalysis(_SchemaModel):
+    """Complete Phase 2 analysis document"""
+    client_company: Optional[str] = None
+    client_industry: Optional[str] = None
+    comparison_date: Optional[str] = None
+    analysis_date: Optional[str] = None
+    prepared_by: Optional[str] = None
+    document_version: Optional[str] = None
+    policy_type: Optional[str] = None
+    carriers: List[str] = []
+    program_details: Dict[str, ProgramDetails] = {}
+    sections: List[CoverageSection]
+    maturity_dimensions: MaturityDimensions
+    executive_summary: ExecutiveSummary
+    policy_summary: PolicySummary
+    red_flags: List[RedFlag]
+    recommendations: Recommendations
+
+
+# ===========================================================================
+# TOOL DEFINITION & DECODING
+# ===========================================================================
+
+@lru_cache(maxsize=1)
+def analysis_tool_definition() -> Dict[str, Any]:
+    """Anthropic tool definition whose input schema is the PolicyAnalysis model"""
+    return {
+        "name": ANALYSIS_TOOL_NAME,
+        "description": (
+            "Record the complete Rhône Risk policy analysis. "
+            "Every coverage section, maturity dimension, red flag and "
+            "recommendation must be included in a single call."
+        ),
+        "input_schema": PolicyAnalysis.model_json_schema(),
+    }
+
+
+def parse_structured_output(tool_input: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate a structured Phase 2 response against the analysis schema.
+
+    Returns the normalized dict (only fields Claude actually provided).
+    If validation fails the raw tool input is returned unchanged — it is
+    already a decoded dict, so _validate_analysis can report what is
+    missing without discarding the analysis.
+    """
+    try:
+        model = PolicyAnalysis.model_validate(tool_input)
+    except ValidationError as e:
+        logger.warning(f"Structured output failed schema validation ({e.error_count()} errors) — using raw tool input")
+        return dict(tool_input)
+
+    logger.info("📄 Output decoded from structured tool call")
+    return model.model_dump(exclude_unset=True)
+
+
+# ===========================================================================
+# SINGLE-PASS SUMMARY (scores, maturity level, completeness)
+# ===========================================================================
+
+# Overall score thresholds, highest first; anything below the last is "Initial"
+MATURITY_LEVELS = (
+    (8.5, "Optimized"),
+    (7.0, "Managed"),
+    (5.5, "Defined"),
+    (3.5, "Developing"),
+)
+
+REQUIRED_FIELDS = ("client_company", "executive_summary", "sections", "policy_summary")
+MIN_SECTIONS = 10
+MIN_SCORED_ITEMS = 10
+
+
+def maturity_level_for(score: float) -> str:
+    """Map an overall maturity score (0-10) to its maturity level"""
+    for threshold, level in MATURITY_LEVELS:
+        if score >= threshold:
+            return level
+    return "Initial"
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+@dataclass(slots=True)
+class AnalysisSummary:
+    """Computed view of a parsed analysis, built once by summarize_analysis"""
+    overall_score: Optional[float] = None  # As reported, else computed from dimensions
+    computed_score: Optional[float] = None  # Weighted mean of the maturity dimensions
+    maturity_level: Optional[str] = None
+    recommendation: Optional[str] = None
+    dimension_scores: Dict[str, float] = field(default_factory=dict)
+    section_count: int = 0
+    item_count: int = 0
+    scored_items: int = 0
+    red_flag_count: int = 0
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return not self.warnings
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def summarize_analysis(analysis_data: Dict[str, Any]) -> AnalysisSummary:
+    """
+    Walk a parsed analysis once and compute everything post-processing needs.
+
+    Tolerates partially-formed output (wrong types are treated as missing)
+    so it can run on salvaged or unvalidated YAML as well as tool output.
+    """
+    summary = AnalysisSummary()
+    warnings = summary.warnings
+
+    if analysis_data.get("parse_error"):
+        warnings.append("Output could not be parsed")
+        return summary
+
+    for issue in analysis_data.get("_parse_issues", []):
+        first_error_line = str(issue.get("error", "")).splitlines()[0] if issue.get("error") else "unknown error"
+        warnings.append(f"Unparseable output fragment at {issue['path']}: {first_error_line}")
+
+    for name in REQUIRED_FIELDS:
+        if name not in analysis_data:
+            warnings.append(f"Missing required field: {name}")
+
+    # Maturity dimensions → weighted overall score
+    dims = analysis_data.get("maturity_dimensions")
+    total_weighted = 0.0
+    total_weight = 0.0
+    if isinstance(dims, dict):
+        for dim_name, dim_data in dims.items():
+            if not isinstance(dim_data, dict):
+                continue
+            score = dim_data.get("score", 0)
+            weight = dim_data.get("weight", 1.0)
+            if _is_number(score) and _is_number(weight):
+                summary.dimension_scores[dim_name] = float(score)
+                total_weighted += score * weight
+                total_weight += weight
+    if total_weight > 0:
+        summary.computed_score = round(total_weighted / total_weight, 1)
+
+    # Executive summary
+    exec_summary = analysis_data.get("executive_summary")
+    if not isinstance(exec_summary, dict):
+        exec_summary = {}
+    key_metrics = exec_summary.get("key_metrics")
+    if not isinstance(key_metrics, dict):
+        key_metrics = {}
+
+    summary.recommendation = exec_summary.get("recommendation")
+    summary.overall_score = key_metrics.get("overall_maturity_score") or summary.computed_score
+    summary.maturity_level = key_metrics.get("maturity_level")
+    if summary.maturity_level is None and _is_number(summary.overall_score):
+        summary.maturity_level = maturity_level_for(summary.overall_score)
+
+    if not summary.recommendation:
+        warnings.append("Missing binding recommendation")
+    if not exec_summary.get("overview"):
+        warnings.append("Missing executive summary overview")
+    if not summary.overall_score:
+        warnings.append("Missing overall maturity score")
+
+    # Coverage sections → item and scored-item counts
+    sections = analysis_data.get("sections")
+    if not isinstance(sections, list):
+        sections = []
+    summary.section_count = len(sections)
+    for section in sections:
+        items = section.get("items") if isinstance(section, dict) else None
+        for item in items if isinstance(items, list) else []:
+            summary.item_count += 1
+            carrier_values = item.get("carrier_values") if isinstance(item, dict) else None
+            if not isinstance(carrier_values, dict):
+                continue
+            for carrier_data in carrier_values.values():
+                if isinstance(carrier_data, dict) and "maturity_score" in carrier_data:
+                    summary.scored_items += 1
+
+    if summary.section_count < MIN_SECTIONS:
+        warnings.append(f"Only {summary.section_count} coverage sections found (expected 14+)")
+    if summary.scored_items < MIN_SCORED_ITEMS:
+        warnings.append(f"Only {summary.scored_items} items have maturity scores (expected 30+)")
+
+    red_flags = analysis_data.get("red_flags")
+    summary.red_flag_count = len(red_flags) if isinstance(red_flags, list) else 0
+
+    # Pre-scan cross-check: HIGH candidates Phase 2 did not mention
+    prescan = analysis_data.get("_red_flag_prescan")
+    if isinstance(prescan, dict):
+        candidates = {c.get("flag_id"): c for c in prescan.get("candidates", []) if isinstance(c, dict)}
+        for flag_id in prescan.get("unconfirmed", []):
+            candidate = candidates.get(flag_id)
+            if candidate and candidate.get("severity") == "HIGH":
+                pages = ", ".join(e["page"] for e in candidate.get("evidence", []) if e.get("page"))
+                warnings.append(
+                    f"Pre-scan found possible HIGH red flag not in analysis: {candidate.get('flag')}"
+                    + (f" ({pages})" if pages else "")
+                )
+
+    if "maturity_dimensions" not in analysis_data:
+        warnings.append("Missing maturity dimensions assessment")
+    if "red_flags" not in analysis_data:
+        warnings.append("Missing red flags section")
+    if "recommendations" not in analysis_data:
+        warnings.append("Missing recommendations section")
+
+    return summary
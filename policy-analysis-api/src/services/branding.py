@@ -0,0 +1,114 @@
+"""
+Tenant Branding Service
+Resolves per-tenant report branding for white-labelled reports
+
+A tenant opts in by setting a "branding" object in tenants.settings:
+
+    {"branding": {"company_name": "...", "primary_color": "#112233", "accent_color": "#44AA99"}}
+
+Missing fields fall back to the tenant name and the global COMPANY_NAME /
+PRIMARY_COLOR / ACCENT_COLOR settings. Resolved brandings are kept in an
+LRU keyed by tenant_id; the report template (styles, colors, page chrome)
+is compiled once per branding, so a tenant's branding costs nothing per
+render after its first report.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+from services.report_generator import ReportBranding
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BRANDING = ReportBranding()
+
+_HEX_COLOR = re.compile(r"^#[0-9A-Fa-f]{6}$")
+
+
+def branding_from_tenant(tenant: Dict[str, Any]) -> ReportBranding:
+    """Build a tenant's ReportBranding from its tenants row (defaults without a branding block)"""
+    tenant_settings = tenant.get("settings") or {}
+    branding = tenant_settings.get("branding") if isinstance(tenant_settings, dict) else None
+    if not isinstance(branding, dict):
+        return DEFAULT_BRANDING
+
+    def color(key: str, default: str) -> str:
+        value = branding.get(key)
+        if isinstance(value, str) and _HEX_COLOR.match(value):
+            return value
+        if value:
+            logger.warning(f"   Ignoring invalid {key} {value!r} for tenant {tenant.get('id')}")
+        return default
+
+    return ReportBranding(
+        company_name=branding.get("company_name") or tenant.get("name") or DEFAULT_BRANDING.company_name,
+        primary_color=color("primary_color", DEFAULT_BRANDING.primary_color),
+        accent_color=color("accent_color", DEFAULT_BRANDING.accent_color),
+    )
+
+
+class BrandingService:
+    """
+    tenant_id → ReportBranding, LRU-cached with a TTL so edits to a
+    tenant's branding show up without a restart.
+    """
+
+    def __init__(
+        self,
+        max_tenants: int = settings.TENANT_BRANDING_CACHE_SIZE,
+        ttl_seconds: float = settings.TENANT_BRANDING_TTL_SECONDS,
+    ):
+        self.max_tenants = max_tenants
+        self.ttl_seconds = ttl_seconds
+        self._cache: "OrderedDict[str, Tuple[float, ReportBranding]]" = OrderedDict()
+
+    def invalidate(self, tenant_id: Optional[str] = None) -> None:
+        """Forget one tenant's branding (or all)"""
+        if tenant_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(tenant_id, None)
+
+    def _load(self, tenant_id: str) -> ReportBranding:
+        from services.orchestrator import _get_supabase_client
+
+        supa = _get_supabase_client()
+        if not supa:
+            return DEFAULT_BRANDING
+        rows = supa.table("tenants") \
+            .select("id, name, settings") \
+            .eq("id", tenant_id) \
+            .limit(1) \
+            .execute().data or []
+        return branding_from_tenant(rows[0]) if rows else DEFAULT_BRANDING
+
+    async def for_tenant(self, tenant_id: Optional[str]) -> ReportBranding:
+        """Branding for a tenant's reports; lookup failures fall back to the default branding"""
+        if not tenant_id or tenant_id == "default":
+            return DEFAULT_BRANDING
+
+        cached = self._cache.get(tenant_id)
+        if cached and time.monotonic() - cached[0] < self.ttl_seconds:
+            self._cache.move_to_end(tenant_id)
+            return cached[1]
+
+        try:
+            branding = await asyncio.to_thread(self._load, tenant_id)
+        except Exception as e:
+            logger.warning(f"   Failed to load branding for tenant {tenant_id}: {e}")
+            return cached[1] if cached else DEFAULT_BRANDING
+
+        self._cache[tenant_id] = (time.monotonic(), branding)
+        self._cache.move_to_end(tenant_id)
+        while len(self._cache) > self.max_tenants:
+            self._cache.popitem(last=False)
+        return branding
+
+
+# Module-level instance
+branding_service = BrandingService()
@@ -5,19 +5,28 @@ Phase 1 (Extraction): Extracts structured data from raw policy text into markdow
     - Uses Claude Haiku for speed and cost efficiency
     - Focuses purely on data extraction, no scoring
     - Produces structured markdown with all policy details
+    - Optionally hedged (PHASE1_HEDGING_ENABLED): a stalled call is duplicated
+      once it passes a percentile of recent latencies; first response wins
 
 Phase 2 (Analysis): Applies Rhône Risk scoring methodology to extracted data.
     - Uses Claude Sonnet for deep analytical reasoning
     - Applies 5-factor scoring, 5-dimension maturity assessment
     - Produces full YAML analysis with scores, red flags, recommendations
+    - Optionally records the analysis through a schema-constrained tool call
+      (USE_STRUCTURED_OUTPUT), so parsing is a single validated decode
 
 Also provides single-pass analysis (legacy) and backward-compatible ClaudeAnalyzer class.
 """
 
+import asyncio
 import json
 import logging
+import math
 import re
-from dataclasses import dataclass
+import textwrap
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
 from datetime import date, datetime
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -26,11 +35,24 @@ import anthropic
 try:
     import yaml
     HAS_YAML = True
+    # libyaml-backed loader when PyYAML was built with it (several times faster on 50-80 KB outputs)
+    YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 except ImportError:
     HAS_YAML = False
 
 from config import settings
+from services.analysis_schema import (
+    ANALYSIS_TOOL_NAME,
+    AnalysisSummary,
+    analysis_tool_definition,
+    maturity_level_for,
+    parse_structured_output,
+    summarize_analysis,
+)
+from services.red_flag_scanner import red_flag_scanner
+from services.scoring_engine import scoring_engine
 from prompts.system_prompt import (
+    YAML_REPAIR_PROMPT,
     get_analysis_prompt,
     get_extraction_prompt,
     get_full_analysis_prompt,
@@ -50,21 +72,209 @@ ANALYSIS_MODEL = getattr(settings, "CLAUDE_MODEL", "claude-sonnet-4-20250514")
 EXTRACTION_MAX_TOKENS = 8192
 # Max tokens for analysis (YAML output is very detailed)
 ANALYSIS_MAX_TOKENS = getattr(settings, "CLAUDE_MAX_TOKENS", 16384)
+# Phase 2 output mode: schema-constrained tool call instead of YAML text
+USE_STRUCTURED_OUTPUT = getattr(settings, "USE_STRUCTURED_OUTPUT", False)
+
+# Targeted repair of unparseable Phase 2 fragments (uses EXTRACTION_MODEL)
+YAML_REPAIR_ENABLED = getattr(settings, "YAML_REPAIR_ENABLED", True)
+YAML_REPAIR_MAX_FRAGMENTS = getattr(settings, "YAML_REPAIR_MAX_FRAGMENTS", 8)
+# Max tokens for a repaired fragment (a single section or top-level key)
+REPAIR_MAX_TOKENS = 4096
+
+# Follow-up requests for sections validation flags as missing (two-phase only)
+COMPLETION_ENABLED = getattr(settings, "ANALYSIS_COMPLETION_ENABLED", True)
+COMPLETION_MAX_ROUNDS = getattr(settings, "ANALYSIS_COMPLETION_MAX_ROUNDS", 1)
+
+# Claude emits 5-factor points; scores are computed by services/scoring_engine.py
+USE_LOCAL_SCORING = getattr(settings, "USE_LOCAL_SCORING", False)
+
+# Pattern pre-scan of the Phase 1 output for Red Flags Library candidates
+RED_FLAG_PRESCAN_ENABLED = getattr(settings, "RED_FLAG_PRESCAN_ENABLED", True)
+
+# Shared budget of in-flight Claude requests — hedged duplicates count against it
+_request_budget = asyncio.Semaphore(getattr(settings, "CLAUDE_MAX_CONCURRENT_REQUESTS", 16))
 
 
 # ---------------------------------------------------------------------------
 # Data classes
 # ---------------------------------------------------------------------------
 
+@dataclass
+class PhaseUsage:
+    """Token usage and latency for a single Claude call"""
+    phase: str
+    model: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    time_to_first_token_ms: Optional[float] = None
+    latency_ms: Optional[float] = None
+    stop_reason: Optional[str] = None
+    hedged: bool = False  # Response came from a hedged duplicate request
+
+    @property
+    def total_tokens(self) -> int:
+        return (
+            self.input_tokens
+            + self.output_tokens
+            + self.cache_read_input_tokens
+            + self.cache_creation_input_tokens
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["total_tokens"] = self.total_tokens
+        return data
+
+
 @dataclass
 class AnalysisResult:
     """Result from Claude policy analysis"""
     success: bool
     analysis_data: Optional[Dict[str, Any]] = None
     raw_response: Optional[str] = None
-    tokens_used: Optional[int] = None
+    tokens_used: Optional[int] = None  # Total across all phases
     error: Optional[str] = None
     extracted_data: Optional[str] = None  # Phase 1 output (markdown)
+    usage: Optional[Dict[str, Any]] = None  # Per-phase usage record (see _summarize_usage)
+    summary: Optional[AnalysisSummary] = None  # Scores and completeness computed once
+
+
+# ===========================================================================
+# CLAUDE CALLS & USAGE INSTRUMENTATION
+# ===========================================================================
+
+async def _create_message(
+    client: anthropic.AsyncAnthropic,
+    phase: str,
+    **request: Any,
+) -> Tuple[Any, PhaseUsage]:
+    """
+    Send a Messages API request via streaming and measure it.
+
+    Streaming lets us record time to first token; the final message is
+    identical to a non-streaming response.
+    """
+    async with _request_budget:
+        started = time.perf_counter()
+        first_token_at: Optional[float] = None
+
+        async with client.messages.stream(**request) as stream:
+            async for event in stream:
+                if first_token_at is None and event.type == "content_block_delta":
+                    first_token_at = time.perf_counter()
+            response = await stream.get_final_message()
+
+    finished = time.perf_counter()
+    usage = response.usage
+    phase_usage = PhaseUsage(
+        phase=phase,
+        model=request.get("model", ""),
+        input_tokens=usage.input_tokens or 0,
+        output_tokens=usage.output_tokens or 0,
+        cache_read_input_tokens=getattr(usage, "cache_read_input_tokens", None) or 0,
+        cache_creation_input_tokens=getattr(usage, "cache_creation_input_tokens", None) or 0,
+        time_to_first_token_ms=round((first_token_at - started) * 1000, 1) if first_token_at else None,
+        latency_ms=round((finished - started) * 1000, 1),
+        stop_reason=response.stop_reason,
+    )
+    return response, phase_usage
+
+
+class HedgePolicy:
+    """
+    Decides when a slow call should be hedged with a duplicate request.
+
+    Keeps a sliding window of recent end-to-end latencies. Once at least
+    min_samples are known, a call still running after the configured
+    percentile of that window gets a duplicate request.
+    """
+
+    def __init__(self, percentile: float = 95.0, window: int = 200, min_samples: int = 20):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self._latencies: deque = deque(maxlen=window)
+
+    def record(self, latency_seconds: float) -> None:
+        self._latencies.append(latency_seconds)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while still warming up."""
+        if len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        rank = max(math.ceil(self.percentile / 100 * len(ordered)) - 1, 0)
+        return ordered[min(rank, len(ordered) - 1)]
+
+
+async def _create_message_hedged(
+    client: anthropic.AsyncAnthropic,
+    phase: str,
+    policy: HedgePolicy,
+    **request: Any,
+) -> Tuple[Any, PhaseUsage]:
+    """
+    _create_message with a single hedged duplicate for tail latency.
+
+    The duplicate is only sent if the shared request budget has a free
+    slot; whichever request succeeds first wins and the other is cancelled.
+    The recorded and reported latency is end to end, from the primary's
+    start: a stalled primary still counts in full, so the hedge threshold
+    tracks what callers actually waited.
+    """
+    delay = policy.hedge_delay()
+    started = time.perf_counter()
+    primary = asyncio.ensure_future(_create_message(client, phase, **request))
+    pending = {primary}
+    winner = None
+    error: Optional[BaseException] = None
+
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                if _request_budget.locked():
+                    logger.info(f"   {phase}: past p{policy.percentile:g} ({delay:.1f}s) but request budget is full — not hedging")
+                else:
+                    logger.warning(f"   {phase}: past p{policy.percentile:g} ({delay:.1f}s) — sending hedged request")
+                    pending.add(asyncio.ensure_future(_create_message(client, phase, **request)))
+
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    winner = winner or task
+                else:
+                    error = task.exception()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if winner is None:
+        raise error
+
+    response, usage = winner.result()
+    elapsed = time.perf_counter() - started
+    usage.hedged = winner is not primary
+    usage.latency_ms = round(elapsed * 1000, 1)
+    policy.record(elapsed)
+    return response, usage
+
+
+def _summarize_usage(phases: List[PhaseUsage], **extra: Any) -> Dict[str, Any]:
+    """Combine per-phase usage into the record stored in _metadata and Supabase."""
+    summary: Dict[str, Any] = {
+        "total_tokens": sum(p.total_tokens for p in phases),
+        "input_tokens": sum(p.input_tokens for p in phases),
+        "output_tokens": sum(p.output_tokens for p in phases),
+        "cache_read_input_tokens": sum(p.cache_read_input_tokens for p in phases),
+        "cache_creation_input_tokens": sum(p.cache_creation_input_tokens for p in phases),
+        "latency_ms": round(sum(p.latency_ms or 0 for p in phases), 1),
+        "phases": {p.phase: p.to_dict() for p in phases},
+    }
+    summary.update(extra)
+    return summary
 
 
 # ===========================================================================
@@ -79,6 +289,8 @@ def _parse_yaml_or_json(raw_output: str) -> Dict[str, Any]:
     - Code fence wrappers (```yaml ... ```)
     - Leading/trailing whitespace
     - Mixed YAML/JSON output
+
+    CPU-bound on large outputs — call via asyncio.to_thread from async code.
     """
     cleaned = raw_output.strip()
 
@@ -93,7 +305,7 @@ def _parse_yaml_or_json(raw_output: str) -> Dict[str, Any]:
     # Try YAML first (our requested format)
     if HAS_YAML:
         try:
-            result = yaml.safe_load(cleaned)
+            result = yaml.load(cleaned, Loader=YAML_LOADER)
             if isinstance(result, dict):
                 logger.info("📄 Output parsed as YAML")
                 return result
@@ -113,7 +325,7 @@ def _parse_yaml_or_json(raw_output: str) -> Dict[str, Any]:
     yaml_match = re.search(r"```ya?ml\s*\n(.*?)```", raw_output, re.DOTALL)
     if yaml_match and HAS_YAML:
         try:
-            result = yaml.safe_load(yaml_match.group(1))
+            result = yaml.load(yaml_match.group(1), Loader=YAML_LOADER)
             if isinstance(result, dict):
                 logger.info("📄 Output extracted from YAML code block")
                 return result
@@ -141,6 +353,12 @@ def _parse_yaml_or_json(raw_output: str) -> Dict[str, Any]:
         except json.JSONDecodeError:
             pass
 
+    # Salvage: keep every top-level key / list item that parses on its own
+    if HAS_YAML:
+        salvaged = _salvage_yaml(yaml_match.group(1) if yaml_match else cleaned)
+        if salvaged is not None:
+            return salvaged
+
     logger.error("❌ Could not parse output as YAML or JSON")
     return {
         "parse_error": True,
@@ -153,14 +371,116 @@ def _parse_yaml_or_json(raw_output: str) -> Dict[str, Any]:
     }
 
 
+# Top-level mapping key at column 0 (bare or double-quoted)
+_TOP_LEVEL_KEY = re.compile(r'^(?:"([^"\n]+)"|([A-Za-z_][\w-]*))\s*:')
+# Block-sequence item marker ("- ...") and its indentation
+_LIST_ITEM = re.compile(r"^(\s*)- ")
+
+
+def _split_top_level(text: str) -> List[Tuple[str, str]]:
+    """Split a YAML document into (key, chunk) pairs at column-0 mapping keys."""
+    chunks: List[Tuple[str, List[str]]] = []
+    for line in text.splitlines():
+        match = _TOP_LEVEL_KEY.match(line)
+        if match:
+            chunks.append((match.group(1) or match.group(2), [line]))
+        elif chunks:
+            chunks[-1][1].append(line)
+        # Lines before the first key (preamble text, "---") are dropped
+    return [(key, "\n".join(lines)) for key, lines in chunks]
+
+
+def _split_list_items(body: str) -> List[str]:
+    """Split a block sequence into one text fragment per item ([] if body is not a list)."""
+    items: List[List[str]] = []
+    item_indent: Optional[str] = None
+    for line in body.splitlines():
+        match = _LIST_ITEM.match(line)
+        if item_indent is None and not match and line.strip() and not line.lstrip().startswith("#"):
+            return []  # Value is a mapping or scalar, not a block sequence
+        if match and (item_indent is None or match.group(1) == item_indent):
+            item_indent = match.group(1)
+            items.append([line])
+        elif items:
+            items[-1].append(line)
+    return [textwrap.dedent("\n".join(lines)) for lines in items]
+
+
+def _salvage_yaml(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Recover the parseable parts of a malformed YAML analysis.
+
+    The document is split at top-level keys; each key is parsed on its own.
+    A key whose value is a block list that fails as a whole is split again
+    into list items, and every item that parses is kept (in order).
+
+    Each fragment that still fails is recorded in ``_parse_issues`` with its
+    path (e.g. ``sections[3]``), the parser error and the fragment text, so
+    _validate_analysis can report exactly what is missing.
+
+    Returns None when nothing could be recovered.
+    """
+    result: Dict[str, Any] = {}
+    issues: List[Dict[str, Any]] = []
+
+    for key, chunk in _split_top_level(text):
+        try:
+            parsed = yaml.load(chunk, Loader=YAML_LOADER)
+            if isinstance(parsed, dict):
+                result.update(parsed)
+                continue
+            raise ValueError("fragment is not a mapping")
+        except Exception as e:
+            chunk_error = e
+
+        body = chunk.split("\n", 1)[1] if "\n" in chunk else ""
+        item_texts = _split_list_items(body)
+        if not item_texts:
+            issues.append({"path": key, "key": key, "index": None, "error": str(chunk_error), "fragment": chunk})
+            continue
+
+        items = []
+        for index, item_text in enumerate(item_texts):
+            try:
+                parsed_item = yaml.load(item_text, Loader=YAML_LOADER)
+                if not isinstance(parsed_item, list) or len(parsed_item) != 1:
+                    raise ValueError("fragment is not a single list item")
+                items.append(parsed_item[0])
+            except Exception as e:
+                issues.append({
+                    "path": f"{key}[{index}]",
+                    "key": key,
+                    "index": index,
+                    "error": str(e),
+                    "fragment": item_text,
+                })
+        result[key] = items
+
+    if not result:
+        return None
+
+    if issues:
+        result["_parse_issues"] = issues
+    logger.warning(
+        f"📄 Output partially salvaged: {len(result) - bool(issues)} keys kept, "
+        f"{len(issues)} fragment(s) unparseable: {[i['path'] for i in issues]}"
+    )
+    return result
+
+
 def _enrich_analysis(
     analysis_data: Dict[str, Any],
     client_name: str,
     client_industry: str,
     is_renewal: bool,
     token_usage: Optional[Dict[str, Any]] = None,
-) -> Dict[str, Any]:
-    """Enrich analysis data with metadata and computed fields."""
+) -> Tuple[Dict[str, Any], AnalysisSummary]:
+    """
+    Enrich analysis data with metadata and computed fields.
+
+    Returns the enriched data and its AnalysisSummary, so validation and
+    callers reuse the single traversal instead of walking the dicts again.
+    """
 
     # Ensure required fields
     analysis_data.setdefault("client_company", client_name)
@@ -169,34 +489,15 @@ def _enrich_analysis(
     analysis_data.setdefault("policy_type", "renewal" if is_renewal else "new")
     analysis_data.setdefault("prepared_by", "Rhône Risk Advisory")
 
-    # Compute overall score from maturity dimensions if present
-    if "maturity_dimensions" in analysis_data:
-        dims = analysis_data["maturity_dimensions"]
-        total_weighted = 0.0
-        total_weight = 0.0
-        for _dim_name, dim_data in dims.items():
-            if isinstance(dim_data, dict):
-                score = dim_data.get("score", 0)
-                weight = dim_data.get("weight", 1.0)
-                if isinstance(score, (int, float)) and isinstance(weight, (int, float)):
-                    total_weighted += score * weight
-                    total_weight += weight
-        if total_weight > 0:
-            computed_score = round(total_weighted / total_weight, 1)
-            exec_summary = analysis_data.setdefault("executive_summary", {})
-            key_metrics = exec_summary.setdefault("key_metrics", {})
-            if not key_metrics.get("overall_maturity_score"):
-                key_metrics["overall_maturity_score"] = computed_score
-                if computed_score >= 8.5:
-                    key_metrics["maturity_level"] = "Optimized"
-                elif computed_score >= 7.0:
-                    key_metrics["maturity_level"] = "Managed"
-                elif computed_score >= 5.5:
-                    key_metrics["maturity_level"] = "Defined"
-                elif computed_score >= 3.5:
-                    key_metrics["maturity_level"] = "Developing"
-                else:
-                    key_metrics["maturity_level"] = "Initial"
+    summary = summarize_analysis(analysis_data)
+
+    # Fill the overall score from maturity dimensions if Claude omitted it
+    if summary.computed_score is not None:
+        exec_summary = analysis_data.setdefault("executive_summary", {})
+        key_metrics = exec_summary.setdefault("key_metrics", {})
+        if not key_metrics.get("overall_maturity_score"):
+            key_metrics["overall_maturity_score"] = summary.computed_score
+            key_metrics["maturity_level"] = summary.maturity_level = maturity_level_for(summary.computed_score)
 
     # Processing metadata
     analysis_data["_metadata"] = {
@@ -206,53 +507,158 @@ def _enrich_analysis(
     if token_usage:
         analysis_data["_metadata"]["token_usage"] = token_usage
 
-    return analysis_data
+    return analysis_data, summary
 
 
-def _validate_analysis(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
+def _validate_analysis(
+    analysis_data: Dict[str, Any],
+    summary: Optional[AnalysisSummary] = None,
+) -> Dict[str, Any]:
     """
     Validate the analysis output for completeness.
 
     Returns dict with 'valid' bool and list of 'warnings'.
     """
-    warnings: List[str] = []
-
-    if analysis_data.get("parse_error"):
-        return {"valid": False, "warnings": ["Output could not be parsed"]}
-
-    for field in ["client_company", "executive_summary", "sections", "policy_summary"]:
-        if field not in analysis_data:
-            warnings.append(f"Missing required field: {field}")
-
-    exec_summary = analysis_data.get("executive_summary", {})
-    if not exec_summary.get("recommendation"):
-        warnings.append("Missing binding recommendation")
-    if not exec_summary.get("overview"):
-        warnings.append("Missing executive summary overview")
-    if not exec_summary.get("key_metrics", {}).get("overall_maturity_score"):
-        warnings.append("Missing overall maturity score")
-
-    sections = analysis_data.get("sections", [])
-    if len(sections) < 10:
-        warnings.append(f"Only {len(sections)} coverage sections found (expected 14+)")
-
-    scored_items = 0
-    for section in sections:
-        for item in section.get("items", []):
-            for carrier_data in item.get("carrier_values", {}).values():
-                if isinstance(carrier_data, dict) and "maturity_score" in carrier_data:
-                    scored_items += 1
-    if scored_items < 10:
-        warnings.append(f"Only {scored_items} items have maturity scores (expected 30+)")
-
-    if "maturity_dimensions" not in analysis_data:
-        warnings.append("Missing maturity dimensions assessment")
-    if "red_flags" not in analysis_data:
-        warnings.append("Missing red flags section")
-    if "recommendations" not in analysis_data:
-        warnings.append("Missing recommendations section")
-
-    return {"valid": len(warnings) == 0, "warnings": warnings}
+    if summary is None:
+        summary = summarize_analysis(analysis_data)
+    return {"valid": summary.valid, "warnings": list(summary.warnings)}
+
+
+# ===========================================================================
+# TARGETED YAML REPAIR
+# ===========================================================================
+
+def _merge_usage(phase: str, usages: List[PhaseUsage]) -> PhaseUsage:
+    """Fold concurrent calls of one phase into a single usage record."""
+    latencies = [u.latency_ms for u in usages if u.latency_ms is not None]
+    first_tokens = [u.time_to_first_token_ms for u in usages if u.time_to_first_token_ms is not None]
+    return PhaseUsage(
+        phase=phase,
+        model=usages[0].model,
+        input_tokens=sum(u.input_tokens for u in usages),
+        output_tokens=sum(u.output_tokens for u in usages),
+        cache_read_input_tokens=sum(u.cache_read_input_tokens for u in usages),
+        cache_creation_input_tokens=sum(u.cache_creation_input_tokens for u in usages),
+        time_to_first_token_ms=min(first_tokens) if first_tokens else None,
+        latency_ms=max(latencies) if latencies else None,  # Calls run concurrently
+        stop_reason=usages[-1].stop_reason,
+    )
+
+
+def _parse_repaired_fragment(issue: Dict[str, Any], text: str) -> Any:
+    """
+    Parse a repaired fragment and return the value to splice in.
+
+    List-item fragments must come back as one list item; top-level
+    fragments must come back as a mapping containing the same key.
+    Raises ValueError if the repair does not have that shape.
+    """
+    cleaned = re.sub(r"^```(?:yaml)?\s*|\s*```$", "", text.strip())
+    parsed = yaml.load(cleaned, Loader=YAML_LOADER)
+
+    if issue["index"] is not None:
+        if isinstance(parsed, list) and len(parsed) == 1:
+            return parsed[0]
+        if isinstance(parsed, dict):
+            return parsed  # Dash dropped — still a usable item
+        raise ValueError("repair is not a single list item")
+
+    if isinstance(parsed, dict) and issue["key"] in parsed:
+        return parsed[issue["key"]]
+    raise ValueError(f"repair does not contain key '{issue['key']}'")
+
+
+async def _repair_fragment(
+    client: anthropic.AsyncAnthropic,
+    issue: Dict[str, Any],
+) -> Tuple[Optional[Any], Optional[PhaseUsage]]:
+    """Ask the extraction model to fix one fragment. Returns (value, usage); value is None on failure."""
+    user_message = "\n".join([
+        f"## PARSER ERROR ({issue['path']})",
+        "",
+        issue["error"],
+        "",
+        "## FRAGMENT",
+        "",
+        issue["fragment"],
+    ])
+    try:
+        response, usage = await _create_message(
+            client,
+            "repair",
+            model=EXTRACTION_MODEL,
+            max_tokens=REPAIR_MAX_TOKENS,
+            system=YAML_REPAIR_PROMPT,
+            messages=[{"role": "user", "content": user_message}],
+        )
+    except anthropic.APIError as e:
+        logger.warning(f"Repair call failed for {issue['path']}: {e}")
+        return None, None
+
+    text = "".join(block.text for block in response.content if block.type == "text")
+    try:
+        return _parse_repaired_fragment(issue, text), usage
+    except Exception as e:
+        logger.warning(f"Repaired fragment for {issue['path']} still unparseable: {e}")
+        return None, usage
+
+
+async def repair_parse_issues(
+    client: anthropic.AsyncAnthropic,
+    analysis_data: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Optional[PhaseUsage]]:
+    """
+    Repair the fragments _salvage_yaml could not parse and splice them back in.
+
+    Each broken fragment is sent on its own, with its parser error, to the
+    extraction model — a few hundred tokens per call instead of re-running
+    Phase 2. Calls run concurrently. Repaired list items are re-inserted at
+    their original index; fragments that still fail stay in _parse_issues.
+
+    Returns:
+        Tuple of (analysis_data, combined "repair" usage or None if no call was made)
+    """
+    issues = analysis_data.get("_parse_issues") or []
+    if not issues:
+        return analysis_data, None
+    if len(issues) > YAML_REPAIR_MAX_FRAGMENTS:
+        logger.warning(f"🔧 {len(issues)} broken fragments exceeds repair limit ({YAML_REPAIR_MAX_FRAGMENTS}) — skipping repair")
+        return analysis_data, None
+
+    logger.info(f"🔧 Repairing {len(issues)} unparseable fragment(s) with {EXTRACTION_MODEL}")
+    results = await asyncio.gather(*(_repair_fragment(client, issue) for issue in issues))
+
+    remaining: List[Dict[str, Any]] = []
+    repaired: List[str] = []
+    # Issues are in document order, so list items are re-inserted in ascending
+    # index order; the offset accounts for earlier items that stayed broken.
+    unrepaired_before: Dict[str, int] = {}
+    for issue, (value, _) in zip(issues, results):
+        key = issue["key"]
+        if value is None:
+            remaining.append(issue)
+            if issue["index"] is not None:
+                unrepaired_before[key] = unrepaired_before.get(key, 0) + 1
+            continue
+
+        if issue["index"] is None:
+            analysis_data[key] = value
+        else:
+            items = analysis_data.setdefault(key, [])
+            items.insert(issue["index"] - unrepaired_before.get(key, 0), value)
+        repaired.append(issue["path"])
+
+    if remaining:
+        analysis_data["_parse_issues"] = remaining
+    else:
+        analysis_data.pop("_parse_issues", None)
+    if repaired:
+        analysis_data["_repaired_fragments"] = repaired
+
+    logger.info(f"🔧 Repair complete — {len(repaired)} repaired, {len(remaining)} still broken")
+
+    usages = [usage for _, usage in results if usage is not None]
+    return analysis_data, _merge_usage("repair", usages) if usages else None
 
 
 # ===========================================================================
@@ -260,10 +666,11 @@ def _validate_analysis(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
 # ===========================================================================
 
 async def extract_policy_data(
-    client: anthropic.Anthropic,
+    client: anthropic.AsyncAnthropic,
     policy_text: str,
     metadata: Optional[Dict[str, Any]] = None,
-) -> str:
+    hedge_policy: Optional[HedgePolicy] = None,
+) -> Tuple[str, PhaseUsage]:
     """
     Phase 1: Extract structured data from raw policy text.
 
@@ -275,9 +682,10 @@ async def extract_policy_data(
         client: Anthropic client instance
         policy_text: Raw text from PDF extraction (with page markers)
         metadata: Optional metadata (client name, file name, etc.)
+        hedge_policy: Hedge the request for tail latency (None = no hedging)
 
     Returns:
-        Structured markdown string with extracted policy data
+        Tuple of (structured markdown with extracted policy data, usage)
     """
     system_prompt = get_extraction_prompt()
 
@@ -300,55 +708,52 @@ async def extract_policy_data(
     logger.info(f"   Model: {EXTRACTION_MODEL}")
     logger.info(f"   Input length: {len(policy_text):,} chars")
 
-    response = client.messages.create(
-        model=EXTRACTION_MODEL,
-        max_tokens=EXTRACTION_MAX_TOKENS,
-        system=system_prompt,
-        messages=[{"role": "user", "content": user_message}],
-    )
+    request = {
+        "model": EXTRACTION_MODEL,
+        "max_tokens": EXTRACTION_MAX_TOKENS,
+        "system": system_prompt,
+        "messages": [{"role": "user", "content": user_message}],
+    }
+    if hedge_policy:
+        response, usage = await _create_message_hedged(client, "extraction", hedge_policy, **request)
+    else:
+        response, usage = await _create_message(client, "extraction", **request)
 
     extracted_text = response.content[0].text
-    tokens = response.usage.input_tokens + response.usage.output_tokens
 
     logger.info("✅ Phase 1 — Extraction complete")
     logger.info(f"   Output length: {len(extracted_text):,} chars")
-    logger.info(f"   Tokens used: {tokens:,}")
+    logger.info(f"   Tokens used: {usage.total_tokens:,} ({usage.latency_ms:,.0f} ms, stop: {usage.stop_reason})")
 
-    return extracted_text
+    return extracted_text, usage
 
 
 # ===========================================================================
 # PHASE 2: ANALYSIS
 # ===========================================================================
 
-async def analyze_extracted_data(
-    client: anthropic.Anthropic,
+def _build_analysis_request(
     extracted_data: str,
     client_name: str,
-    client_industry: str = "Other/General",
-    is_renewal: bool = False,
-    metadata: Optional[Dict[str, Any]] = None,
-) -> Tuple[Dict[str, Any], int]:
+    client_industry: str,
+    is_renewal: bool,
+    metadata: Optional[Dict[str, Any]],
+    structured_output: bool,
+    local_scoring: bool = False,
+    red_flag_hints: str = "",
+) -> Dict[str, Any]:
     """
-    Phase 2: Analyze extracted policy data using Rhône Risk methodology.
-
-    Takes the structured extraction from Phase 1 and applies the full
-    scoring framework.
+    Build the Phase 2 Messages API request.
 
-    Args:
-        client: Anthropic client instance
-        extracted_data: Structured markdown from Phase 1 extraction
-        client_name: Client company name
-        client_industry: Industry classification
-        is_renewal: Whether this is a renewal policy
-        metadata: Optional context
-
-    Returns:
-        Tuple of (analysis_dict, tokens_used)
+    The system prompt and the user turn carrying the Phase 1 output are
+    marked for prompt caching, so completion follow-ups that extend the
+    same prefix are billed at the cache-read rate.
     """
     system_prompt = get_analysis_prompt(
         client_industry=client_industry,
         is_renewal=is_renewal,
+        structured_output=structured_output,
+        local_scoring=local_scoring,
     )
 
     user_parts = [
@@ -366,38 +771,296 @@ async def analyze_extracted_data(
                 user_parts.append(f"**{key.replace('_', ' ').title()}:** {metadata[key]}")
         user_parts.append("")
 
+    if structured_output:
+        output_instruction = f"and record the complete analysis with the {ANALYSIS_TOOL_NAME} tool."
+    else:
+        output_instruction = "and produce the complete YAML analysis output."
+
     user_parts.extend([
         "## EXTRACTED POLICY DATA",
         "",
         "Below is the structured extraction from the policy document.",
         "Analyze this data using the Rhône Risk scoring methodology",
-        "and produce the complete YAML analysis output.",
+        output_instruction,
         "",
         extracted_data,
     ])
+    if red_flag_hints:
+        user_parts.extend(["", red_flag_hints])
     user_message = "\n".join(user_parts)
 
+    request: Dict[str, Any] = {
+        "model": ANALYSIS_MODEL,
+        "max_tokens": ANALYSIS_MAX_TOKENS,
+        "system": [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}],
+        "messages": [{
+            "role": "user",
+            "content": [{"type": "text", "text": user_message, "cache_control": {"type": "ephemeral"}}],
+        }],
+    }
+    if structured_output:
+        request["tools"] = [analysis_tool_definition()]
+        request["tool_choice"] = {"type": "tool", "name": ANALYSIS_TOOL_NAME}
+    return request
+
+
+async def analyze_extracted_data(
+    client: anthropic.AsyncAnthropic,
+    extracted_data: str,
+    client_name: str,
+    client_industry: str = "Other/General",
+    is_renewal: bool = False,
+    metadata: Optional[Dict[str, Any]] = None,
+    structured_output: Optional[bool] = None,
+    local_scoring: Optional[bool] = None,
+    red_flag_hints: str = "",
+) -> Tuple[Dict[str, Any], PhaseUsage]:
+    """
+    Phase 2: Analyze extracted policy data using Rhône Risk methodology.
+
+    Takes the structured extraction from Phase 1 and applies the full
+    scoring framework.
+
+    Args:
+        client: Anthropic client instance
+        extracted_data: Structured markdown from Phase 1 extraction
+        client_name: Client company name
+        client_industry: Industry classification
+        is_renewal: Whether this is a renewal policy
+        metadata: Optional context
+        structured_output: Force the schema-constrained tool call
+            (defaults to USE_STRUCTURED_OUTPUT)
+        local_scoring: Ask for factor points instead of scores
+            (defaults to USE_LOCAL_SCORING)
+        red_flag_hints: Pre-scan candidates to verify (see red_flag_scanner)
+
+    Returns:
+        Tuple of (analysis_dict, usage)
+    """
+    if structured_output is None:
+        structured_output = USE_STRUCTURED_OUTPUT
+    if local_scoring is None:
+        local_scoring = USE_LOCAL_SCORING
+
+    request = _build_analysis_request(
+        extracted_data, client_name, client_industry, is_renewal, metadata,
+        structured_output, local_scoring, red_flag_hints,
+    )
+    input_length = len(request["messages"][0]["content"][0]["text"])
+
     logger.info("🔍 Phase 2 — Analysis starting")
     logger.info(f"   Model: {ANALYSIS_MODEL}")
     logger.info(f"   Client: {client_name} ({client_industry})")
-    logger.info(f"   Input length: {len(user_message):,} chars")
-
-    response = client.messages.create(
-        model=ANALYSIS_MODEL,
-        max_tokens=ANALYSIS_MAX_TOKENS,
-        system=system_prompt,
-        messages=[{"role": "user", "content": user_message}],
-    )
+    logger.info(f"   Input length: {input_length:,} chars")
+    logger.info(f"   Output mode: {'structured tool call' if structured_output else 'YAML'}")
+    logger.info(f"   Scoring: {'local engine (factor points)' if local_scoring else 'model'}")
+
+    response, usage = await _create_message(client, "analysis", **request)
+    tokens = usage.total_tokens
+
+    if structured_output:
+        tool_input = next(
+            (block.input for block in response.content
+             if block.type == "tool_use" and block.name == ANALYSIS_TOOL_NAME),
+            None,
+        )
+        if tool_input is not None:
+            logger.info("✅ Phase 2 — Analysis complete (structured)")
+            logger.info(f"   Tokens used: {tokens:,}")
+            return parse_structured_output(tool_input), usage
+        logger.warning("Structured output requested but no tool call returned — parsing text instead")
 
-    raw_output = response.content[0].text
-    tokens = response.usage.input_tokens + response.usage.output_tokens
+    raw_output = "".join(block.text for block in response.content if block.type == "text")
 
     logger.info("✅ Phase 2 — Analysis complete")
     logger.info(f"   Output length: {len(raw_output):,} chars")
     logger.info(f"   Tokens used: {tokens:,}")
 
-    analysis_data = _parse_yaml_or_json(raw_output)
-    return analysis_data, tokens
+    analysis_data = await asyncio.to_thread(_parse_yaml_or_json, raw_output)
+    return analysis_data, usage
+
+
+# ===========================================================================
+# SELECTIVE COMPLETION (follow-ups for sections validation flags)
+# ===========================================================================
+
+# Validation warning (substring) → top-level key a follow-up request can fill
+COMPLETION_TARGETS = (
+    ("coverage sections found", "sections"),
+    ("Missing required field: sections", "sections"),
+    ("Missing required field: executive_summary", "executive_summary"),
+    ("Missing binding recommendation", "executive_summary"),
+    ("Missing executive summary overview", "executive_summary"),
+    ("Missing overall maturity score", "maturity_dimensions"),
+    ("Missing maturity dimensions assessment", "maturity_dimensions"),
+    ("Missing required field: policy_summary", "policy_summary"),
+    ("Missing red flags section", "red_flags"),
+    ("Missing recommendations section", "recommendations"),
+)
+
+
+def _completion_targets(warnings: List[str]) -> List[str]:
+    """Map validation warnings to the top-level keys to request, in schema order."""
+    targets: List[str] = []
+    for warning in warnings:
+        for marker, key in COMPLETION_TARGETS:
+            if marker in warning and key not in targets:
+                targets.append(key)
+    return targets
+
+
+def _completion_instruction(key: str, analysis_data: Dict[str, Any], structured: bool = False) -> str:
+    """User-turn text asking for one missing top-level key (as YAML, or in the forced tool call)."""
+    if structured:
+        scope = (
+            f"Call {ANALYSIS_TOOL_NAME} with ONLY the `{key}` field filled in, following the output format "
+            "in your instructions. Give every other required field an empty value ([] or {})."
+        )
+    else:
+        scope = f"Output ONLY the top-level `{key}:` key as valid YAML, following the output format in your instructions."
+    lines = [
+        "## COMPLETION REQUEST",
+        "",
+        f"Your previous analysis of this policy was incomplete: the `{key}` output is missing or incomplete.",
+        scope,
+        "Do not repeat any other part of the analysis.",
+    ]
+    if key == "sections":
+        present = [s.get("name") for s in analysis_data.get("sections") or [] if isinstance(s, dict)]
+        if present:
+            lines.append("")
+            lines.append("These sections are already complete — do NOT include them:")
+            lines.extend(f"- {name}" for name in present)
+            lines.append("Include every other coverage section with ALL sub-items scored.")
+    elif key == "executive_summary":
+        lines.append("Include the overview, key_metrics, critical_action_items and the binding recommendation.")
+    if not structured:
+        lines.append("")
+        lines.append("IMPORTANT: Your response must be ONLY valid YAML. No preamble, no explanation, no code fences.")
+    return "\n".join(lines)
+
+
+def _merge_completion(analysis_data: Dict[str, Any], key: str, value: Any) -> bool:
+    """Merge a follow-up result into analysis_data without overwriting existing content."""
+    if value in (None, {}, []):
+        return False
+
+    if key == "sections" and isinstance(value, list):
+        sections = analysis_data.get("sections")
+        if not isinstance(sections, list):
+            sections = analysis_data["sections"] = []
+        present = {s.get("name") for s in sections if isinstance(s, dict)}
+        added = [s for s in value if isinstance(s, dict) and s.get("name") not in present]
+        sections.extend(added)
+        return bool(added)
+
+    existing = analysis_data.get(key)
+    if isinstance(existing, dict) and isinstance(value, dict):
+        for field, field_value in value.items():
+            if not existing.get(field):
+                existing[field] = field_value
+        return True
+
+    analysis_data[key] = value
+    return True
+
+
+async def _complete_key(
+    client: anthropic.AsyncAnthropic,
+    request: Dict[str, Any],
+    key: str,
+    analysis_data: Dict[str, Any],
+) -> Tuple[Optional[Any], Optional[PhaseUsage]]:
+    """
+    Request one missing key, extending the cached Phase 2 prefix. Returns (value, usage).
+
+    Only a text block is appended to the Phase 2 user turn; tools and
+    tool_choice are left as they were, since changing either invalidates
+    the cached message blocks. In tool mode the forced tool call is scoped
+    to the one key by the instruction, and only that key is taken from it.
+    """
+    structured = "tools" in request
+    follow_up = dict(request)
+    base_message = request["messages"][0]
+    instruction = _completion_instruction(key, analysis_data, structured=structured)
+    follow_up["messages"] = [{
+        "role": "user",
+        "content": base_message["content"] + [{"type": "text", "text": instruction}],
+    }]
+
+    try:
+        response, usage = await _create_message(client, "completion", **follow_up)
+    except anthropic.APIError as e:
+        logger.warning(f"Completion request for '{key}' failed: {e}")
+        return None, None
+
+    parsed = next(
+        (block.input for block in response.content
+         if structured and block.type == "tool_use" and block.name == ANALYSIS_TOOL_NAME),
+        None,
+    )
+    if parsed is None:
+        text = "".join(block.text for block in response.content if block.type == "text")
+        parsed = await asyncio.to_thread(_parse_yaml_or_json, text)
+    if parsed.get("parse_error") or key not in parsed:
+        logger.warning(f"Completion request for '{key}' returned no usable '{key}' key")
+        return None, usage
+    return parsed[key], usage
+
+
+async def complete_missing_sections(
+    client: anthropic.AsyncAnthropic,
+    analysis_data: Dict[str, Any],
+    request: Dict[str, Any],
+    max_rounds: int = 1,
+) -> Tuple[Dict[str, Any], Optional[PhaseUsage]]:
+    """
+    Fill in what validation flags as missing with narrowly scoped follow-ups.
+
+    Each flagged top-level key (too few sections, no red flags, no maturity
+    dimensions, ...) becomes its own request that reuses the cached Phase 2
+    system prompt and Phase 1 output and asks only for that key. Results
+    are merged into analysis_data without overwriting existing content.
+
+    Args:
+        client: Anthropic client instance
+        analysis_data: Parsed (and repaired) Phase 2 output
+        request: The Phase 2 request from _build_analysis_request
+        max_rounds: Validate → follow-up rounds before giving up
+
+    Returns:
+        Tuple of (analysis_data, combined "completion" usage or None if no call was made)
+    """
+    usages: List[PhaseUsage] = []
+    completed: List[str] = list(analysis_data.get("_completed_sections", []))
+
+    for round_number in range(1, max_rounds + 1):
+        if analysis_data.get("parse_error"):
+            break
+        targets = _completion_targets(summarize_analysis(analysis_data).warnings)
+        if not targets:
+            break
+
+        logger.info(f"🧩 Completion round {round_number}: requesting {targets}")
+        results = await asyncio.gather(*(
+            _complete_key(client, request, key, analysis_data) for key in targets
+        ))
+
+        progress = False
+        for key, (value, usage) in zip(targets, results):
+            if usage:
+                usages.append(usage)
+            if value is not None and _merge_completion(analysis_data, key, value):
+                completed.append(key)
+                progress = True
+        if not progress:
+            break
+
+    if completed:
+        analysis_data["_completed_sections"] = completed
+        logger.info(f"🧩 Completion merged: {completed}")
+
+    return analysis_data, _merge_usage("completion", usages) if usages else None
 
 
 # ===========================================================================
@@ -416,9 +1079,16 @@ class ClaudeAnalyzer:
     def __init__(self):
         if not settings.ANTHROPIC_API_KEY:
             raise ValueError("ANTHROPIC_API_KEY is not configured")
-        self.client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+        self.client = anthropic.AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
         self.model = ANALYSIS_MODEL
         self.max_tokens = ANALYSIS_MAX_TOKENS
+        self.phase1_hedge = None
+        if getattr(settings, "PHASE1_HEDGING_ENABLED", False):
+            self.phase1_hedge = HedgePolicy(
+                percentile=settings.PHASE1_HEDGE_PERCENTILE,
+                window=settings.PHASE1_HEDGE_WINDOW,
+                min_samples=settings.PHASE1_HEDGE_MIN_SAMPLES,
+            )
 
     # ------------------------------------------------------------------
     # Two-phase analysis (NEW — recommended)
@@ -451,14 +1121,14 @@ class ClaudeAnalyzer:
             AnalysisResult with both extracted data and analysis
         """
         logger.info(f"🚀 Two-phase analysis starting for: {client_name}")
-        total_tokens = 0
+        phase_usage: List[PhaseUsage] = []
 
         try:
             # Phase 1: Extraction
             if progress_callback:
                 await progress_callback("extracting_data", "Extracting structured data from policy document...")
 
-            extracted_data = await extract_policy_data(
+            extracted_data, extraction_usage = await extract_policy_data(
                 client=self.client,
                 policy_text=policy_text,
                 metadata={
@@ -466,53 +1136,107 @@ class ClaudeAnalyzer:
                     "client_industry": client_industry,
                     **(metadata or {}),
                 },
+                hedge_policy=self.phase1_hedge,
             )
+            phase_usage.append(extraction_usage)
             logger.info(f"📊 Extraction produced {len(extracted_data):,} chars")
 
+            # Red flag pre-scan: preliminary risk signal + Phase 2 hints
+            red_flag_candidates = red_flag_scanner.scan(extracted_data) if RED_FLAG_PRESCAN_ENABLED else []
+            red_flag_hints = red_flag_scanner.format_hints(red_flag_candidates)
+
             # Phase 2: Analysis
             if progress_callback:
-                await progress_callback("analyzing", "Applying Rhône Risk scoring methodology...")
-
-            analysis_data, analysis_tokens = await analyze_extracted_data(
+                message = "Applying Rhône Risk scoring methodology..."
+                if red_flag_candidates:
+                    high = sum(c.severity == "HIGH" for c in red_flag_candidates)
+                    message = f"Pre-scan found {len(red_flag_candidates)} possible red flags ({high} HIGH). {message}"
+                await progress_callback(
+                    "analyzing",
+                    message,
+                    preliminary_red_flags=[c.to_dict() for c in red_flag_candidates],
+                )
+
+            analysis_data, analysis_usage = await analyze_extracted_data(
                 client=self.client,
                 extracted_data=extracted_data,
                 client_name=client_name,
                 client_industry=client_industry,
                 is_renewal=is_renewal,
                 metadata=metadata,
+                red_flag_hints=red_flag_hints,
+            )
+            phase_usage.append(analysis_usage)
+
+            if YAML_REPAIR_ENABLED and analysis_data.get("_parse_issues"):
+                analysis_data, repair_usage = await repair_parse_issues(self.client, analysis_data)
+                if repair_usage:
+                    phase_usage.append(repair_usage)
+
+            # Deterministic scores from factor points (before completion, so
+            # locally-computed scores are not flagged as missing)
+            if USE_LOCAL_SCORING:
+                scoring_engine.score(analysis_data)
+
+            # Narrow follow-ups for whatever validation flags as missing
+            if COMPLETION_ENABLED:
+                analysis_data, completion_usage = await complete_missing_sections(
+                    self.client,
+                    analysis_data,
+                    request=_build_analysis_request(
+                        extracted_data, client_name, client_industry, is_renewal, metadata,
+                        USE_STRUCTURED_OUTPUT, USE_LOCAL_SCORING, red_flag_hints,
+                    ),
+                    max_rounds=COMPLETION_MAX_ROUNDS,
+                )
+                if completion_usage:
+                    phase_usage.append(completion_usage)
+                    if USE_LOCAL_SCORING:
+                        scoring_engine.score(analysis_data)  # Score the merged sections
+
+            # Cross-check the pre-scan against Phase 2's red flags
+            if red_flag_candidates:
+                analysis_data["_red_flag_prescan"] = {
+                    "candidates": [c.to_dict() for c in red_flag_candidates],
+                    **red_flag_scanner.cross_check(red_flag_candidates, analysis_data.get("red_flags")),
+                }
+
+            usage = _summarize_usage(
+                phase_usage,
+                extraction_model=EXTRACTION_MODEL,
+                analysis_model=ANALYSIS_MODEL,
+                mode="two_phase",
+                output_mode="structured" if USE_STRUCTURED_OUTPUT else "yaml",
+                scoring="local" if USE_LOCAL_SCORING else "model",
             )
-            total_tokens += analysis_tokens
 
             # Enrich
-            analysis_data = _enrich_analysis(
+            analysis_data, summary = _enrich_analysis(
                 analysis_data,
                 client_name=client_name,
                 client_industry=client_industry,
                 is_renewal=is_renewal,
-                token_usage={
-                    "total_tokens": total_tokens,
-                    "extraction_model": EXTRACTION_MODEL,
-                    "analysis_model": ANALYSIS_MODEL,
-                    "mode": "two_phase",
-                },
+                token_usage=usage,
             )
 
             # Validate
-            validation = _validate_analysis(analysis_data)
-            if not validation["valid"]:
-                logger.warning(f"⚠️  Validation warnings: {validation['warnings']}")
-                analysis_data["_validation_warnings"] = validation["warnings"]
+            if not summary.valid:
+                logger.warning(f"⚠️  Validation warnings: {summary.warnings}")
+                analysis_data["_validation_warnings"] = list(summary.warnings)
 
-            score = analysis_data.get("executive_summary", {}).get("key_metrics", {}).get("overall_maturity_score", "N/A")
-            rec = analysis_data.get("executive_summary", {}).get("recommendation", "N/A")
-            logger.info(f"✅ Two-phase complete — Score: {score}, Recommendation: {rec}")
+            logger.info(
+                f"✅ Two-phase complete — Score: {summary.overall_score or 'N/A'}, "
+                f"Recommendation: {summary.recommendation or 'N/A'}"
+            )
 
             return AnalysisResult(
                 success=True,
                 analysis_data=analysis_data,
                 raw_response=None,
-                tokens_used=total_tokens,
+                tokens_used=usage["total_tokens"],
                 extracted_data=extracted_data,
+                usage=usage,
+                summary=summary,
             )
 
         except anthropic.APIError as e:
@@ -585,7 +1309,9 @@ Include maturity dimensions, red flags, and binding recommendation.
 """
 
         try:
-            response = self.client.messages.create(
+            response, analysis_usage = await _create_message(
+                self.client,
+                "analysis",
                 model=self.model,
                 max_tokens=self.max_tokens,
                 system=system_prompt,
@@ -593,32 +1319,36 @@ Include maturity dimensions, red flags, and binding recommendation.
             )
 
             raw_text = response.content[0].text
-            tokens_used = response.usage.input_tokens + response.usage.output_tokens
+            logger.info(f"   Response: {len(raw_text):,} chars, {analysis_usage.total_tokens:,} tokens")
 
-            logger.info(f"   Response: {len(raw_text):,} chars, {tokens_used:,} tokens")
+            analysis_data = await asyncio.to_thread(_parse_yaml_or_json, raw_text)
 
-            analysis_data = _parse_yaml_or_json(raw_text)
+            phase_usage = [analysis_usage]
+            if YAML_REPAIR_ENABLED and analysis_data.get("_parse_issues"):
+                analysis_data, repair_usage = await repair_parse_issues(self.client, analysis_data)
+                if repair_usage:
+                    phase_usage.append(repair_usage)
 
-            analysis_data = _enrich_analysis(
+            usage = _summarize_usage(phase_usage, model=self.model, mode="single_pass")
+            tokens_used = usage["total_tokens"]
+
+            analysis_data, summary = _enrich_analysis(
                 analysis_data,
                 client_name=client_name,
                 client_industry=client_industry,
                 is_renewal=is_renewal,
-                token_usage={
-                    "total_tokens": tokens_used,
-                    "model": self.model,
-                    "mode": "single_pass",
-                },
+                token_usage=usage,
             )
 
-            score = analysis_data.get("executive_summary", {}).get("key_metrics", {}).get("overall_maturity_score", "N/A")
-            logger.info(f"✅ Analysis complete — Score: {score}")
+            logger.info(f"✅ Analysis complete — Score: {summary.overall_score or 'N/A'}")
 
             return AnalysisResult(
                 success=True,
                 analysis_data=analysis_data,
                 raw_response=raw_text,
                 tokens_used=tokens_used,
+                usage=usage,
+                summary=summary,
             )
 
         except anthropic.APIError as e:
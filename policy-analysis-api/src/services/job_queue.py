@@ -0,0 +1,435 @@
+"""
+Job Queue
+Durable analysis job queue backed by SQLite (WAL mode)
+
+Webhooks and direct uploads persist their job before responding, so an
+accepted analysis survives redeploys and crashes. A fixed pool of workers
+claims jobs with a visibility timeout (lease): a job whose worker dies is
+claimed again once its lease expires, and running jobs keep their lease
+alive with a heartbeat. A job that errors or is abandoned is retried up to
+JOB_MAX_ATTEMPTS times, then parked in the dead-letter state.
+
+Analysis failures handled inside the orchestrator (bad PDF, Claude errors
+after its own retries) are final and already reported via the callback;
+the queue retries only jobs that crashed or were interrupted.
+
+Directly uploaded PDFs are stored in an uploads/ directory beside the
+database, on the same persistent volume, and deleted only once their job
+is done or dead, so a retried or reclaimed upload job still has its file.
+
+Scheduling: jobs are claimed by priority class (payload "priority"), then
+earliest deadline. A job's deadline is its class's turnaround window,
+pulled earlier by an upcoming renewal_date. Waiting jobs age one class up
+every JOB_PRIORITY_AGING_SECONDS, so a bulk backfill can't starve. Express
+workers (JOB_URGENT_WORKERS) only take urgent jobs, so an urgent upload
+starts within seconds even while every regular worker is busy.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config import settings
+from services.orchestrator import analysis_status_store, run_policy_analysis
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+DEAD = "dead"
+
+# Finished jobs are kept this long for inspection
+DONE_RETENTION_SECONDS = 7 * 24 * 3600
+
+# Priority name → (class rank, turnaround window in seconds); lower ranks run first
+PRIORITY_CLASSES = {
+    "urgent": (0, 15 * 60),
+    "high": (1, 3600),
+    "normal": (2, 4 * 3600),
+    "low": (3, 24 * 3600),
+}
+URGENT = PRIORITY_CLASSES["urgent"][0]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    priority INTEGER NOT NULL DEFAULT 2,
+    deadline REAL NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+"""
+
+# Columns added since the first release of the schema
+_MIGRATIONS = {
+    "priority": "ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 2",
+    "deadline": "ALTER TABLE jobs ADD COLUMN deadline REAL NOT NULL DEFAULT 0",
+}
+
+JobHandler = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+def schedule(payload: Dict[str, Any], now: float) -> Tuple[int, float]:
+    """
+    (priority class, deadline) for a job.
+
+    Unknown priorities run as "normal". A renewal_date sets the deadline to
+    JOB_RENEWAL_LEAD_DAYS before the renewal when that is sooner than the
+    class's turnaround window.
+    """
+    rank, window = PRIORITY_CLASSES.get(str(payload.get("priority") or "normal").lower(), PRIORITY_CLASSES["normal"])
+    deadline = now + window
+
+    renewal_date = payload.get("renewal_date")
+    if renewal_date:
+        try:
+            renewal = date.fromisoformat(str(renewal_date)[:10])
+            renewal_at = datetime(renewal.year, renewal.month, renewal.day, tzinfo=timezone.utc).timestamp()
+            deadline = min(deadline, renewal_at - settings.JOB_RENEWAL_LEAD_DAYS * 86400)
+        except ValueError:
+            logger.warning(f"   Ignoring invalid renewal_date {renewal_date!r}")
+    return rank, deadline
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue with a worker pool, leases, retries and a dead-letter state.
+
+    All database access goes through one connection guarded by a lock and
+    runs in a thread, off the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.JOB_QUEUE_PATH,
+        workers: int = settings.JOB_QUEUE_WORKERS,
+        visibility_timeout: float = settings.JOB_VISIBILITY_TIMEOUT_SECONDS,
+        max_attempts: int = settings.JOB_MAX_ATTEMPTS,
+        retry_delay: float = settings.JOB_RETRY_DELAY_SECONDS,
+        aging_seconds: float = settings.JOB_PRIORITY_AGING_SECONDS,
+        urgent_workers: int = settings.JOB_URGENT_WORKERS,
+        poll_interval: float = 1.0,
+        handler: Optional[JobHandler] = None,
+    ):
+        self.path = path
+        self.workers = max(1, workers)
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.aging_seconds = max(1.0, aging_seconds)
+        self.urgent_workers = max(0, urgent_workers)
+        self.poll_interval = poll_interval
+        self.handler = handler or _run_analysis
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._tasks: List[asyncio.Task] = []
+        self._running: Dict[str, int] = {}  # job_id → attempt, for jobs claimed by this process
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def upload_dir(self) -> str:
+        """Where direct-upload PDFs wait for their job (beside the database)"""
+        return os.path.join(os.path.dirname(self.path) or ".", "uploads")
+
+    def upload_path(self, job_id: str, filename: str) -> str:
+        """Path to store a job's uploaded file at; the queue deletes it once the job is done or dead"""
+        os.makedirs(self.upload_dir, exist_ok=True)
+        return os.path.join(self.upload_dir, f"{job_id}_{os.path.basename(filename)}")
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")  # An acknowledged job is on disk
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, ddl in _MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(ddl)
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        """Run a statement; returns the number of rows changed"""
+        with self._lock:
+            return self._connect().execute(sql, params).rowcount
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def _insert(self, job_id: str, payload: Dict[str, Any]) -> bool:
+        now = time.time()
+        priority, deadline = schedule(payload, now)
+        return self._execute(
+            "INSERT OR IGNORE INTO jobs (id, payload, status, priority, deadline, available_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, json.dumps(payload, default=str), QUEUED, priority, deadline, now, now, now),
+        ) == 1
+
+    def _claim(self, max_priority: Optional[int] = None) -> Optional[Tuple[str, Dict[str, Any], int]]:
+        """
+        Lease the next ready job (queued, or running with an expired lease).
+
+        Jobs are ordered by priority class less one class per aging interval
+        waited, then by deadline. max_priority limits the claim to jobs of
+        that class or better (express workers).
+        """
+        now = time.time()
+        lane = "AND priority <= ? " if max_priority is not None else ""
+        params = (QUEUED, RUNNING, now) + ((max_priority,) if max_priority is not None else ()) + (now, self.aging_seconds)
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = conn.execute(
+                        "SELECT id, payload, attempts FROM jobs WHERE status IN (?, ?) AND available_at <= ? " + lane +
+                        "ORDER BY MAX(priority - CAST((? - created_at) / ? AS INTEGER), 0), deadline, created_at LIMIT 1",
+                        params,
+                    ).fetchone()
+                    if row is None:
+                        conn.execute("COMMIT")
+                        return None
+
+                    job_id, payload, attempts = row
+                    if attempts >= self.max_attempts:  # Lease expired on its last attempt
+                        conn.execute(
+                            "UPDATE jobs SET status = ?, updated_at = ?, last_error = COALESCE(last_error, ?) WHERE id = ?",
+                            (DEAD, now, "Lease expired (worker lost)", job_id),
+                        )
+                        logger.error(f"📭 Job {job_id} moved to dead letter after {attempts} attempts")
+                        _discard_upload(json.loads(payload))
+                        continue
+
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = ?, available_at = ?, updated_at = ? WHERE id = ?",
+                        (RUNNING, attempts + 1, now + self.visibility_timeout, now, job_id),
+                    )
+                    conn.execute("COMMIT")
+                    return job_id, json.loads(payload), attempts + 1
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _extend(self, job_id: str, attempt: int) -> None:
+        now = time.time()
+        self._execute(
+            "UPDATE jobs SET available_at = ?, updated_at = ? WHERE id = ? AND status = ? AND attempts = ?",
+            (now + self.visibility_timeout, now, job_id, RUNNING, attempt),
+        )
+
+    def _finish(self, job_id: str, attempt: int, error: Optional[str] = None) -> str:
+        """Record a job's outcome: done, queued for retry, or dead"""
+        now = time.time()
+        if error is None:
+            status, available_at = DONE, now
+        elif attempt >= self.max_attempts:
+            status, available_at = DEAD, now
+        else:
+            status, available_at = QUEUED, now + self.retry_delay * attempt
+        self._execute(
+            "UPDATE jobs SET status = ?, available_at = ?, updated_at = ?, last_error = ? "
+            "WHERE id = ? AND attempts = ?",
+            (status, available_at, now, error, job_id, attempt),
+        )
+        return status
+
+    def _release(self, job_ids: List[str]) -> None:
+        """Hand interrupted jobs back without using up an attempt"""
+        now = time.time()
+        for job_id in job_ids:
+            self._execute(
+                "UPDATE jobs SET status = ?, attempts = MAX(attempts - 1, 0), available_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = ?",
+                (QUEUED, now, now, job_id, RUNNING),
+            )
+
+    def _prune(self) -> None:
+        self._execute("DELETE FROM jobs WHERE status = ? AND updated_at < ?", (DONE, time.time() - DONE_RETENTION_SECONDS))
+
+    def _pending_ids(self) -> List[str]:
+        return [row[0] for row in self._query("SELECT id FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING))]
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def enqueue(self, job_id: str, payload: Dict[str, Any]) -> bool:
+        """
+        Persist a job (durably) before returning. Idempotent per job_id.
+
+        Returns:
+            True if the job was added, False if job_id was already queued
+        """
+        added = await asyncio.to_thread(self._insert, job_id, payload)
+        if added:
+            _mark_queued(job_id)
+            if self._wakeup is not None:
+                self._wakeup.set()
+        return added
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        columns = ("id", "status", "attempts", "priority", "deadline", "last_error", "created_at", "updated_at")
+        rows = await asyncio.to_thread(self._query, f"SELECT {', '.join(columns)} FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        return dict(zip(columns, rows[0]))
+
+    async def counts(self) -> Dict[str, int]:
+        """Jobs per state"""
+        rows = await asyncio.to_thread(self._query, "SELECT status, COUNT(*) FROM jobs GROUP BY status")
+        return {QUEUED: 0, RUNNING: 0, DONE: 0, DEAD: 0, **dict(rows)}
+
+    async def requeue_dead(self, job_id: str) -> bool:
+        """Give a dead-lettered job a fresh set of attempts"""
+        now = time.time()
+        changed = await asyncio.to_thread(
+            self._execute,
+            "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+            (QUEUED, now, now, job_id, DEAD),
+        )
+        if changed and self._wakeup is not None:
+            self._wakeup.set()
+        return changed == 1
+
+    async def start(self) -> None:
+        """Open the queue, show pending jobs as queued, and start the workers"""
+        if self._tasks:
+            return
+        await asyncio.to_thread(self._prune)
+        for job_id in await asyncio.to_thread(self._pending_ids):
+            _mark_queued(job_id)
+
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        self._tasks += [
+            asyncio.create_task(self._worker(self.workers + n, max_priority=URGENT))
+            for n in range(self.urgent_workers)
+        ]
+        counts = await self.counts()
+        logger.info(
+            f"📬 Job queue started with {self.workers} workers + {self.urgent_workers} urgent "
+            f"({counts[QUEUED] + counts[RUNNING]} pending, {counts[DEAD]} dead)"
+        )
+
+    async def shutdown(self) -> None:
+        """Stop the workers; jobs they were running go straight back to the queue"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        interrupted, self._running = list(self._running), {}
+        if interrupted:
+            await asyncio.to_thread(self._release, interrupted)
+            logger.info(f"📬 Returned {len(interrupted)} interrupted jobs to the queue")
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    async def _worker(self, number: int, max_priority: Optional[int] = None) -> None:
+        while True:
+            try:
+                job = await asyncio.to_thread(self._claim, max_priority)
+            except Exception as e:
+                logger.error(f"   Job queue worker {number} failed to claim a job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run(*job)
+            except Exception as e:
+                logger.error(
+                    f"   Job queue worker {number} failed recording job {job[0]}: {e} "
+                    f"(the job is re-run once its lease expires)"
+                )
+
+    async def _heartbeat(self, job_id: str, attempt: int) -> None:
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            await asyncio.to_thread(self._extend, job_id, attempt)
+
+    async def _run(self, job_id: str, payload: Dict[str, Any], attempt: int) -> None:
+        logger.info(f"📬 Running job {job_id} (attempt {attempt}/{self.max_attempts})")
+        self._running[job_id] = attempt
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, attempt))
+        error = None
+        try:
+            await self.handler(job_id, payload)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            logger.error(f"   Job {job_id} failed on attempt {attempt}: {error}")
+        finally:
+            heartbeat.cancel()
+
+        try:
+            status = await asyncio.to_thread(self._finish, job_id, attempt, error)
+        finally:
+            self._running.pop(job_id, None)
+        if status == DEAD:
+            logger.error(f"📭 Job {job_id} moved to dead letter after {attempt} attempts")
+        if status in (DONE, DEAD):
+            _discard_upload(payload)
+
+
+async def _run_analysis(job_id: str, payload: Dict[str, Any]) -> None:
+    await run_policy_analysis(analysis_id=job_id, payload=payload)
+
+
+def _discard_upload(payload: Dict[str, Any]) -> None:
+    """Delete a finished job's uploaded file"""
+    path = payload.get("_local_file_path")
+    if not (payload.get("_queued_upload") and path):
+        return
+    try:
+        os.remove(path)
+        logger.info(f"   Removed uploaded file: {path}")
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"   Failed to remove uploaded file {path}: {e}")
+
+
+def _mark_queued(job_id: str) -> None:
+    """Show a persisted job as queued until a worker starts it"""
+    analysis_status_store.setdefault(job_id, {
+        "analysis_id": job_id,
+        "status": "queued",
+        "progress": "Waiting for a worker...",
+        "started_at": datetime.utcnow().isoformat(),
+        "completed_at": None,
+        "error": None,
+        "result": None,
+    })
+
+
+# Module-level instance
+job_queue = JobQueue()
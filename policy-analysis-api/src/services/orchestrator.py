@@ -9,15 +9,18 @@ import json
 import logging
 import asyncio
 import os
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 import aiohttp
 
 from config import settings
+from services.analysis_schema import summarize_analysis
 from services.pdf_extractor import extractor
 from services.claude_analyzer import analyzer
-from services.report_generator import generator
+from services.branding import branding_service
+from services.report_service import report_service
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +36,13 @@ RETRY_DELAYS = [30, 60]  # seconds between retries
 CALLBACK_MAX_RETRIES = 2
 CALLBACK_RETRY_DELAY = 5  # seconds
 
+# Reports rendered after the callback (REPORT_RENDER_MODE=background)
+_background_reports = set()
+_background_render_slot = asyncio.Semaphore(1)
+
+# Per-analysis locks (lock, holders + waiters) so a late report is published once
+_report_locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+
 
 def _get_supabase_client():
     """Lazy-initialize Supabase client"""
@@ -115,8 +125,10 @@ async def run_policy_analysis(analysis_id: str, payload: Dict[str, Any]):
                 if use_two_phase:
                     logger.info(f"   Using TWO-PHASE analysis pipeline (attempt {attempt + 1})")
 
-                    async def progress_cb(phase: str, message: str):
+                    async def progress_cb(phase: str, message: str, **details):
                         _update_status(analysis_id, phase, message)
+                        if details and analysis_id in analysis_status_store:
+                            analysis_status_store[analysis_id].update(details)
                         await _persist_status(payload.get("policy_id"), phase, analysis_id)
 
                     analysis_result = await analyzer.analyze_policy_two_phase(
@@ -178,54 +190,45 @@ async def run_policy_analysis(analysis_id: str, payload: Dict[str, Any]):
 
         analysis_data = analysis_result.analysis_data
         logger.info(f"   Analysis complete, tokens used: {analysis_result.tokens_used}")
-
-        # STEP 3: Generate PDF report
-        _update_status(analysis_id, "generating", "Generating PDF report...")
-        await _persist_status(payload.get("policy_id"), "generating", analysis_id)
-
-        report_result = await generator.generate_report(
-            analysis_data=analysis_data,
-            output_dir=settings.REPORTS_DIR,
-        )
-
-        report_path = None
-        report_storage_path = None
-
-        if not report_result.success:
-            logger.warning(f"   Report generation failed: {report_result.error}")
-        else:
-            report_path = report_result.report_path
-            logger.info(f"   Report generated: {report_path}")
-
-            # STEP 3.5: Upload report to Supabase Storage
-            report_storage_path = await _upload_report_to_supabase(
-                report_path=report_path,
-                tenant_id=payload.get("tenant_id", "default"),
-                company_id=payload.get("client_id", "unknown"),
-                analysis_id=analysis_id,
-                client_name=client_name,
-            )
-
-        # Store tokens used
-        tokens_used = None
-        if hasattr(analysis_result, 'tokens_used') and analysis_result.tokens_used:
+        if analysis_result.usage:
+            for phase, phase_usage in analysis_result.usage.get("phases", {}).items():
+                logger.info(
+                    f"   {phase}: {phase_usage.get('total_tokens')} tokens, "
+                    f"ttft {phase_usage.get('time_to_first_token_ms')} ms, "
+                    f"latency {phase_usage.get('latency_ms')} ms, stop {phase_usage.get('stop_reason')}"
+                )
+
+        # STEP 3: Generate PDF report (eager mode; otherwise after the callback or on first download)
+        report_mode = settings.REPORT_RENDER_MODE
+        report = {"report_path": None, "report_storage_path": None, "report_size_bytes": None, "report_status": "deferred"}
+        if report_mode == "eager":
+            _update_status(analysis_id, "generating", "Generating PDF report...")
+            await _persist_status(payload.get("policy_id"), "generating", analysis_id)
+            report = await _publish_report(analysis_id, payload, analysis_data)
+        elif report_mode == "background":
+            report["report_status"] = "pending"
+
+        # Per-phase token/latency usage (falls back to the bare total)
+        tokens_used = getattr(analysis_result, "usage", None)
+        if not tokens_used and getattr(analysis_result, "tokens_used", None):
             tokens_used = analysis_result.tokens_used if isinstance(analysis_result.tokens_used, dict) else {"total": analysis_result.tokens_used}
 
-        # Build result summary
-        exec_summary = analysis_data.get("executive_summary", {})
-        key_metrics = exec_summary.get("key_metrics", {})
+        # Build result summary (computed once by the analyzer; summarize here only for older results)
+        summary = analysis_result.summary or summarize_analysis(analysis_data)
 
         result = {
             "analysis_id": analysis_id,
             "policy_id": payload.get("policy_id"),
             "client_id": payload.get("client_id"),
+            "tenant_id": payload.get("tenant_id"),
             "client_name": client_name,
             "status": "completed",
-            "overall_score": key_metrics.get("overall_maturity_score"),
-            "recommendation": exec_summary.get("recommendation"),
-            "report_path": report_path,
-            "report_storage_path": report_storage_path,
+            "overall_score": summary.overall_score,
+            "maturity_level": summary.maturity_level,
+            "recommendation": summary.recommendation,
+            **report,
             "analysis_data": analysis_data,
+            "usage": tokens_used,
             "completed_at": datetime.utcnow().isoformat(),
             "processing_time_seconds": _calculate_duration(analysis_id),
         }
@@ -249,6 +252,12 @@ async def run_policy_analysis(analysis_id: str, payload: Dict[str, Any]):
         if callback_url:
             await _send_callback(callback_url, result)
 
+        # STEP 5: Background report render, after the callback
+        if report_mode == "background":
+            task = asyncio.create_task(_publish_report_in_background(analysis_id, payload, analysis_data))
+            _background_reports.add(task)
+            task.add_done_callback(_background_reports.discard)
+
     except Exception as e:
         logger.error(f"Analysis failed: {analysis_id} - {str(e)}")
 
@@ -276,31 +285,149 @@ async def run_policy_analysis(analysis_id: str, payload: Dict[str, Any]):
             })
 
     finally:
-        # Cleanup temp files
-        if local_path and os.path.exists(local_path):
+        # Cleanup temp files (queued uploads are kept for a retry; the job queue deletes them)
+        if local_path and not payload.get("_queued_upload") and os.path.exists(local_path):
             try:
                 os.remove(local_path)
                 logger.info(f"   Cleaned up temp file: {local_path}")
             except Exception as e:
                 logger.warning(f"   Failed to clean up temp file {local_path}: {e}")
 
-        # Also clean up any report temp files
-        if report_path and os.path.exists(report_path) and report_storage_path:
-            try:
-                os.remove(report_path)
-                logger.info(f"   Cleaned up local report: {report_path}")
-            except Exception:
-                pass
+
+async def _publish_report(
+    analysis_id: str,
+    payload: Dict[str, Any],
+    analysis_data: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Render the report (or reuse a cached render) and store it.
+
+    Rendered in memory and uploaded as-is, replacing any earlier upload for
+    the analysis (a retried job); a local copy is written only when storage
+    isn't configured or the upload fails.
+
+    Returns:
+        report_path, report_storage_path, report_size_bytes and report_status ("ready"/"failed")
+    """
+    report = {"report_path": None, "report_storage_path": None, "report_size_bytes": None, "report_status": "failed"}
+    branding = await branding_service.for_tenant(payload.get("tenant_id"))
+    report_result = await report_service.render(analysis_data, branding=branding)
+    if not report_result.success:
+        logger.warning(f"   Report generation failed: {report_result.error}")
+        return report
+
+    report["report_status"] = "ready"
+    report["report_size_bytes"] = report_result.size_bytes
+
+    # STEP 3.5: Upload report to Supabase Storage
+    if _get_supabase_client() is not None:
+        report["report_storage_path"] = await _upload_report_to_supabase(
+            report_bytes=report_result.report_bytes,
+            tenant_id=payload.get("tenant_id") or "default",
+            company_id=payload.get("client_id") or "unknown",
+            analysis_id=analysis_id,
+            client_name=payload.get("client_name") or "Unknown Client",
+            overwrite=True,
+        )
+        if report["report_storage_path"]:
+            return report
+
+    report["report_path"] = report_service.save_report(report_result, settings.REPORTS_DIR)
+    logger.info(f"   Report saved locally: {report['report_path']}")
+    return report
+
+
+async def ensure_report(analysis_id: str):
+    """
+    Rendered report for a completed analysis, rendering on first request.
+
+    Used by the download route for lazily rendered (or still pending)
+    reports; the first render is stored and recorded on the analysis.
+
+    Returns:
+        ReportResult, or None if the analysis has no completed result
+    """
+    status = analysis_status_store.get(analysis_id) or {}
+    result = status.get("result") or {}
+    analysis_data = result.get("analysis_data")
+    if status.get("status") != "completed" or analysis_data is None:
+        return None
+
+    branding = await branding_service.for_tenant(result.get("tenant_id"))
+    report_result = await report_service.render(analysis_data, branding=branding)
+    if report_result.success and result.get("report_status") != "ready":
+        await _publish_late_report(analysis_id, result, analysis_data)
+    return report_result
+
+
+@asynccontextmanager
+async def _report_lock(analysis_id: str):
+    """Serialize late report publishing per analysis (the lock is dropped once unused)"""
+    lock, users = _report_locks.get(analysis_id, (None, 0))
+    lock = lock or asyncio.Lock()
+    _report_locks[analysis_id] = (lock, users + 1)
+    try:
+        async with lock:
+            yield
+    finally:
+        lock, users = _report_locks[analysis_id]
+        if users > 1:
+            _report_locks[analysis_id] = (lock, users - 1)
+        else:
+            del _report_locks[analysis_id]
+
+
+async def _publish_late_report(analysis_id: str, payload: Dict[str, Any], analysis_data: Dict[str, Any]):
+    """
+    Publish and record a report rendered after the callback, once.
+
+    Concurrent first downloads and the background render queue on the
+    analysis's lock; whoever gets it second finds the report ready.
+    """
+    async with _report_lock(analysis_id):
+        result = (analysis_status_store.get(analysis_id) or {}).get("result")
+        if result is None or result.get("report_status") == "ready":
+            return
+        await _record_report(analysis_id, result, await _publish_report(analysis_id, payload, analysis_data))
+
+
+async def _publish_report_in_background(analysis_id: str, payload: Dict[str, Any], analysis_data: Dict[str, Any]):
+    """Low-priority render after the callback: one at a time, so job renders keep the pool"""
+    try:
+        async with _background_render_slot:
+            await _publish_late_report(analysis_id, payload, analysis_data)
+    except Exception as e:
+        logger.error(f"   Background report render failed for {analysis_id}: {e}")
+
+
+async def _record_report(analysis_id: str, result: Dict[str, Any], report: Dict[str, Any]):
+    """Attach a late-rendered report to the stored result and the policy row"""
+    result.update(report)
+    policy_id = result.get("policy_id")
+    supa = _get_supabase_client()
+    if not (policy_id and supa and report.get("report_storage_path")):
+        return
+    try:
+        await asyncio.to_thread(
+            supa.table("insurance_policies")
+            .update({"report_storage_path": report["report_storage_path"], "updated_at": datetime.utcnow().isoformat()})
+            .eq("id", policy_id)
+            .execute
+        )
+    except Exception as e:
+        logger.warning(f"   Failed to persist report path for {analysis_id}: {e}")
 
 
 async def _upload_report_to_supabase(
-    report_path: str,
+    report_bytes: bytes,
     tenant_id: str,
     company_id: str,
     analysis_id: str,
     client_name: str,
+    storage_path: Optional[str] = None,
+    overwrite: bool = False,
 ) -> Optional[str]:
-    """Upload generated report PDF to Supabase Storage"""
+    """Upload generated report PDF to Supabase Storage (overwrite replaces an existing object)"""
     supa = _get_supabase_client()
     if not supa:
         logger.warning("   Supabase client not available - skipping report upload")
@@ -308,16 +435,19 @@ async def _upload_report_to_supabase(
 
     try:
         # Build storage path
-        safe_name = client_name.replace(" ", "_").replace("/", "_")[:50]
-        storage_path = f"{tenant_id}/{company_id}/reports/{analysis_id}_{safe_name}_Analysis.pdf"
+        if not storage_path:
+            safe_name = client_name.replace(" ", "_").replace("/", "_")[:50]
+            storage_path = f"{tenant_id}/{company_id}/reports/{analysis_id}_{safe_name}_Analysis.pdf"
 
-        with open(report_path, "rb") as f:
-            report_bytes = f.read()
+        file_options = {"content-type": "application/pdf"}
+        if overwrite:
+            file_options["upsert"] = "true"
 
-        supa.storage.from_("reports").upload(
+        await asyncio.to_thread(
+            supa.storage.from_("reports").upload,
             storage_path,
             report_bytes,
-            file_options={"content-type": "application/pdf"}
+            file_options=file_options,
         )
 
         logger.info(f"   Report uploaded to Supabase Storage: {storage_path}")
@@ -328,6 +458,25 @@ async def _upload_report_to_supabase(
         return None
 
 
+async def signed_report_url(storage_path: str, filename: Optional[str] = None) -> Optional[str]:
+    """Short-lived signed URL for a stored report (None if storage is unavailable)"""
+    supa = _get_supabase_client()
+    if not supa:
+        return None
+
+    try:
+        signed = await asyncio.to_thread(
+            supa.storage.from_("reports").create_signed_url,
+            storage_path,
+            settings.REPORT_SIGNED_URL_TTL_SECONDS,
+            {"download": filename} if filename else None,
+        )
+        return signed.get("signedURL") or signed.get("signedUrl")
+    except Exception as e:
+        logger.warning(f"   Failed to sign report URL for {storage_path}: {e}")
+        return None
+
+
 async def _persist_status(
     policy_id: Optional[str],
     status: str,
@@ -385,7 +534,7 @@ async def _persist_completed(
             "updated_at": datetime.utcnow().isoformat(),
         }
         if tokens_used:
-            update_data["analysis_tokens_used"] = tokens_used
+            update_data["analysis_tokens_used"] = _token_columns(tokens_used)
 
         supa.table("insurance_policies") \
             .update(update_data) \
@@ -396,6 +545,22 @@ async def _persist_completed(
         logger.warning(f"   Failed to persist completed status to DB: {e}")
 
 
+def _token_columns(usage: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Flatten a usage record for insurance_policies.analysis_tokens_used.
+
+    The CRM reads that column as Record<string, number> with the grand total
+    under "total", so per-phase breakdowns and non-numeric extras are dropped.
+    """
+    columns = {
+        key: value for key, value in usage.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+    if "total_tokens" in columns:
+        columns["total"] = columns.pop("total_tokens")
+    return columns
+
+
 def _update_status(analysis_id: str, status: str, progress: str):
     """Update the in-memory status of an analysis"""
     if analysis_id in analysis_status_store:
@@ -0,0 +1,427 @@
+"""
+Red Flag Pre-Scanner
+Single-pass pattern scan of the Phase 1 extraction for RED_FLAGS candidates
+
+Every anchor phrase from the Red Flags Library (prompts/system_prompt.py,
+Module 5) is compiled into one alternation regex, so the extracted markdown
+is scanned once regardless of how many flags are defined. Each hit is then
+checked against its flag's line-level conditions (exclusion wording,
+carve-backs, negated answers, sublimit amounts, waiting-period hours) and
+cited with the nearest page reference.
+
+Value checks only read the value bound to the right label: a sublimit, not
+the retention beside it; the waiting period, not the period of restoration.
+A value's label is the nearest one in its clause, or its table column header.
+
+Candidates are fed to Phase 2 as hints, published as a preliminary risk
+signal while Phase 2 runs, and cross-checked against the final red_flags.
+"""
+
+import bisect
+import logging
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Raw-text page markers ("--- Page 12 ---") and in-line citations ("Page 12", "p. 12")
+_PAGE_MARKER = re.compile(r"^-{2,}\s*Page\s+(\d+)\s*-{2,}\s*$", re.MULTILINE | re.IGNORECASE)
+_PAGE_CITATION = re.compile(r"\b(?:pages?|pg\.?|p\.)\s*(\d+(?:\s*[-–,]\s*\d+)*)", re.IGNORECASE)
+_MONEY = re.compile(r"\$\s?(\d[\d,]*(?:\.\d+)?)\s*(k|m|million|thousand)?\b", re.IGNORECASE)
+_HOURS = re.compile(r"(\d+(?:\.\d+)?)\s*(hours?|hrs?|days?)\b", re.IGNORECASE)
+
+_AGGREGATE_LINE = re.compile(r"^.*\baggregate\b.*$", re.MULTILINE | re.IGNORECASE)
+_TABLE_SEPARATOR = re.compile(r"^\|\s*:?-{3,}")
+_CLAUSE_BREAK = re.compile(r"\s*(?:[;()…]|,\s|\s(?:and|with|plus)\s)\s*", re.IGNORECASE)
+
+# Labels a dollar amount or duration can be bound to (group name = label)
+_AMOUNT_LABELS = re.compile(
+    r"(?P<retention>retentions?|deductibles?|self[- ]insured|\bSIR\b|co-?insurance|co-?pay)"
+    r"|(?P<limit>(?:sub)?limits?\b|aggregate|per (?:claim|occurrence)|each claim|up to)",
+    re.IGNORECASE,
+)
+_DURATION_LABELS = re.compile(
+    r"(?P<waiting>waiting period|waiting|time retention|time deductible)"
+    r"|(?P<other>restoration|indemnity period|extended|reporting|notice)",
+    re.IGNORECASE,
+)
+
+# "not eroding", "non-eroding", "does not apply to cyber terrorism" (up to two words between)
+_NEGATED_BEFORE = re.compile(r"\b(?:not|non|no|never)\b[- ]?(?:[\w/]+[- ]+){0,2}$", re.IGNORECASE)
+# "Limits are eroding? no", "| Insider exclusion | None |"
+_NEGATED_ANSWER = re.compile(r"[:?|\-–]\s*(?:no|none|false)\b\.?$", re.IGNORECASE)
+# "No coverage for acts of war", "we do not cover": the exclusion itself, not a negated anchor
+_EXCLUSIONARY = re.compile(r"(?:no|not|never)[- ](?:coverage|covered|cover|insured|pay)\b", re.IGNORECASE)
+
+_EXCLUDED = r"exclu|not covered|no coverage|not found|do(?:es)? not (?:apply|cover)|will not (?:cover|pay)|removed"
+
+
+def _dollars(number: str, unit: Optional[str]) -> float:
+    value = float(number.replace(",", ""))
+    unit = (unit or "").lower()
+    if unit in ("k", "thousand"):
+        value *= 1_000
+    elif unit in ("m", "million"):
+        value *= 1_000_000
+    return value
+
+
+def _amounts(line: str) -> List[float]:
+    """Dollar amounts on a line ($250K, $1,000,000, $2M)"""
+    return [_dollars(number, unit) for number, unit in _MONEY.findall(line)]
+
+
+def _aggregate_limit(text: str) -> Optional[float]:
+    """Largest dollar amount on any line mentioning the aggregate limit"""
+    amounts = [a for line in _AGGREGATE_LINE.findall(text) for a in _amounts(line)]
+    return max(amounts) if amounts else None
+
+
+def _cells(line: str) -> List[str]:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def _table_headers(lines: List[str]) -> Dict[int, List[str]]:
+    """Header cells for each markdown table body row, by line number"""
+    headers: Dict[int, List[str]] = {}
+    header = None
+    for number, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped.startswith("|"):
+            header = None
+        elif _TABLE_SEPARATOR.match(stripped):
+            header = _cells(lines[number - 1]) if number else None
+        elif header is not None:
+            headers[number] = header
+    return headers
+
+
+def _segments(line: str, columns: Optional[List[str]]) -> List[Tuple[str, str]]:
+    """(clause, column header) pieces of a line; table rows are split into cells first"""
+    cells = [(line, "")]
+    if line.strip().startswith("|"):
+        cells = [(cell, "") for cell in _cells(line)]
+        if columns and len(columns) == len(cells):
+            cells = [(cell, header) for (cell, _), header in zip(cells, columns)]
+    return [(clause, header) for cell, header in cells for clause in _CLAUSE_BREAK.split(cell) if clause]
+
+
+def _bound_values(
+    line: str, columns: Optional[List[str]], values: re.Pattern, labels: re.Pattern,
+) -> List[Tuple[Tuple[str, ...], Optional[str]]]:
+    """
+    Values on a line with the label each is bound to.
+
+    A value takes the last label before it in its clause (since the
+    previous value), else the first label after it, else its column header.
+    """
+    bound = []
+    for text, header in _segments(line, columns):
+        matches = list(values.finditer(text))
+        header_label = labels.search(header)
+        for i, match in enumerate(matches):
+            before = list(labels.finditer(text, matches[i - 1].end() if i else 0, match.start()))
+            after_end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            label = before[-1] if before else labels.search(text, match.end(), after_end) or header_label
+            bound.append((match.groups(), label.lastgroup if label else None))
+    return bound
+
+
+def _negated(line: str, span: Tuple[int, int]) -> bool:
+    """
+    Whether the phrase at span is negated: "not"/"non-" shortly before it
+    (unless that starts exclusion wording), or a "no" answer after it.
+    """
+    before = _NEGATED_BEFORE.search(line, 0, span[0])
+    if before:
+        exclusion = _EXCLUSIONARY.match(line, before.start())
+        if not exclusion or exclusion.end() > span[0]:  # "not covered" negates "covered" itself
+            return True
+    return bool(_NEGATED_ANSWER.search(line[span[1]:].rstrip(" |\t")))
+
+
+def _limit_amounts(line: str, context: Dict[str, Any]) -> List[float]:
+    """
+    Limit and sublimit amounts on a line.
+
+    Amounts labelled as limits when there are any, else every amount not
+    labelled as a retention or deductible.
+    """
+    bound = _bound_values(line, context.get("columns"), _MONEY, _AMOUNT_LABELS)
+    limits = [groups for groups, label in bound if label == "limit"]
+    if not limits:
+        limits = [groups for groups, label in bound if label != "retention"]
+    return [_dollars(number, unit) for number, unit in limits]
+
+
+def _ransomware_sublimit_low(line: str, context: Dict[str, Any]) -> bool:
+    amounts = _limit_amounts(line, context)
+    return bool(amounts) and min(amounts) < 100_000
+
+
+def _social_engineering_sublimit_low(line: str, context: Dict[str, Any]) -> bool:
+    amounts = _limit_amounts(line, context)
+    aggregate = context.get("aggregate")
+    return bool(amounts) and bool(aggregate) and min(amounts) < 0.2 * aggregate
+
+
+def _waiting_period_long(line: str, context: Dict[str, Any]) -> bool:
+    """Waiting-period durations over 24 hours (other durations on the line are ignored)"""
+    for (number, unit), label in _bound_values(line, context.get("columns"), _HOURS, _DURATION_LABELS):
+        hours = float(number) * (24 if unit.lower().startswith("day") else 1)
+        if label == "waiting" and hours > 24:
+            return True
+    return False
+
+
+@dataclass(frozen=True)
+class RedFlagPattern:
+    """One Red Flags Library entry and the phrases that point at it"""
+    flag_id: str
+    flag: str
+    severity: str
+    anchors: Tuple[str, ...]  # Regex fragments; any of them on a line is a hit
+    require: Optional[str] = None  # Line must also match this (e.g. exclusion wording)
+    unless: Optional[str] = None  # Line matching this is acceptable (carve-back, outside limits)
+    check: Optional[Callable[[str, Dict[str, Any]], bool]] = None  # Value test on the line (amounts, hours)
+    negatable: bool = True  # "not"/"non-" before the anchor, or a "no" answer after it, clears the hit
+    keywords: str = ""  # Regex matching this flag in Phase 2's red_flags text (cross-check)
+
+
+RED_FLAG_PATTERNS: Tuple[RedFlagPattern, ...] = (
+    RedFlagPattern(
+        "war_exclusion", "War/Terrorism Exclusion without Buyback", "HIGH",
+        anchors=(r"act(?:s)? of war", r"hostile acts?", r"military action", r"war exclusion"),
+        unless=r"carve[- ]?back|buy[- ]?back|except(?:ion)? for cyber|does not apply to cyber|cyber[- ]terrorism (?:is )?covered",
+        keywords=r"\bwar\b|hostile",
+    ),
+    RedFlagPattern(
+        "nation_state", "Nation-State Attack Exclusion", "HIGH",
+        anchors=(r"(?:state|government)[- ]sponsored", r"state actors?", r"nation[- ]state", r"attribution"),
+        require=_EXCLUDED,
+        keywords=r"nation|state[- ]sponsored|state actor",
+    ),
+    RedFlagPattern(
+        "unencrypted_data", "Absolute Unencrypted Data Exclusion", "HIGH",
+        anchors=(r"unencrypted", r"failure to encrypt"),
+        require=_EXCLUDED,
+        keywords=r"encrypt",
+    ),
+    RedFlagPattern(
+        "failure_to_patch", "Absolute Failure-to-Patch Exclusion", "HIGH",
+        anchors=(r"failure to (?:patch|maintain|update)", r"known vulnerabilit(?:y|ies)", r"unpatched"),
+        require=_EXCLUDED,
+        keywords=r"patch|vulnerabilit",
+    ),
+    RedFlagPattern(
+        "insider_threat", "Complete Insider Threat Exclusion", "HIGH",
+        anchors=(r"rogue employee", r"employee (?:action|acts?)", r"insider"),
+        require=_EXCLUDED,
+        keywords=r"insider|employee",
+    ),
+    RedFlagPattern(
+        "ransomware_sublimit", "Ransomware Carved Out or Severely Sublimited", "HIGH",
+        anchors=(r"ransomware", r"cyber extortion", r"extortion"),
+        check=_ransomware_sublimit_low,
+        keywords=r"ransom|extortion",
+    ),
+    RedFlagPattern(
+        "defense_within_limits", "Defense Costs Within Limits (Eroding)", "HIGH",
+        anchors=(r"defen[cs]e costs?[^\n]{0,40}within(?: the)? limits?", r"within limits", r"eroding", r"burning limits?"),
+        unless=r"outside(?: the)? limits?|in addition to(?: the)? limits?",
+        keywords=r"defen[cs]e",
+    ),
+    RedFlagPattern(
+        "bi_waiting_period", "BI Waiting Period >24 Hours", "MEDIUM",
+        anchors=(r"waiting period", r"business (?:interruption|income)", r"system failure"),
+        check=_waiting_period_long,  # Hours on the same line (prose or a coverage table row)
+        keywords=r"waiting period",
+    ),
+    RedFlagPattern(
+        "social_engineering_sublimit", "Social Engineering Sublimit <20% of Aggregate", "MEDIUM",
+        anchors=(r"social engineering", r"funds transfer fraud"),
+        check=_social_engineering_sublimit_low,  # Needs the aggregate limit from the same document
+        keywords=r"social engineering",
+    ),
+    RedFlagPattern(
+        "no_prior_acts", "No Prior Acts Coverage", "MEDIUM",
+        anchors=(r"retro(?:active)?(?: date)?", r"prior acts"),
+        require=r"inception|none|not found|n/a|no prior acts",
+        unless=r"full prior acts|unlimited",
+        negatable=False,  # "Prior acts: None" is the red flag
+        keywords=r"prior acts|retro",
+    ),
+    RedFlagPattern(
+        "cyber_terrorism", "Cyber Terrorism Exclusion", "MEDIUM",
+        anchors=(r"cyber[- ]terrorism",),
+        require=_EXCLUDED,
+        unless=r"carve[- ]?back|buy[- ]?back|covered",
+        keywords=r"terror",
+    ),
+    RedFlagPattern(
+        "voluntary_shutdown", "Voluntary Shutdown Exclusion", "MEDIUM",
+        anchors=(r"voluntary shutdown", r"precautionary shutdown"),
+        require=_EXCLUDED,
+        keywords=r"voluntary|shutdown",
+    ),
+    RedFlagPattern(
+        "dependent_bi", "Dependent Business Interruption Exclusion", "MEDIUM",
+        anchors=(r"(?:contingent|dependent) business (?:interruption|income)", r"\bCBI\b", r"\bDBI\b"),
+        require=_EXCLUDED,
+        keywords=r"dependent|contingent|supply chain",
+    ),
+)
+
+
+@dataclass
+class RedFlagCandidate:
+    """A red flag the pre-scan found evidence for"""
+    flag_id: str
+    flag: str
+    severity: str
+    evidence: List[Dict[str, Optional[str]]] = field(default_factory=list)  # {"text", "page"}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class RedFlagScanner:
+    """
+    Compiled multi-pattern matcher for the Red Flags Library.
+
+    All anchors are joined into one case-insensitive alternation with a
+    named group per flag, so a scan is a single finditer over the text.
+    """
+
+    def __init__(self, patterns: Tuple[RedFlagPattern, ...] = RED_FLAG_PATTERNS, max_evidence: int = 3):
+        self.patterns = {p.flag_id: p for p in patterns}
+        self.max_evidence = max_evidence
+        self._combined = re.compile(
+            "|".join(f"(?P<{p.flag_id}>{'|'.join(p.anchors)})" for p in patterns),
+            re.IGNORECASE,
+        )
+        self._require = {p.flag_id: re.compile(p.require, re.IGNORECASE) for p in patterns if p.require}
+        self._unless = {p.flag_id: re.compile(p.unless, re.IGNORECASE) for p in patterns if p.unless}
+        self._keywords = {p.flag_id: re.compile(p.keywords, re.IGNORECASE) for p in patterns if p.keywords}
+
+    def scan(self, text: str) -> List[RedFlagCandidate]:
+        """
+        Scan extracted policy text for red flag candidates.
+
+        Returns candidates in library order (HIGH severity first), each
+        with up to max_evidence cited snippets.
+        """
+        if not text:
+            return []
+
+        markers = [(m.start(), m.group(1)) for m in _PAGE_MARKER.finditer(text)]
+        marker_positions = [pos for pos, _ in markers]
+        line_starts = [0] + [m.end() for m in re.finditer(r"\n", text)]
+        lines = text.split("\n")
+        headers = _table_headers(lines)
+
+        context = {"aggregate": _aggregate_limit(text)}
+        found: Dict[str, RedFlagCandidate] = {}
+        seen_lines: set = set()
+
+        for match in self._combined.finditer(text):
+            flag_id = match.lastgroup
+            line_number = bisect.bisect_right(line_starts, match.start()) - 1
+            if (flag_id, line_number) in seen_lines:
+                continue
+            seen_lines.add((flag_id, line_number))
+
+            line = lines[line_number]
+            anchor = (match.start() - line_starts[line_number], match.end() - line_starts[line_number])
+            if not self._line_matches(flag_id, line, anchor, dict(context, columns=headers.get(line_number))):
+                continue
+
+            candidate = found.get(flag_id)
+            if candidate is None:
+                pattern = self.patterns[flag_id]
+                candidate = found[flag_id] = RedFlagCandidate(flag_id, pattern.flag, pattern.severity)
+            if len(candidate.evidence) < self.max_evidence:
+                candidate.evidence.append({
+                    "text": line.strip(" -*|#\t")[:240],
+                    "page": self._page_for(line, match.start(), markers, marker_positions),
+                })
+
+        candidates = [found[flag_id] for flag_id in self.patterns if flag_id in found]
+        logger.info(
+            f"🚩 Red flag pre-scan: {len(candidates)} candidate(s) "
+            f"({sum(c.severity == 'HIGH' for c in candidates)} HIGH)"
+        )
+        return candidates
+
+    def _line_matches(self, flag_id: str, line: str, anchor: Tuple[int, int], context: Dict[str, Any]) -> bool:
+        pattern = self.patterns[flag_id]
+        if flag_id in self._require and not self._require[flag_id].search(line):
+            return False
+        # "no cyber carve-back" means the buyback is missing, so only an un-negated one clears the hit
+        if flag_id in self._unless and any(
+            not _negated(line, match.span()) for match in self._unless[flag_id].finditer(line)
+        ):
+            return False
+        if pattern.negatable and _negated(line, anchor):
+            return False
+        if pattern.check and not pattern.check(line, context):
+            return False
+        return True
+
+    @staticmethod
+    def _page_for(line: str, position: int, markers: List[Tuple[int, str]], marker_positions: List[int]) -> Optional[str]:
+        """Cite the page on the line itself, else the preceding page marker"""
+        citation = _PAGE_CITATION.search(line)
+        if citation:
+            return f"Page {citation.group(1)}"
+        index = bisect.bisect_right(marker_positions, position) - 1
+        if index >= 0:
+            return f"Page {markers[index][1]}"
+        return None
+
+    def format_hints(self, candidates: List[RedFlagCandidate]) -> str:
+        """Render candidates as a Phase 2 prompt section"""
+        if not candidates:
+            return ""
+        lines = [
+            "## PRE-SCAN RED FLAG CANDIDATES",
+            "",
+            "An automated pattern scan of the extraction found possible red flags.",
+            "Verify each against the policy language — confirm it in red_flags only if the",
+            "language supports it, and still check the full Red Flags Library.",
+            "",
+        ]
+        for candidate in candidates:
+            lines.append(f"- [{candidate.severity}] {candidate.flag}")
+            for evidence in candidate.evidence:
+                page = f" ({evidence['page']})" if evidence["page"] else ""
+                lines.append(f"    - \"{evidence['text']}\"{page}")
+        return "\n".join(lines)
+
+    def cross_check(self, candidates: List[RedFlagCandidate], red_flags: Any) -> Dict[str, Any]:
+        """
+        Compare pre-scan candidates with Phase 2's red_flags.
+
+        Returns the candidate IDs Phase 2 confirmed and the ones it did not
+        mention, so a reviewer can check the misses quickly.
+        """
+        texts = []
+        for flag in red_flags if isinstance(red_flags, list) else []:
+            if isinstance(flag, dict):
+                texts.append(f"{flag.get('flag', '')} {flag.get('impact', '')}")
+            elif isinstance(flag, str):
+                texts.append(flag)
+
+        confirmed, unconfirmed = [], []
+        for candidate in candidates:
+            keywords = self._keywords.get(candidate.flag_id)
+            if keywords and any(keywords.search(text) for text in texts):
+                confirmed.append(candidate.flag_id)
+            else:
+                unconfirmed.append(candidate.flag_id)
+        return {"confirmed": confirmed, "unconfirmed": unconfirmed}
+
+
+# Module-level instance
+red_flag_scanner = RedFlagScanner()
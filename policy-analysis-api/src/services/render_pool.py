@@ -0,0 +1,182 @@
+"""
+Report Render Pool
+Renders PDF reports in a pool of pre-warmed worker processes
+
+reportlab builds the document in pure Python, so rendering inline holds the
+GIL and stalls the API's event loop for the whole build. Workers are spawned
+once, load the report styles and fonts up front, and receive analysis_data as
+compact JSON; they return finished PDF bytes. A bounded number of renders may
+be queued or running at once, and each render has its own timeout; a pool
+whose render overruns is terminated and replaced.
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RenderQueueFull(Exception):
+    """Raised when no render slot frees up within the queue timeout"""
+    pass
+
+
+class RenderTimeout(Exception):
+    """Raised when a single render exceeds its timeout"""
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Worker process side
+# ---------------------------------------------------------------------------
+
+_worker_generator = None
+
+
+def _init_worker() -> None:
+    """Build the generator (styles, fonts) once per worker and warm it with a throwaway render"""
+    global _worker_generator
+    from services.report_generator import ReportGenerator
+
+    _worker_generator = ReportGenerator()
+    _worker_generator.render_pdf({})
+
+
+def _render_in_worker(payload: bytes, branding=None) -> bytes:
+    """Render serialized analysis_data (with an optional ReportBranding) to PDF bytes"""
+    if _worker_generator is None:
+        _init_worker()
+    return _worker_generator.render_pdf(json.loads(payload), branding)
+
+
+def serialize_analysis(analysis_data: Dict[str, Any]) -> bytes:
+    """Compact JSON for the trip to a worker (non-JSON values become strings)"""
+    return json.dumps(analysis_data, separators=(",", ":"), default=str).encode("utf-8")
+
+
+# ---------------------------------------------------------------------------
+# API process side
+# ---------------------------------------------------------------------------
+
+class RenderPool:
+    """
+    Bounded, timed PDF rendering on a process pool.
+
+    With workers=0 renders run in a thread instead (still off the event
+    loop, but sharing the GIL) — useful for tests and single-core hosts.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.REPORT_RENDER_WORKERS,
+        queue_size: int = settings.REPORT_RENDER_QUEUE_SIZE,
+        timeout: float = settings.REPORT_RENDER_TIMEOUT_SECONDS,
+    ):
+        self.workers = max(0, workers)
+        self.queue_size = max(0, queue_size)
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def max_pending(self) -> int:
+        """Renders allowed to be running or queued at once"""
+        return max(1, self.workers) + self.queue_size
+
+    def start(self) -> None:
+        """Spawn and pre-warm the workers (otherwise done on first render)"""
+        if self.workers and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            logger.info(f"🖨️  Report render pool started with {self.workers} workers")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _recycle(self, executor: Optional[ProcessPoolExecutor]) -> None:
+        """
+        Terminate a pool whose render failed or overran, so a fresh one is spawned.
+
+        A worker can't be interrupted mid-build, so its processes are killed
+        outright; other renders still running on that pool fail with
+        BrokenProcessPool. Only the current pool is recycled — a render that
+        fails on an already-replaced pool leaves the new one alone.
+        """
+        if executor is None or executor is not self._executor:
+            return
+        self._executor = None
+        processes = list((executor._processes or {}).values())
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        logger.warning(
+            f"🖨️  Report render pool replaced after a failed or timed-out render "
+            f"({len(processes)} worker process(es) terminated)"
+        )
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Semaphores are bound to the loop they are first used on
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._slots_loop = loop
+        return self._slots
+
+    async def render(self, analysis_data: Dict[str, Any], branding=None, timeout: Optional[float] = None) -> bytes:
+        """
+        Render analysis_data to PDF bytes, with a ReportBranding (default branding if None).
+
+        Raises:
+            RenderQueueFull: no slot became free within the timeout
+            RenderTimeout: the render itself ran past the timeout
+        """
+        timeout = timeout or self.timeout
+        slots = self._get_slots()
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise RenderQueueFull(f"No report render slot free after {timeout:.0f}s")
+
+        started = time.perf_counter()
+        executor = None
+        try:
+            if self.workers:
+                self.start()
+                executor = self._executor
+                future = executor.submit(_render_in_worker, serialize_analysis(analysis_data), branding)
+                pdf_bytes = await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+            else:
+                from services.report_generator import generator
+                pdf_bytes = await asyncio.wait_for(
+                    asyncio.to_thread(generator.render_pdf, analysis_data, branding), timeout=timeout
+                )
+        except asyncio.TimeoutError:
+            self._recycle(executor)
+            raise RenderTimeout(f"Report render exceeded {timeout:.0f}s")
+        except BrokenProcessPool:
+            self._recycle(executor)
+            raise
+        finally:
+            slots.release()
+
+        logger.info(f"🖨️  Rendered {len(pdf_bytes):,} byte report in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return pdf_bytes
+
+
+# Module-level instance
+render_pool = RenderPool()
@@ -0,0 +1,192 @@
+"""
+Report Export Service
+Renders a portfolio of reports into one ZIP archive
+
+A tenant's stored analyses (all of them, or a selection by analysis ID)
+are read a page at a time and streamed through the render pool, whose
+workers keep their fonts and compiled templates warm across reports. One
+render per worker is kept in flight, and each finished PDF is appended to
+the archive on disk as soon as it is ready, so memory stays flat however
+many reports are exported.
+
+Exports are scoped to one tenant: selected IDs belonging to another tenant
+are skipped. At most REPORT_EXPORT_MAX_CONCURRENT exports run at once, and
+their renders bypass the report cache so a bulk export doesn't evict the
+reports interactive users are downloading. Rendering runs in the render
+pool and archive I/O in threads, so the event loop keeps serving requests
+while an export builds.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from config import settings
+from services.branding import branding_service
+from services.orchestrator import _get_supabase_client, analysis_status_store
+from services.render_pool import render_pool
+from services.report_regeneration import PAGE_SIZE, POLICY_COLUMNS, _load_page
+from services.report_service import report_service
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+# Exports running at once, across requests
+export_slots = asyncio.Semaphore(max(1, settings.REPORT_EXPORT_MAX_CONCURRENT))
+
+
+class ExportBusy(Exception):
+    """Raised when every export slot is taken and the caller asked not to wait"""
+    pass
+
+
+@dataclass
+class ExportResult:
+    """Result of a bulk report export"""
+    path: str
+    exported: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    size_bytes: int = 0
+
+
+def _load_by_analysis_ids(supa, tenant_id: str, analysis_ids: List[str]) -> List[Dict[str, Any]]:
+    return supa.table("insurance_policies") \
+        .select(POLICY_COLUMNS) \
+        .eq("tenant_id", tenant_id) \
+        .in_("analysis_id", analysis_ids) \
+        .execute().data or []
+
+
+async def _stored_rows(
+    tenant_id: str,
+    analysis_ids: Optional[List[str]],
+) -> AsyncIterator[Dict[str, Any]]:
+    """The tenant's stored analyses to export: Supabase rows a page at a time, else in-memory results"""
+    supa = _get_supabase_client()
+    if not supa:
+        for analysis_id, status in list(analysis_status_store.items()):
+            result = status.get("result") or {}
+            if analysis_ids is not None and analysis_id not in analysis_ids:
+                continue
+            if result.get("tenant_id") != tenant_id:
+                continue
+            if status.get("status") == "completed" and isinstance(result.get("analysis_data"), dict):
+                yield {"analysis_id": analysis_id, "tenant_id": result.get("tenant_id"), "analysis_data": result["analysis_data"]}
+        return
+
+    if analysis_ids is not None:
+        for start in range(0, len(analysis_ids), PAGE_SIZE):
+            for row in await asyncio.to_thread(_load_by_analysis_ids, supa, tenant_id, analysis_ids[start:start + PAGE_SIZE]):
+                yield row
+        return
+
+    start = 0
+    while True:
+        page = await asyncio.to_thread(_load_page, supa, tenant_id, start, PAGE_SIZE)
+        for row in page:
+            yield row
+        if len(page) < PAGE_SIZE:
+            return
+        start += PAGE_SIZE
+
+
+async def export_reports(
+    output_path: str,
+    tenant_id: str,
+    analysis_ids: Optional[List[str]] = None,
+    concurrency: Optional[int] = None,
+    wait: bool = True,
+) -> ExportResult:
+    """
+    Render a tenant's stored analyses into a ZIP of PDFs at output_path.
+
+    analysis_ids narrows the export to those of the tenant's analyses. At
+    most `concurrency` reports are in flight (default: one per render
+    worker, leaving the pool's queue free for interactive renders). Waits
+    for a free export slot first, or raises ExportBusy if wait=False and
+    none is free. The archive is written to a .part file and moved into
+    place when complete; it ends with a manifest of exported and failed
+    analyses.
+    """
+    if not wait and export_slots.locked():
+        raise ExportBusy("A report export is already running")
+    async with export_slots:  # Nothing awaited since the check, so the free slot is still ours
+        return await _export(output_path, tenant_id, analysis_ids, concurrency)
+
+
+def _finish_archive(archive: zipfile.ZipFile, partial_path: str, output_path: str, manifest: Dict[str, Any]) -> int:
+    """Append the manifest, write the central directory and move the archive into place"""
+    archive.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2))
+    archive.close()
+    os.replace(partial_path, output_path)
+    return os.path.getsize(output_path)
+
+
+def _discard_archive(archive: zipfile.ZipFile, partial_path: str) -> None:
+    archive.close()
+    os.remove(partial_path)
+
+
+async def _export(
+    output_path: str,
+    tenant_id: str,
+    analysis_ids: Optional[List[str]],
+    concurrency: Optional[int],
+) -> ExportResult:
+    if concurrency is None:
+        concurrency = min(max(1, render_pool.workers), render_pool.max_pending)
+    slots = asyncio.Semaphore(max(1, concurrency))
+    write_lock = asyncio.Lock()
+    result = ExportResult(path=output_path)
+
+    await asyncio.to_thread(os.makedirs, os.path.dirname(output_path) or ".", exist_ok=True)
+    partial_path = f"{output_path}.part"
+    archive = await asyncio.to_thread(
+        zipfile.ZipFile, partial_path, "w", compression=zipfile.ZIP_STORED,  # PDFs are already compressed
+    )
+
+    async def export(row: Dict[str, Any]):
+        analysis_id = row.get("analysis_id") or row.get("id")
+        try:
+            branding = await branding_service.for_tenant(row.get("tenant_id"))
+            report = await report_service.render(row["analysis_data"], branding=branding, cache=False)
+            if not report.success:
+                raise RuntimeError(report.error)
+            async with write_lock:
+                await asyncio.to_thread(archive.writestr, f"{analysis_id}_{report.filename}", report.report_bytes)
+            result.exported.append(analysis_id)
+        except Exception as e:
+            logger.warning(f"   Failed to export report for {analysis_id}: {e}")
+            result.failed.append(analysis_id)
+        finally:
+            slots.release()
+
+    tasks = []
+    try:
+        async for row in _stored_rows(tenant_id, analysis_ids):
+            if not isinstance(row.get("analysis_data"), dict):
+                continue
+            await slots.acquire()
+            tasks.append(asyncio.create_task(export(row)))
+        await asyncio.gather(*tasks)
+
+        result.size_bytes = await asyncio.to_thread(_finish_archive, archive, partial_path, output_path, {
+            "tenant_id": tenant_id,
+            "exported": result.exported,
+            "failed": result.failed,
+            "created_at": datetime.utcnow().isoformat(),
+        })
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        _discard_archive(archive, partial_path)
+        raise
+
+    logger.info(f"📦 Exported {len(result.exported)} reports ({result.size_bytes:,} bytes), {len(result.failed)} failed: {output_path}")
+    return result
@@ -0,0 +1,268 @@
+"""
+Report Formats
+HTML and compact JSON views of a report for API consumers
+
+The same sections as the PDF, in ReportGenerator.SECTIONS order: each PDF
+builder has a same-named method here returning that section's content as
+plain data, built with the generator's own row and cell helpers. JSON
+serializes the content as-is; HTML formats it. Both are produced one
+section at a time, so a streamed response starts immediately and the
+whole view renders in milliseconds rather than the PDF's seconds.
+"""
+
+import json
+from datetime import datetime
+from functools import lru_cache
+from html import escape
+from typing import Any, Dict, Iterator, Optional
+
+from services.report_generator import (
+    BRAND_DANGER,
+    BRAND_SUCCESS,
+    BRAND_WARNING,
+    TEMPLATE_VERSION,
+    ReportBranding,
+    ReportGenerator,
+    generator,
+)
+
+FORMATS = {"html": "text/html; charset=utf-8", "json": "application/json"}
+
+
+def _css_color(color) -> str:
+    return "#" + color.hexval()[2:]
+
+
+def section_key(builder: str) -> str:
+    """JSON key / HTML id for a section builder ("_create_cover_page" → "cover_page")"""
+    return builder.replace("_create_", "")
+
+
+@lru_cache(maxsize=64)
+def _html_head(branding: ReportBranding) -> str:
+    """Document head with the branding's stylesheet (built once per branding)"""
+    return (
+        "<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\">"
+        "<meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">"
+        f"<title>{escape(branding.company_name)} Policy Analysis Report</title><style>"
+        f"body{{font-family:Helvetica,Arial,sans-serif;color:#333;max-width:60rem;margin:2rem auto;padding:0 1rem}}"
+        f"h1,h2{{color:{branding.primary_color}}}h1{{border-bottom:2px solid {branding.accent_color};padding-bottom:.25rem}}"
+        f"table{{border-collapse:collapse;width:100%;margin:.5rem 0 1rem;font-size:.9rem}}"
+        f"th{{background:{branding.primary_color};color:#fff;text-align:left}}"
+        f"th,td{{border:1px solid #ddd;padding:.35rem .5rem;vertical-align:top}}"
+        f".score{{font-size:2.5rem;font-weight:bold;color:{branding.primary_color}}}"
+        f".badge{{display:inline-block;padding:.4rem .8rem;color:#fff;font-weight:bold}}"
+        f".success{{background:{_css_color(BRAND_SUCCESS)}}}"
+        f".warning{{background:{_css_color(BRAND_WARNING)}}}"
+        f".danger{{background:{_css_color(BRAND_DANGER)}}}"
+        f".severity-HIGH{{color:{_css_color(BRAND_DANGER)};font-weight:bold}}"
+        f".severity-MEDIUM,.severity-LOW{{color:#B8860B;font-weight:bold}}"
+        f"footer{{color:#888;font-size:.8rem;border-top:1px solid #ddd;margin-top:2rem;padding-top:.5rem}}"
+        "</style></head><body>"
+    )
+
+
+def _list(items: list) -> str:
+    return "<ul>" + "".join(f"<li>{escape(str(item))}</li>" for item in items) + "</ul>" if items else ""
+
+
+def _table(header: list, rows: list) -> str:
+    head = "".join(f"<th>{escape(str(cell))}</th>" for cell in header)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{escape(str(cell)).replace(chr(10), '<br>')}</td>" for cell in row) + "</tr>"
+        for row in rows
+    )
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+
+class ReportFormatter:
+    """
+    Section content for the HTML and JSON report views.
+
+    Content methods mirror ReportGenerator's section builders and reuse its
+    helpers, so the three formats show the same rows, scores and wording.
+    """
+
+    def __init__(self, pdf: ReportGenerator = generator):
+        self.pdf = pdf
+
+    # ------------------------------------------------------------------
+    # Section content (one method per ReportGenerator section builder)
+    # ------------------------------------------------------------------
+
+    def _create_cover_page(self, data: Dict[str, Any], branding: ReportBranding) -> Dict[str, Any]:
+        exec_summary = data.get("executive_summary", {})
+        recommendation = exec_summary.get("recommendation", "REVIEW REQUIRED")
+        return {
+            "prepared_by": branding.company_name,
+            "client_company": data.get("client_company", "Unknown Client"),
+            "client_industry": data.get("client_industry", "N/A"),
+            "analysis_date": data.get("analysis_date", datetime.now().strftime("%B %d, %Y")),
+            "overall_score": exec_summary.get("key_metrics", {}).get("overall_maturity_score", "N/A"),
+            "recommendation": recommendation,
+            "recommendation_tone": self.pdf._get_recommendation_tone(recommendation),
+        }
+
+    def _create_executive_summary(self, data: Dict[str, Any], branding: ReportBranding) -> Dict[str, Any]:
+        exec_summary = data.get("executive_summary", {})
+        return {
+            "overview": exec_summary.get("overview", "No overview available."),
+            "key_metrics": self.pdf._key_metrics_rows(exec_summary.get("key_metrics", {})),
+            "critical_action_items": exec_summary.get("critical_action_items", []),
+            "recommendation_rationale": exec_summary.get("recommendation_rationale", ""),
+        }
+
+    def _create_coverage_analysis(self, data: Dict[str, Any], branding: ReportBranding) -> Dict[str, Any]:
+        coverage_analysis = data.get("coverage_analysis", {})
+        return {
+            "first_party": self.pdf._coverage_rows(coverage_analysis.get("first_party", [])),
+            "third_party": self.pdf._coverage_rows(coverage_analysis.get("third_party", [])),
+        }
+
+    def _create_coverage_matrix(self, data: Dict[str, Any], branding: ReportBranding) -> Dict[str, Any]:
+        sections = self.pdf._matrix_sections(data)
+        carriers = self.pdf._matrix_carriers(sections)
+        return {
+            "header": self.pdf._matrix_header(carriers) if sections else [],
+            "sections": [
+                {
+                    "name": str(section.get("name", "Coverage")),
+                    "rows": [self.pdf._matrix_cells(item, carriers) for item in section["items"] if isinstance(item, dict)],
+                }
+                for section in sections
+            ],
+        }
+
+    def _create_red_flags_section(self, data: Dict[str, Any], branding: ReportBranding) -> Dict[str, Any]:
+        policy_summary = data.get("policy_summary", {})
+        return {
+            "red_flags": [
+                {"severity": flag.get("severity", "MEDIUM"), "flag": flag.get("flag", ""), "impact": flag.get("impact")}
+                for flag in data.get("red_flags", [])
+            ],
+            "critical_deficiencies": policy_summary.get("critical_deficiencies", []),
+            "moderate_concerns": policy_summary.get("moderate_concerns", []),
+        }
+
+    def _create_recommendations_section(self, data: Dict[str, Any], branding: ReportBranding) -> Dict[str, Any]:
+        recommendations = data.get("recommendations", {})
+        return {
+            "immediate_actions": [
+                {"priority": action.get("priority", ""), "item": action.get("item", ""), "rationale": action.get("rationale", "")}
+                for action in recommendations.get("immediate_actions", [])
+            ],
+            "renewal_considerations": recommendations.get("renewal_considerations", []),
+            "risk_management_suggestions": recommendations.get("risk_management_suggestions", []),
+        }
+
+    # ------------------------------------------------------------------
+    # HTML for each section's content
+    # ------------------------------------------------------------------
+
+    def _html_cover_page(self, c: Dict[str, Any]) -> str:
+        return (
+            f"<header><p>{escape(c['prepared_by'].upper())}</p><h1>Cyber Insurance Policy Analysis Report</h1>"
+            f"<p><b>Prepared for:</b> {escape(str(c['client_company']))}<br>"
+            f"<b>Industry:</b> {escape(str(c['client_industry']))}<br>"
+            f"<b>Analysis Date:</b> {escape(str(c['analysis_date']))}</p>"
+            f"<p><span class=\"score\">{escape(str(c['overall_score']))}</span> Overall Maturity Score</p>"
+            f"<p class=\"badge {c['recommendation_tone']}\">Recommendation: {escape(str(c['recommendation']))}</p></header>"
+        )
+
+    def _html_executive_summary(self, c: Dict[str, Any]) -> str:
+        parts = [
+            "<h1>Executive Summary</h1>",
+            f"<p>{escape(str(c['overview']))}</p>",
+            _table(["Metric", "Value"], c["key_metrics"]),
+        ]
+        if c["critical_action_items"]:
+            parts += ["<h2>Critical Action Items</h2>", _list(c["critical_action_items"])]
+        if c["recommendation_rationale"]:
+            parts += ["<h2>Recommendation Rationale</h2>", f"<p>{escape(str(c['recommendation_rationale']))}</p>"]
+        return "".join(parts)
+
+    def _html_coverage_analysis(self, c: Dict[str, Any]) -> str:
+        parts = ["<h1>Coverage Analysis</h1>"]
+        for key, title in (("first_party", "First-Party Coverages"), ("third_party", "Third-Party Coverages")):
+            if c[key]:
+                parts += [f"<h2>{title}</h2>", _table(self.pdf.COVERAGE_HEADERS, c[key])]
+        return "".join(parts)
+
+    def _html_coverage_matrix(self, c: Dict[str, Any]) -> str:
+        if not c["sections"]:
+            return ""
+        parts = ["<h1>Coverage Matrix</h1>"]
+        for section in c["sections"]:
+            parts += [f"<h2>{escape(section['name'])}</h2>", _table(c["header"], section["rows"])]
+        return "".join(parts)
+
+    def _html_red_flags_section(self, c: Dict[str, Any]) -> str:
+        parts = ["<h1>Critical Findings</h1>"]
+        if c["red_flags"]:
+            items = "".join(
+                f"<li><span class=\"severity-{escape(str(flag['severity']))}\">[{escape(str(flag['severity']))}]</span> "
+                f"{escape(str(flag['flag']))}"
+                + (f"<br><i>Impact: {escape(str(flag['impact']))}</i>" if flag["impact"] else "")
+                + "</li>"
+                for flag in c["red_flags"]
+            )
+            parts += ["<h2>Red Flags</h2>", f"<ul>{items}</ul>"]
+        if c["critical_deficiencies"]:
+            parts += ["<h2>Critical Deficiencies</h2>", _list(c["critical_deficiencies"])]
+        if c["moderate_concerns"]:
+            parts += ["<h2>Moderate Concerns</h2>", _list(c["moderate_concerns"])]
+        return "".join(parts)
+
+    def _html_recommendations_section(self, c: Dict[str, Any]) -> str:
+        parts = ["<h1>Recommendations</h1>"]
+        if c["immediate_actions"]:
+            items = "".join(
+                f"<li><b>{escape(str(action['priority']))}. {escape(str(action['item']))}</b>"
+                + (f"<br>{escape(str(action['rationale']))}" if action["rationale"] else "")
+                + "</li>"
+                for action in c["immediate_actions"]
+            )
+            parts += ["<h2>Immediate Actions</h2>", f"<ol>{items}</ol>"]
+        if c["renewal_considerations"]:
+            parts += ["<h2>Renewal Considerations</h2>", _list(c["renewal_considerations"])]
+        if c["risk_management_suggestions"]:
+            parts += ["<h2>Risk Management Suggestions</h2>", _list(c["risk_management_suggestions"])]
+        return "".join(parts)
+
+    # ------------------------------------------------------------------
+    # Streaming output
+    # ------------------------------------------------------------------
+
+    def iter_json(self, analysis_data: Dict[str, Any], branding: Optional[ReportBranding] = None, **meta) -> Iterator[str]:
+        """Compact JSON report, one section per chunk"""
+        branding = branding or self.pdf.template.branding
+        yield json.dumps({**meta, "template_version": TEMPLATE_VERSION}, separators=(",", ":"), default=str)[:-1]
+        yield ',"sections":{'
+        for index, (builder, _) in enumerate(self.pdf.SECTIONS):
+            content = getattr(self, builder)(analysis_data, branding)
+            yield ("," if index else "") + json.dumps(section_key(builder)) + ":" + json.dumps(
+                content, separators=(",", ":"), default=str
+            )
+        yield "}}"
+
+    def iter_html(self, analysis_data: Dict[str, Any], branding: Optional[ReportBranding] = None) -> Iterator[str]:
+        """Standalone HTML report, one section per chunk"""
+        branding = branding or self.pdf.template.branding
+        yield _html_head(branding)
+        for builder, _ in self.pdf.SECTIONS:
+            key = section_key(builder)
+            yield f"<section id=\"{key}\">" + getattr(self, f"_html_{key}")(getattr(self, builder)(analysis_data, branding)) + "</section>"
+        yield (
+            f"<footer>This report was prepared by {escape(branding.company_name)}. "
+            f"Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}.</footer></body></html>"
+        )
+
+    def render(self, fmt: str, analysis_data: Dict[str, Any], branding: Optional[ReportBranding] = None, **meta) -> Iterator[str]:
+        """Chunks of the report in fmt ("html" or "json")"""
+        if fmt == "json":
+            return self.iter_json(analysis_data, branding, **meta)
+        return self.iter_html(analysis_data, branding)
+
+
+# Module-level instance
+report_formatter = ReportFormatter()
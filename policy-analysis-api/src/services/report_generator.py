@@ -3,16 +3,22 @@ PDF Report Generator
 Creates branded Rhône Risk policy analysis reports
 """
 
+import hashlib
+import io
 import logging
 import os
 from datetime import datetime
 from typing import Dict, Any, Optional
 from dataclasses import dataclass
+from functools import lru_cache
+from xml.sax.saxutils import escape
 
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
     PageBreak, Image, HRFlowable
@@ -20,6 +26,7 @@ from reportlab.platypus import (
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 
 from config import settings
+from services.render_pool import render_pool
 
 logger = logging.getLogger(__name__)
 
@@ -32,170 +39,313 @@ BRAND_SUCCESS = colors.HexColor("#28A745")  # Green
 BRAND_WARNING = colors.HexColor("#FFC107")  # Yellow
 BRAND_DANGER = colors.HexColor("#DC3545")   # Red
 
+# Bump whenever report layout or content changes: rendered-report caches
+# are keyed on it, so older renders are not served for the new template
+TEMPLATE_VERSION = "2025.4"
+
+# Coverage matrix layout (sections × items × carriers). Cells are plain
+# pre-wrapped text with precomputed row heights, and each section is cut
+# into fixed-size tables, so layout cost stays linear in the item count.
+# Cells are capped at MATRIX_CELL_MAX_LINES so no row outgrows the page.
+MATRIX_CHUNK_ROWS = 30
+MATRIX_FONT = "Helvetica"
+MATRIX_HEADER_FONT = "Helvetica-Bold"
+MATRIX_FONT_SIZE = 8
+MATRIX_LEADING = 10
+MATRIX_PADDING = 4
+MATRIX_NOTES_CHARS = 240
+MATRIX_CELL_MAX_LINES = 12
+
 
 @dataclass
 class ReportResult:
     """Result of report generation"""
     success: bool
     report_path: Optional[str] = None
+    report_bytes: Optional[bytes] = None
+    filename: Optional[str] = None
     error: Optional[str] = None
 
+    @property
+    def size_bytes(self) -> int:
+        return len(self.report_bytes) if self.report_bytes else 0
+
+
+@dataclass(frozen=True)
+class ReportBranding:
+    """Branding a report is rendered with (hashable, so compiled templates can be cached per branding)"""
+    company_name: str = settings.COMPANY_NAME
+    primary_color: str = settings.PRIMARY_COLOR
+    accent_color: str = settings.ACCENT_COLOR
+
+
+@dataclass(frozen=True)
+class ReportTemplate:
+    """Styles and page chrome compiled once per branding and shared by every report"""
+    branding: ReportBranding
+    primary: colors.Color
+    accent: colors.Color
+    styles: Dict[str, ParagraphStyle]
+    table_styles: Dict[str, TableStyle]
+
+    @property
+    def chrome_form(self) -> str:
+        # A stable digest (not hash(), which varies per process) keeps PDF bytes identical across render workers
+        return f"PageChrome_{hashlib.sha1(repr(self.branding).encode()).hexdigest()[:12]}"
+
+    def draw_page_chrome(self, canvas, doc) -> None:
+        """
+        Footer rule and branding for body pages.
+
+        The static part is recorded once per document as a form XObject and
+        then placed on each page by reference; only the page number is drawn
+        per page.
+        """
+        form = self.chrome_form
+        if not canvas.hasForm(form):
+            canvas.beginForm(form)
+            canvas.setStrokeColor(self.accent)
+            canvas.setLineWidth(0.5)
+            canvas.line(doc.leftMargin, 0.6 * inch, doc.pagesize[0] - doc.rightMargin, 0.6 * inch)
+            canvas.setFont("Helvetica", 8)
+            canvas.setFillColor(colors.gray)
+            canvas.drawString(doc.leftMargin, 0.45 * inch, f"{self.branding.company_name} · Cyber Insurance Policy Analysis")
+            canvas.endForm()
+
+        canvas.saveState()
+        canvas.doForm(form)
+        canvas.setFont("Helvetica", 8)
+        canvas.setFillColor(colors.gray)
+        canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, 0.45 * inch, f"Page {doc.page}")
+        canvas.restoreState()
+
+
+@lru_cache(maxsize=settings.TENANT_BRANDING_CACHE_SIZE)
+def compile_template(branding: ReportBranding) -> ReportTemplate:
+    """Build (once per branding) every paragraph and table style the report uses"""
+    primary = colors.HexColor(branding.primary_color)
+    accent = colors.HexColor(branding.accent_color)
+
+    base_styles = getSampleStyleSheet()
+
+    styles = {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=base_styles['Title'],
+            fontSize=28,
+            textColor=primary,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+        ),
+        'heading1': ParagraphStyle(
+            'CustomH1',
+            parent=base_styles['Heading1'],
+            fontSize=18,
+            textColor=primary,
+            spaceBefore=20,
+            spaceAfter=12,
+            borderWidth=0,
+            borderColor=accent,
+            borderPadding=5,
+        ),
+        'heading2': ParagraphStyle(
+            'CustomH2',
+            parent=base_styles['Heading2'],
+            fontSize=14,
+            textColor=primary,
+            spaceBefore=15,
+            spaceAfter=8,
+        ),
+        'body': ParagraphStyle(
+            'CustomBody',
+            parent=base_styles['Normal'],
+            fontSize=10,
+            leading=14,
+            spaceAfter=8,
+        ),
+        'metric': ParagraphStyle(
+            'Metric',
+            parent=base_styles['Normal'],
+            fontSize=24,
+            textColor=primary,
+            alignment=TA_CENTER,
+        ),
+        'metric_label': ParagraphStyle(
+            'MetricLabel',
+            parent=base_styles['Normal'],
+            fontSize=10,
+            textColor=colors.gray,
+            alignment=TA_CENTER,
+        ),
+        'recommendation': ParagraphStyle(
+            'Recommendation',
+            parent=base_styles['Normal'],
+            fontSize=16,
+            textColor=colors.white,
+            alignment=TA_CENTER,
+            backColor=primary,
+        ),
+        'bullet': ParagraphStyle(
+            'Bullet',
+            parent=base_styles['Normal'],
+            fontSize=10,
+            leftIndent=20,
+            bulletIndent=10,
+            spaceAfter=4,
+        ),
+        'footer': ParagraphStyle(
+            'Footer',
+            parent=base_styles['Normal'],
+            fontSize=8,
+            textColor=colors.gray,
+            alignment=TA_CENTER,
+        ),
+
+        # Formerly created inline per element (once per red flag / action item)
+        'subtitle': ParagraphStyle(
+            'Subtitle',
+            fontSize=20,
+            textColor=accent,
+            alignment=TA_CENTER,
+            spaceAfter=40,
+        ),
+        'client_name': ParagraphStyle('ClientInfo', fontSize=14, alignment=TA_CENTER, spaceAfter=8),
+        'client_info': ParagraphStyle('ClientInfo', fontSize=12, alignment=TA_CENTER, spaceAfter=8),
+        'client_info_last': ParagraphStyle('ClientInfo', fontSize=12, alignment=TA_CENTER, spaceAfter=40),
+        'impact': ParagraphStyle('Impact', fontSize=9, textColor=colors.gray, leftIndent=30),
+        'rationale': ParagraphStyle('Rationale', fontSize=9, textColor=colors.gray, leftIndent=30),
+    }
+
+    # One recommendation badge style per badge color
+    for name, badge_color in (("success", BRAND_SUCCESS), ("warning", BRAND_WARNING), ("danger", BRAND_DANGER)):
+        styles[f"rec_badge_{name}"] = ParagraphStyle(
+            'RecBadge',
+            fontSize=14,
+            textColor=colors.white,
+            backColor=badge_color,
+            alignment=TA_CENTER,
+            spaceBefore=10,
+            spaceAfter=10,
+            borderPadding=10,
+        )
+
+
+    table_styles = {
+        'score_box': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), BRAND_LIGHT),
+            ('BOX', (0, 0), (-1, -1), 2, accent),
+            ('TOPPADDING', (0, 0), (-1, -1), 15),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ]),
+        'metrics': TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), BRAND_LIGHT),
+            ('TEXTCOLOR', (0, 0), (-1, -1), primary),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
+            ('PADDING', (0, 0), (-1, -1), 8),
+        ]),
+        'matrix': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), primary),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), MATRIX_FONT),
+            ('FONTSIZE', (0, 0), (-1, -1), MATRIX_FONT_SIZE),
+            ('LEADING', (0, 0), (-1, -1), MATRIX_LEADING),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
+            ('PADDING', (0, 0), (-1, -1), MATRIX_PADDING),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, BRAND_LIGHT]),
+        ]),
+        'coverage': TableStyle([
+            # Header styling
+            ('BACKGROUND', (0, 0), (-1, 0), primary),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+
+            # Body styling
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
+            ('PADDING', (0, 0), (-1, -1), 6),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+
+            # Alternating rows
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, BRAND_LIGHT]),
+        ]),
+    }
+
+    logger.info(f"🎨 Compiled report template for {branding.company_name}")
+    return ReportTemplate(
+        branding=branding,
+        primary=primary,
+        accent=accent,
+        styles=styles,
+        table_styles=table_styles,
+    )
+
 
 class ReportGenerator:
     """
     Generates professionally branded PDF reports from analysis data.
     """
 
+    # Report sections in order (builder, page break after)
+    SECTIONS = (
+        ("_create_cover_page", True),
+        ("_create_executive_summary", True),
+        ("_create_coverage_analysis", False),
+        ("_create_coverage_matrix", True),
+        ("_create_red_flags_section", False),
+        ("_create_recommendations_section", False),
+    )
+
+    COVERAGE_HEADERS = ["Coverage", "Score", "Sublimit", "Notes"]
+
     def __init__(self):
-        self.styles = self._create_styles()
-
-    def _create_styles(self) -> Dict[str, ParagraphStyle]:
-        """Create custom paragraph styles for the report"""
-        base_styles = getSampleStyleSheet()
-
-        styles = {
-            'title': ParagraphStyle(
-                'CustomTitle',
-                parent=base_styles['Title'],
-                fontSize=28,
-                textColor=BRAND_PRIMARY,
-                spaceAfter=30,
-                alignment=TA_CENTER,
-            ),
-            'heading1': ParagraphStyle(
-                'CustomH1',
-                parent=base_styles['Heading1'],
-                fontSize=18,
-                textColor=BRAND_PRIMARY,
-                spaceBefore=20,
-                spaceAfter=12,
-                borderWidth=0,
-                borderColor=BRAND_ACCENT,
-                borderPadding=5,
-            ),
-            'heading2': ParagraphStyle(
-                'CustomH2',
-                parent=base_styles['Heading2'],
-                fontSize=14,
-                textColor=BRAND_PRIMARY,
-                spaceBefore=15,
-                spaceAfter=8,
-            ),
-            'body': ParagraphStyle(
-                'CustomBody',
-                parent=base_styles['Normal'],
-                fontSize=10,
-                leading=14,
-                spaceAfter=8,
-            ),
-            'metric': ParagraphStyle(
-                'Metric',
-                parent=base_styles['Normal'],
-                fontSize=24,
-                textColor=BRAND_PRIMARY,
-                alignment=TA_CENTER,
-            ),
-            'metric_label': ParagraphStyle(
-                'MetricLabel',
-                parent=base_styles['Normal'],
-                fontSize=10,
-                textColor=colors.gray,
-                alignment=TA_CENTER,
-            ),
-            'recommendation': ParagraphStyle(
-                'Recommendation',
-                parent=base_styles['Normal'],
-                fontSize=16,
-                textColor=colors.white,
-                alignment=TA_CENTER,
-                backColor=BRAND_PRIMARY,
-            ),
-            'bullet': ParagraphStyle(
-                'Bullet',
-                parent=base_styles['Normal'],
-                fontSize=10,
-                leftIndent=20,
-                bulletIndent=10,
-                spaceAfter=4,
-            ),
-            'footer': ParagraphStyle(
-                'Footer',
-                parent=base_styles['Normal'],
-                fontSize=8,
-                textColor=colors.gray,
-                alignment=TA_CENTER,
-            ),
-        }
-
-        return styles
+        self.template = compile_template(ReportBranding())
+        self.styles = self.template.styles
 
     async def generate_report(
         self,
         analysis_data: Dict[str, Any],
-        output_dir: str = "reports",
+        output_dir: Optional[str] = "reports",
+        branding: Optional[ReportBranding] = None,
     ) -> ReportResult:
         """
         Generate a branded PDF report from analysis data.
 
+        The PDF is rendered in memory. It is also written to disk only when
+        output_dir is given; pass None when the bytes go straight to storage.
+
         Args:
             analysis_data: Structured analysis output from Claude
-            output_dir: Directory to save the report
+            output_dir: Directory to save the report (None = in memory only)
+            branding: Tenant branding (default: global branding settings)
 
         Returns:
-            ReportResult with path to generated PDF
+            ReportResult with the PDF bytes (and path, if written)
         """
         client_name = analysis_data.get("client_company", "Unknown Client")
         logger.info(f"📄 Generating report for {client_name}")
 
-        os.makedirs(output_dir, exist_ok=True)
-
         # Create filename
         safe_name = "".join(c for c in client_name if c.isalnum() or c in (' ', '-', '_')).strip()
         safe_name = safe_name.replace(' ', '_')
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{safe_name}_Policy_Analysis_{timestamp}.pdf"
-        filepath = os.path.join(output_dir, filename)
 
         try:
-            doc = SimpleDocTemplate(
-                filepath,
-                pagesize=letter,
-                rightMargin=0.75*inch,
-                leftMargin=0.75*inch,
-                topMargin=0.75*inch,
-                bottomMargin=0.75*inch,
-            )
-
-            # Build the report content
-            story = []
-
-            # Cover Page
-            story.extend(self._create_cover_page(analysis_data))
-            story.append(PageBreak())
-
-            # Executive Summary
-            story.extend(self._create_executive_summary(analysis_data))
-            story.append(PageBreak())
-
-            # Coverage Analysis
-            story.extend(self._create_coverage_analysis(analysis_data))
-            story.append(PageBreak())
-
-            # Red Flags & Deficiencies
-            story.extend(self._create_red_flags_section(analysis_data))
-
-            # Recommendations
-            story.extend(self._create_recommendations_section(analysis_data))
-
-            # Build the PDF
-            doc.build(story)
-
-            logger.info(f"✅ Report generated: {filepath}")
-
-            return ReportResult(
+            result = ReportResult(
                 success=True,
-                report_path=filepath,
+                report_bytes=await render_pool.render(analysis_data, branding=branding),
+                filename=filename,
             )
+            if output_dir:
+                self.save_report(result, output_dir)
+
+            logger.info(f"✅ Report generated: {result.report_path or filename} ({result.size_bytes:,} bytes)")
+            return result
 
         except Exception as e:
             logger.error(f"❌ Report generation failed: {str(e)}")
@@ -204,7 +354,57 @@ class ReportGenerator:
                 error=str(e),
             )
 
-    def _create_cover_page(self, data: Dict[str, Any]) -> list:
+    def save_report(self, result: ReportResult, output_dir: str) -> str:
+        """Write an in-memory report to output_dir and record its path"""
+        os.makedirs(output_dir, exist_ok=True)
+        filepath = os.path.join(output_dir, result.filename)
+        with open(filepath, "wb") as f:
+            f.write(result.report_bytes)
+        result.report_path = filepath
+        return filepath
+
+    def render_pdf(self, analysis_data: Dict[str, Any], branding: Optional[ReportBranding] = None) -> bytes:
+        """
+        Build the report synchronously and return the PDF bytes.
+
+        CPU-bound; called from render pool workers rather than the event loop.
+        """
+        t = compile_template(branding) if branding else self.template
+
+        # Build the report content
+        story = []
+        for builder, page_break in self.SECTIONS:
+            story.extend(getattr(self, builder)(analysis_data, t))
+            if page_break:
+                story.append(PageBreak())
+
+        return self.build_document(story, t)
+
+    def build_document(self, story: list, t: ReportTemplate, compress: Optional[bool] = None) -> bytes:
+        """
+        Lay out a finished story and return the PDF bytes.
+
+        Page content streams are Flate-compressed unless REPORT_PDF_COMPRESSION
+        (or compress) is off. Reports use only the standard PDF fonts, which
+        are referenced rather than embedded, so there are no font programs
+        to subset.
+        """
+        if compress is None:
+            compress = settings.REPORT_PDF_COMPRESSION
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=letter,
+            rightMargin=0.75*inch,
+            leftMargin=0.75*inch,
+            topMargin=0.75*inch,
+            bottomMargin=0.75*inch,
+            pageCompression=1 if compress else 0,
+        )
+        doc.build(story, onLaterPages=t.draw_page_chrome)
+        return buffer.getvalue()
+
+    def _create_cover_page(self, data: Dict[str, Any], t: ReportTemplate) -> list:
         """Create the report cover page"""
         elements = []
 
@@ -213,8 +413,8 @@ class ReportGenerator:
 
         # Company branding
         elements.append(Paragraph(
-            "RHÔNE RISK ADVISORY",
-            self.styles['metric_label']
+            escape(t.branding.company_name.upper()),  # Tenant text: keep it out of the Paragraph markup
+            t.styles['metric_label']
         ))
 
         elements.append(Spacer(1, 0.3*inch))
@@ -222,24 +422,18 @@ class ReportGenerator:
         # Report title
         elements.append(Paragraph(
             "Cyber Insurance",
-            self.styles['title']
+            t.styles['title']
         ))
         elements.append(Paragraph(
             "Policy Analysis Report",
-            ParagraphStyle(
-                'Subtitle',
-                fontSize=20,
-                textColor=BRAND_ACCENT,
-                alignment=TA_CENTER,
-                spaceAfter=40,
-            )
+            t.styles['subtitle']
         ))
 
         # Horizontal rule
         elements.append(HRFlowable(
             width="80%",
             thickness=2,
-            color=BRAND_ACCENT,
+            color=t.accent,
             spaceBefore=20,
             spaceAfter=40,
         ))
@@ -251,15 +445,15 @@ class ReportGenerator:
 
         elements.append(Paragraph(
             f"<b>Prepared for:</b> {client_name}",
-            ParagraphStyle('ClientInfo', fontSize=14, alignment=TA_CENTER, spaceAfter=8)
+            t.styles['client_name']
         ))
         elements.append(Paragraph(
             f"<b>Industry:</b> {client_industry}",
-            ParagraphStyle('ClientInfo', fontSize=12, alignment=TA_CENTER, spaceAfter=8)
+            t.styles['client_info']
         ))
         elements.append(Paragraph(
             f"<b>Analysis Date:</b> {analysis_date}",
-            ParagraphStyle('ClientInfo', fontSize=12, alignment=TA_CENTER, spaceAfter=40)
+            t.styles['client_info_last']
         ))
 
         # Overall score display
@@ -272,73 +466,44 @@ class ReportGenerator:
 
         # Score box
         score_table = Table([
-            [Paragraph(f"{overall_score}", self.styles['metric'])],
-            [Paragraph("Overall Maturity Score", self.styles['metric_label'])],
+            [Paragraph(f"{overall_score}", t.styles['metric'])],
+            [Paragraph("Overall Maturity Score", t.styles['metric_label'])],
         ], colWidths=[3*inch])
 
-        score_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), BRAND_LIGHT),
-            ('BOX', (0, 0), (-1, -1), 2, BRAND_ACCENT),
-            ('TOPPADDING', (0, 0), (-1, -1), 15),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ]))
+        score_table.setStyle(t.table_styles['score_box'])
 
         elements.append(score_table)
 
         elements.append(Spacer(1, 0.3*inch))
 
         # Recommendation badge
-        rec_color = self._get_recommendation_color(recommendation)
         elements.append(Paragraph(
             f"<b>Recommendation: {recommendation}</b>",
-            ParagraphStyle(
-                'RecBadge',
-                fontSize=14,
-                textColor=colors.white,
-                backColor=rec_color,
-                alignment=TA_CENTER,
-                spaceBefore=10,
-                spaceAfter=10,
-                borderPadding=10,
-            )
+            t.styles[f"rec_badge_{self._get_recommendation_tone(recommendation)}"]
         ))
 
         return elements
 
-    def _create_executive_summary(self, data: Dict[str, Any]) -> list:
+    def _create_executive_summary(self, data: Dict[str, Any], t: ReportTemplate) -> list:
         """Create executive summary section"""
         elements = []
 
-        elements.append(Paragraph("Executive Summary", self.styles['heading1']))
-        elements.append(HRFlowable(width="100%", thickness=1, color=BRAND_ACCENT))
+        elements.append(Paragraph("Executive Summary", t.styles['heading1']))
+        elements.append(HRFlowable(width="100%", thickness=1, color=t.accent))
 
         exec_summary = data.get("executive_summary", {})
 
         # Overview paragraph
         overview = exec_summary.get("overview", "No overview available.")
-        elements.append(Paragraph(overview, self.styles['body']))
+        elements.append(Paragraph(overview, t.styles['body']))
 
         elements.append(Spacer(1, 0.3*inch))
 
         # Key metrics table
-        key_metrics = exec_summary.get("key_metrics", {})
-        metrics_data = [
-            ["Overall Score", f"{key_metrics.get('overall_maturity_score', 'N/A')}/10"],
-            ["Coverage Comprehensiveness", f"{key_metrics.get('coverage_comprehensiveness', 'N/A')}%"],
-            ["Total Coverage Limit", f"${key_metrics.get('total_coverage_limit', 0):,}"],
-            ["Annual Premium", f"${key_metrics.get('annual_premium', 0):,}"],
-            ["Carrier Rating", key_metrics.get('primary_carrier_rating', 'N/A')],
-        ]
+        metrics_data = self._key_metrics_rows(exec_summary.get("key_metrics", {}))
 
         metrics_table = Table(metrics_data, colWidths=[3*inch, 2*inch])
-        metrics_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), BRAND_LIGHT),
-            ('TEXTCOLOR', (0, 0), (-1, -1), BRAND_PRIMARY),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
-            ('PADDING', (0, 0), (-1, -1), 8),
-        ]))
+        metrics_table.setStyle(t.table_styles['metrics'])
 
         elements.append(metrics_table)
 
@@ -347,88 +512,210 @@ class ReportGenerator:
         # Critical action items
         action_items = exec_summary.get("critical_action_items", [])
         if action_items:
-            elements.append(Paragraph("Critical Action Items", self.styles['heading2']))
+            elements.append(Paragraph("Critical Action Items", t.styles['heading2']))
             for item in action_items:
                 elements.append(Paragraph(
                     f"• {item}",
-                    self.styles['bullet']
+                    t.styles['bullet']
                 ))
 
         # Recommendation rationale
         rationale = exec_summary.get("recommendation_rationale", "")
         if rationale:
             elements.append(Spacer(1, 0.2*inch))
-            elements.append(Paragraph("Recommendation Rationale", self.styles['heading2']))
-            elements.append(Paragraph(rationale, self.styles['body']))
+            elements.append(Paragraph("Recommendation Rationale", t.styles['heading2']))
+            elements.append(Paragraph(rationale, t.styles['body']))
 
         return elements
 
-    def _create_coverage_analysis(self, data: Dict[str, Any]) -> list:
+    def _key_metrics_rows(self, key_metrics: Dict[str, Any]) -> list:
+        """[label, value] rows for the key metrics table"""
+        return [
+            ["Overall Score", f"{key_metrics.get('overall_maturity_score', 'N/A')}/10"],
+            ["Coverage Comprehensiveness", f"{key_metrics.get('coverage_comprehensiveness', 'N/A')}%"],
+            ["Total Coverage Limit", f"${key_metrics.get('total_coverage_limit', 0):,}"],
+            ["Annual Premium", f"${key_metrics.get('annual_premium', 0):,}"],
+            ["Carrier Rating", key_metrics.get('primary_carrier_rating', 'N/A')],
+        ]
+
+    def _create_coverage_analysis(self, data: Dict[str, Any], t: ReportTemplate) -> list:
         """Create detailed coverage analysis section"""
         elements = []
 
-        elements.append(Paragraph("Coverage Analysis", self.styles['heading1']))
-        elements.append(HRFlowable(width="100%", thickness=1, color=BRAND_ACCENT))
+        elements.append(Paragraph("Coverage Analysis", t.styles['heading1']))
+        elements.append(HRFlowable(width="100%", thickness=1, color=t.accent))
 
         coverage_analysis = data.get("coverage_analysis", {})
 
         # First-party coverages
         first_party = coverage_analysis.get("first_party", [])
         if first_party:
-            elements.append(Paragraph("First-Party Coverages", self.styles['heading2']))
-            elements.append(self._create_coverage_table(first_party))
+            elements.append(Paragraph("First-Party Coverages", t.styles['heading2']))
+            elements.append(self._create_coverage_table(first_party, t))
 
         elements.append(Spacer(1, 0.3*inch))
 
         # Third-party coverages
         third_party = coverage_analysis.get("third_party", [])
         if third_party:
-            elements.append(Paragraph("Third-Party Coverages", self.styles['heading2']))
-            elements.append(self._create_coverage_table(third_party))
+            elements.append(Paragraph("Third-Party Coverages", t.styles['heading2']))
+            elements.append(self._create_coverage_table(third_party, t))
 
         return elements
 
-    def _create_coverage_table(self, coverages: list) -> Table:
+    def _create_coverage_table(self, coverages: list, t: ReportTemplate) -> Table:
         """Create a table for coverage items"""
-        headers = ["Coverage", "Score", "Sublimit", "Notes"]
-        data = [headers]
+        data = [self.COVERAGE_HEADERS] + self._coverage_rows(coverages)
+
+        table = Table(data, colWidths=[2*inch, 0.8*inch, 1.2*inch, 2.5*inch])
+        table.setStyle(t.table_styles['coverage'])
 
+        return table
+
+    def _coverage_rows(self, coverages: list) -> list:
+        """Coverage, score, sublimit and (truncated) notes for each coverage item"""
+        rows = []
         for cov in coverages:
             score = cov.get("maturity_score", "N/A")
             score_display = f"{score}/10" if isinstance(score, (int, float)) else str(score)
 
-            data.append([
+            rows.append([
                 cov.get("coverage_name", "Unknown"),
                 score_display,
                 cov.get("sublimit", "N/A"),
                 cov.get("notes", "")[:100] + "..." if len(cov.get("notes", "")) > 100 else cov.get("notes", ""),
             ])
+        return rows
+
+    def _create_coverage_matrix(self, data: Dict[str, Any], t: ReportTemplate) -> list:
+        """Create the sections × items × carriers coverage matrix"""
+        sections = self._matrix_sections(data)
+        if not sections:
+            return []
+
+        carriers = self._matrix_carriers(sections)
+        col_widths = self._matrix_column_widths(len(carriers))
+        header = self._matrix_header(carriers)
+        header_row, header_height = self._matrix_row(header, col_widths, font=MATRIX_HEADER_FONT)
+
+        elements = [
+            Paragraph("Coverage Matrix", t.styles['heading1']),
+            HRFlowable(width="100%", thickness=1, color=t.accent),
+        ]
+        for section in sections:
+            rows, heights = [], []
+            for item in section["items"]:
+                if not isinstance(item, dict):
+                    continue
+                row, height = self._matrix_row(self._matrix_cells(item, carriers), col_widths)
+                rows.append(row)
+                heights.append(height)
+
+            elements.append(Paragraph(str(section.get("name", "Coverage")), t.styles['heading2']))
+            for start in range(0, len(rows), MATRIX_CHUNK_ROWS):
+                end = start + MATRIX_CHUNK_ROWS
+                table = Table(
+                    [header_row] + rows[start:end],
+                    colWidths=col_widths,
+                    rowHeights=[header_height] + heights[start:end],
+                    repeatRows=1,
+                )
+                table.setStyle(t.table_styles['matrix'])
+                elements.append(table)
 
-        table = Table(data, colWidths=[2*inch, 0.8*inch, 1.2*inch, 2.5*inch])
-        table.setStyle(TableStyle([
-            # Header styling
-            ('BACKGROUND', (0, 0), (-1, 0), BRAND_PRIMARY),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-
-            # Body styling
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
-            ('PADDING', (0, 0), (-1, -1), 6),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        return elements
 
-            # Alternating rows
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, BRAND_LIGHT]),
-        ]))
+    def _matrix_sections(self, data: Dict[str, Any]) -> list:
+        """Sections that have items to show"""
+        return [
+            section for section in data.get("sections") or []
+            if isinstance(section, dict) and section.get("items")
+        ]
 
-        return table
+    def _matrix_carriers(self, sections: list) -> list:
+        """Carrier columns in first-seen order"""
+        carriers: Dict[str, None] = {}
+        for section in sections:
+            for item in section["items"]:
+                if isinstance(item, dict) and isinstance(item.get("carrier_values"), dict):
+                    carriers.update(dict.fromkeys(item["carrier_values"]))
+        return list(carriers)
+
+    def _matrix_header(self, carriers: list) -> list:
+        return ["Coverage Item"] + carriers + (["Notes"] if len(carriers) == 1 else [])
+
+    def _matrix_column_widths(self, carrier_count: int) -> list:
+        """Item column, one column per carrier, plus notes for single-carrier reports"""
+        available = letter[0] - 1.5*inch
+        if carrier_count <= 1:
+            return [2*inch, 1.6*inch, available - 3.6*inch]
+        item_width = 1.8*inch
+        return [item_width] + [(available - item_width) / carrier_count] * carrier_count
+
+    def _matrix_cells(self, item: Dict[str, Any], carriers: list) -> list:
+        """Cell text for one item: score, value and retention per carrier"""
+        values = item.get("carrier_values") or {}
+        cells = [str(item.get("name", "Unknown"))]
+        notes = ""
+        for carrier in carriers:
+            cv = values.get(carrier)
+            if not isinstance(cv, dict):
+                cells.append("—")
+                continue
+            score = cv.get("maturity_score")
+            lines = [f"{score}/10" if isinstance(score, (int, float)) else "N/A"]
+            if cv.get("value") not in (None, ""):
+                lines.append(str(cv["value"]))
+            if cv.get("retention"):
+                lines.append(f"Retention {cv['retention']}")
+            cells.append("\n".join(lines))
+            notes = notes or str(cv.get("notes") or "")
+
+        if len(carriers) == 1:
+            if len(notes) > MATRIX_NOTES_CHARS:
+                notes = notes[:MATRIX_NOTES_CHARS].rsplit(" ", 1)[0] + "..."
+            cells.append(notes)
+        return cells
+
+    def _matrix_row(self, cells: list, col_widths: list, font: str = MATRIX_FONT) -> tuple:
+        """Wrap cell text to its column and return (row, height) so reportlab never measures it"""
+        row, max_lines = [], 1
+        for text, width in zip(cells, col_widths):
+            lines = self._matrix_wrap(text, font, width - 2*MATRIX_PADDING)
+            row.append("\n".join(lines))
+            max_lines = max(max_lines, len(lines))
+        return row, max_lines * MATRIX_LEADING + 2*MATRIX_PADDING
+
+    @staticmethod
+    def _matrix_wrap(text: str, font: str, width: float) -> list:
+        """
+        Lines of a cell wrapped to width in font.
 
-    def _create_red_flags_section(self, data: Dict[str, Any]) -> list:
+        Words too long for the column are broken across lines, and a cell
+        longer than MATRIX_CELL_MAX_LINES is cut off with "...".
+        """
+        lines = []
+        for paragraph in text.split("\n"):
+            for line in simpleSplit(paragraph, font, MATRIX_FONT_SIZE, width) or [""]:
+                while stringWidth(line, font, MATRIX_FONT_SIZE) > width and len(line) > 1:
+                    cut = len(line) - 1
+                    while cut > 1 and stringWidth(line[:cut], font, MATRIX_FONT_SIZE) > width:
+                        cut -= 1
+                    lines.append(line[:cut])
+                    line = line[cut:]
+                lines.append(line)
+        if len(lines) > MATRIX_CELL_MAX_LINES:
+            last = lines[MATRIX_CELL_MAX_LINES - 1]
+            while last and stringWidth(last + "...", font, MATRIX_FONT_SIZE) > width:
+                last = last[:-1]
+            lines = lines[:MATRIX_CELL_MAX_LINES - 1] + [last.rstrip() + "..."]
+        return lines
+
+    def _create_red_flags_section(self, data: Dict[str, Any], t: ReportTemplate) -> list:
         """Create red flags and deficiencies section"""
         elements = []
 
-        elements.append(Paragraph("Critical Findings", self.styles['heading1']))
+        elements.append(Paragraph("Critical Findings", t.styles['heading1']))
         elements.append(HRFlowable(width="100%", thickness=1, color=BRAND_DANGER))
 
         red_flags = data.get("red_flags", [])
@@ -436,44 +723,44 @@ class ReportGenerator:
 
         # Red flags
         if red_flags:
-            elements.append(Paragraph("Red Flags", self.styles['heading2']))
+            elements.append(Paragraph("Red Flags", t.styles['heading2']))
             for flag in red_flags:
                 severity = flag.get("severity", "MEDIUM")
                 severity_color = BRAND_DANGER if severity == "HIGH" else BRAND_WARNING
 
                 elements.append(Paragraph(
                     f"<font color='{severity_color.hexval()}'>[{severity}]</font> {flag.get('flag', '')}",
-                    self.styles['bullet']
+                    t.styles['bullet']
                 ))
                 if flag.get("impact"):
                     elements.append(Paragraph(
                         f"   Impact: {flag.get('impact')}",
-                        ParagraphStyle('Impact', fontSize=9, textColor=colors.gray, leftIndent=30)
+                        t.styles['impact']
                     ))
 
         # Critical deficiencies
         deficiencies = policy_summary.get("critical_deficiencies", [])
         if deficiencies:
             elements.append(Spacer(1, 0.2*inch))
-            elements.append(Paragraph("Critical Deficiencies", self.styles['heading2']))
+            elements.append(Paragraph("Critical Deficiencies", t.styles['heading2']))
             for item in deficiencies:
-                elements.append(Paragraph(f"• {item}", self.styles['bullet']))
+                elements.append(Paragraph(f"• {item}", t.styles['bullet']))
 
         # Moderate concerns
         concerns = policy_summary.get("moderate_concerns", [])
         if concerns:
             elements.append(Spacer(1, 0.2*inch))
-            elements.append(Paragraph("Moderate Concerns", self.styles['heading2']))
+            elements.append(Paragraph("Moderate Concerns", t.styles['heading2']))
             for item in concerns:
-                elements.append(Paragraph(f"• {item}", self.styles['bullet']))
+                elements.append(Paragraph(f"• {item}", t.styles['bullet']))
 
         return elements
 
-    def _create_recommendations_section(self, data: Dict[str, Any]) -> list:
+    def _create_recommendations_section(self, data: Dict[str, Any], t: ReportTemplate) -> list:
         """Create recommendations section"""
         elements = []
 
-        elements.append(Paragraph("Recommendations", self.styles['heading1']))
+        elements.append(Paragraph("Recommendations", t.styles['heading1']))
         elements.append(HRFlowable(width="100%", thickness=1, color=BRAND_SUCCESS))
 
         recommendations = data.get("recommendations", {})
@@ -481,7 +768,7 @@ class ReportGenerator:
         # Immediate actions
         immediate = recommendations.get("immediate_actions", [])
         if immediate:
-            elements.append(Paragraph("Immediate Actions", self.styles['heading2']))
+            elements.append(Paragraph("Immediate Actions", t.styles['heading2']))
             for action in immediate:
                 priority = action.get("priority", "")
                 item = action.get("item", "")
@@ -489,50 +776,50 @@ class ReportGenerator:
 
                 elements.append(Paragraph(
                     f"<b>{priority}. {item}</b>",
-                    self.styles['bullet']
+                    t.styles['bullet']
                 ))
                 if rationale:
                     elements.append(Paragraph(
                         f"   {rationale}",
-                        ParagraphStyle('Rationale', fontSize=9, textColor=colors.gray, leftIndent=30)
+                        t.styles['rationale']
                     ))
 
         # Renewal considerations
         renewal = recommendations.get("renewal_considerations", [])
         if renewal:
             elements.append(Spacer(1, 0.2*inch))
-            elements.append(Paragraph("Renewal Considerations", self.styles['heading2']))
+            elements.append(Paragraph("Renewal Considerations", t.styles['heading2']))
             for item in renewal:
-                elements.append(Paragraph(f"• {item}", self.styles['bullet']))
+                elements.append(Paragraph(f"• {item}", t.styles['bullet']))
 
         # Risk management suggestions
         risk_mgmt = recommendations.get("risk_management_suggestions", [])
         if risk_mgmt:
             elements.append(Spacer(1, 0.2*inch))
-            elements.append(Paragraph("Risk Management Suggestions", self.styles['heading2']))
+            elements.append(Paragraph("Risk Management Suggestions", t.styles['heading2']))
             for item in risk_mgmt:
-                elements.append(Paragraph(f"• {item}", self.styles['bullet']))
+                elements.append(Paragraph(f"• {item}", t.styles['bullet']))
 
         # Footer
         elements.append(Spacer(1, 0.5*inch))
         elements.append(HRFlowable(width="100%", thickness=0.5, color=colors.lightgrey))
         elements.append(Paragraph(
-            f"This report was prepared by Rhône Risk Advisory. "
+            f"This report was prepared by {escape(t.branding.company_name)}. "
             f"Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}.",
-            self.styles['footer']
+            t.styles['footer']
         ))
 
         return elements
 
-    def _get_recommendation_color(self, recommendation: str) -> colors.Color:
-        """Get color for recommendation badge"""
+    def _get_recommendation_tone(self, recommendation: str) -> str:
+        """Get the badge tone (success / warning / danger) for a recommendation"""
         rec_upper = recommendation.upper()
         if "BIND" in rec_upper and "CONDITIONS" not in rec_upper:
-            return BRAND_SUCCESS
+            return "success"
         elif "CONDITIONS" in rec_upper or "NEGOTIATE" in rec_upper:
-            return BRAND_WARNING
+            return "warning"
         else:
-            return BRAND_DANGER
+            return "danger"
 
 
 # Module-level instance
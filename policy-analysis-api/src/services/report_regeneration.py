@@ -0,0 +1,179 @@
+"""
+Report Regeneration Service
+Re-renders reports from stored analysis_data without re-running analysis
+
+After a rendering fix or a rebrand, reports are rebuilt from the persisted
+analysis_data with the current ReportGenerator and re-uploaded over the
+existing storage object. No Claude calls are made, so rebuilding every
+report costs render CPU only.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from services.branding import branding_service
+from services.orchestrator import (
+    _get_supabase_client,
+    _upload_report_to_supabase,
+    analysis_status_store,
+)
+from services.report_service import report_service
+
+logger = logging.getLogger(__name__)
+
+# Stored rows fetched per page in bulk regeneration
+PAGE_SIZE = 50
+
+POLICY_COLUMNS = "id, tenant_id, company_id, analysis_id, analysis_data, report_storage_path"
+
+
+class AnalysisNotFound(Exception):
+    """Raised when no stored analysis_data exists for an analysis"""
+    pass
+
+
+def _load_by_analysis_id(supa, analysis_id: str) -> Optional[Dict[str, Any]]:
+    rows = supa.table("insurance_policies") \
+        .select(POLICY_COLUMNS) \
+        .eq("analysis_id", analysis_id) \
+        .limit(1) \
+        .execute().data or []
+    return rows[0] if rows else None
+
+
+def _load_page(supa, tenant_id: Optional[str], start: int, page_size: int) -> List[Dict[str, Any]]:
+    query = supa.table("insurance_policies") \
+        .select(POLICY_COLUMNS) \
+        .not_.is_("analysis_data", "null")
+    if tenant_id:
+        query = query.eq("tenant_id", tenant_id)
+    return query.order("id").range(start, start + page_size - 1).execute().data or []
+
+
+def _write_storage_path(supa, policy_id: str, storage_path: str) -> None:
+    supa.table("insurance_policies") \
+        .update({"report_storage_path": storage_path, "updated_at": datetime.utcnow().isoformat()}) \
+        .eq("id", policy_id) \
+        .execute()
+
+
+async def _regenerate_row(supa, row: Dict[str, Any]) -> Dict[str, Any]:
+    """Render one stored analysis and upload it over its existing report"""
+    analysis_data = row["analysis_data"]
+    analysis_id = row.get("analysis_id") or row["id"]
+
+    branding = await branding_service.for_tenant(row.get("tenant_id"))
+    report = await report_service.render(analysis_data, refresh=True, branding=branding)
+    if not report.success:
+        raise RuntimeError(f"Report generation failed: {report.error}")
+
+    storage_path = await _upload_report_to_supabase(
+        report_bytes=report.report_bytes,
+        tenant_id=row.get("tenant_id") or "default",
+        company_id=row.get("company_id") or "unknown",
+        analysis_id=analysis_id,
+        client_name=analysis_data.get("client_company") or "Unknown Client",
+        storage_path=row.get("report_storage_path"),
+        overwrite=True,
+    )
+    if not storage_path:
+        raise RuntimeError("Report upload failed")
+    if storage_path != row.get("report_storage_path"):
+        await asyncio.to_thread(_write_storage_path, supa, row["id"], storage_path)
+
+    _update_in_memory(analysis_id, {
+        "report_storage_path": storage_path,
+        "report_size_bytes": report.size_bytes,
+        "report_status": "ready",
+    })
+    return {"analysis_id": analysis_id, "report_storage_path": storage_path, "size_bytes": report.size_bytes}
+
+
+def _update_in_memory(analysis_id: str, report: Dict[str, Any]) -> None:
+    result = (analysis_status_store.get(analysis_id) or {}).get("result")
+    if result is not None:
+        result.update(report)
+
+
+async def regenerate_report(analysis_id: str) -> Dict[str, Any]:
+    """
+    Re-render one analysis's report from its stored analysis_data.
+
+    Uses the Supabase row when storage is configured, otherwise the
+    in-memory result (saving the PDF to REPORTS_DIR).
+
+    Raises:
+        AnalysisNotFound: no stored analysis_data for this analysis
+        RuntimeError: rendering or upload failed
+    """
+    supa = _get_supabase_client()
+    if supa:
+        row = await asyncio.to_thread(_load_by_analysis_id, supa, analysis_id)
+        if row and isinstance(row.get("analysis_data"), dict):
+            return await _regenerate_row(supa, row)
+
+    result = (analysis_status_store.get(analysis_id) or {}).get("result") or {}
+    analysis_data = result.get("analysis_data")
+    if not isinstance(analysis_data, dict):
+        raise AnalysisNotFound(f"No stored analysis data for {analysis_id}")
+
+    branding = await branding_service.for_tenant(result.get("tenant_id"))
+    report = await report_service.render(analysis_data, refresh=True, branding=branding)
+    if not report.success:
+        raise RuntimeError(f"Report generation failed: {report.error}")
+
+    report_path = report_service.save_report(report, settings.REPORTS_DIR)
+    _update_in_memory(analysis_id, {"report_path": report_path, "report_size_bytes": report.size_bytes, "report_status": "ready"})
+    logger.info(f"📄 Regenerated report for {analysis_id}: {report_path}")
+    return {"analysis_id": analysis_id, "report_path": report_path, "size_bytes": report.size_bytes}
+
+
+async def regenerate_reports(
+    tenant_id: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Re-render and re-upload every stored report, a page at a time.
+
+    At most `concurrency` reports render at once (default: the render pool's
+    worker count), so a bulk run never queues past the pool.
+
+    Raises:
+        RuntimeError: Supabase is not configured
+    """
+    supa = _get_supabase_client()
+    if not supa:
+        raise RuntimeError("Supabase is not configured")
+
+    semaphore = asyncio.Semaphore(max(1, concurrency or settings.REPORT_RENDER_WORKERS))
+    regenerated = 0
+    failed: List[str] = []
+    total = 0
+
+    async def regenerate(row: Dict[str, Any]):
+        nonlocal regenerated
+        async with semaphore:
+            try:
+                await _regenerate_row(supa, row)
+                regenerated += 1
+            except Exception as e:
+                logger.warning(f"   Failed to regenerate report for policy {row['id']}: {e}")
+                failed.append(row["id"])
+
+    start = 0
+    while True:
+        page = await asyncio.to_thread(_load_page, supa, tenant_id, start, PAGE_SIZE)
+        rows = [row for row in page if isinstance(row.get("analysis_data"), dict)]
+        total += len(rows)
+        if not dry_run:
+            await asyncio.gather(*(regenerate(row) for row in rows))
+        if len(page) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+
+    logger.info(f"📄 Report regeneration {'dry run' if dry_run else 'complete'}: {regenerated}/{total} regenerated, {len(failed)} failed")
+    return {"total": total, "regenerated": regenerated, "failed": failed, "dry_run": dry_run}
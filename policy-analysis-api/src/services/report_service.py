@@ -0,0 +1,113 @@
+"""
+Report Service
+Rendered-report cache in front of the report generator
+
+Reports are keyed by a hash of analysis_data, the tenant's branding and
+TEMPLATE_VERSION, so a report is rendered at most once per distinct
+analysis, branding and layout: repeat
+downloads, background renders and lazily requested reports all share the
+cached PDF. Concurrent requests for the same key share a single render.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from dataclasses import asdict, replace
+from typing import Any, Dict, Optional
+
+from config import settings
+from services.report_generator import TEMPLATE_VERSION, ReportBranding, ReportResult, generator
+
+logger = logging.getLogger(__name__)
+
+
+def report_cache_key(analysis_data: Dict[str, Any], branding: Optional[ReportBranding] = None) -> str:
+    """Stable hash of the analysis content, the branding and the report template version"""
+    canonical = json.dumps(analysis_data, sort_keys=True, separators=(",", ":"), default=str)
+    brand = json.dumps(asdict(branding), sort_keys=True) if branding else ""
+    return hashlib.sha256(f"{TEMPLATE_VERSION}:{brand}:{canonical}".encode("utf-8")).hexdigest()
+
+
+class ReportService:
+    """
+    Renders reports through the generator, caching the PDF bytes.
+
+    The cache is an in-process LRU bounded by total PDF size.
+    """
+
+    def __init__(self, max_bytes: int = settings.REPORT_CACHE_MAX_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._cache: "OrderedDict[str, ReportResult]" = OrderedDict()
+        self._cached_bytes = 0
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def cached(self, key: str) -> Optional[ReportResult]:
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+        return result
+
+    def _store(self, key: str, result: ReportResult) -> None:
+        previous = self._cache.pop(key, None)
+        if previous is not None:
+            self._cached_bytes -= previous.size_bytes
+        if result.size_bytes > self.max_bytes:
+            return
+        self._cache[key] = result
+        self._cached_bytes += result.size_bytes
+        while self._cached_bytes > self.max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= evicted.size_bytes
+
+    async def render(
+        self,
+        analysis_data: Dict[str, Any],
+        refresh: bool = False,
+        branding: Optional[ReportBranding] = None,
+        cache: bool = True,
+    ) -> ReportResult:
+        """
+        Rendered report for analysis_data, from cache when possible.
+
+        Returns an in-memory ReportResult (no local file); failures are
+        returned, not cached. refresh=True skips the cache and replaces
+        the cached render. cache=False still reuses a cached render but
+        doesn't store a new one (bulk exports).
+        """
+        key = report_cache_key(analysis_data, branding)
+        result = None if refresh else self.cached(key)
+        if result is not None:
+            logger.info(f"📄 Report cache hit ({key[:12]})")
+            return result
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await generator.generate_report(analysis_data=analysis_data, output_dir=None, branding=branding)
+            if result.success and cache:
+                self._store(key, result)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when no one else is waiting
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def save_report(self, result: ReportResult, output_dir: str) -> str:
+        """Write a rendered report to disk, leaving the cached result untouched"""
+        return generator.save_report(replace(result), output_dir)
+
+
+# Module-level instance
+report_service = ReportService()
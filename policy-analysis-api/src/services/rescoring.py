@@ -0,0 +1,277 @@
+"""
+Rescoring Service
+Re-applies methodology changes (dimension weights, maturity-level
+thresholds) to stored analyses without new LLM calls
+
+Stored maturity dimension scores are gathered into one (policies × 5)
+matrix, so a new weighting is a single vectorized pass over a batch of
+analyses. Overall scores and maturity levels are written back into each
+analysis_data and, for stored analyses, to insurance_policies. Stored
+analyses are rescored and written back a page at a time.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.analysis_schema import MATURITY_LEVELS
+from services.orchestrator import _get_supabase_client
+from services.scoring_engine import DIMENSION_NAMES, DIMENSION_WEIGHTS, _mapping, _writable_key_metrics
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per Supabase page and concurrent row updates on write-back
+PAGE_SIZE = 500
+WRITE_CONCURRENCY = 8
+
+
+@dataclass
+class RescoreResult:
+    """Outcome of rescoring a batch of analyses"""
+    total: int = 0
+    rescored: int = 0  # Had dimension scores to recompute from
+    changed: int = 0  # Overall score or maturity level differs from before
+    skipped: int = 0  # No usable dimension scores
+    weights: Dict[str, float] = field(default_factory=dict)
+    levels: List[Tuple[float, str]] = field(default_factory=list)
+    changed_indexes: List[int] = field(default_factory=list)
+    new_scores: List[Optional[float]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "rescored": self.rescored,
+            "changed": self.changed,
+            "skipped": self.skipped,
+            "weights": self.weights,
+            "levels": [{"min_score": t, "level": name} for t, name in self.levels],
+        }
+
+
+def _resolve_weights(weights: Optional[Dict[str, float]]) -> np.ndarray:
+    """Methodology weights with any overrides applied, in DIMENSION_NAMES order"""
+    resolved = DIMENSION_WEIGHTS.copy()
+    for name, weight in (weights or {}).items():
+        if name not in DIMENSION_NAMES:
+            raise ValueError(f"Unknown maturity dimension: {name}")
+        if weight < 0:
+            raise ValueError(f"Weight for {name} must be non-negative")
+        resolved[DIMENSION_NAMES.index(name)] = weight
+    return resolved
+
+
+def levels_with_overrides(overrides: Dict[str, float]) -> List[Tuple[float, str]]:
+    """MATURITY_LEVELS with the given level → minimum score overrides applied"""
+    known = {name for _, name in MATURITY_LEVELS}
+    unknown = set(overrides) - known
+    if unknown:
+        raise ValueError(f"Unknown maturity level(s): {', '.join(sorted(unknown))}")
+    return [(overrides.get(name, threshold), name) for threshold, name in MATURITY_LEVELS]
+
+
+def _resolve_levels(levels: Optional[Sequence[Tuple[float, str]]]) -> List[Tuple[float, str]]:
+    """Maturity thresholds, highest first (same shape as MATURITY_LEVELS)"""
+    resolved = sorted(levels or MATURITY_LEVELS, key=lambda level: level[0], reverse=True)
+    if len({t for t, _ in resolved}) != len(resolved):
+        raise ValueError("Maturity level thresholds must be distinct")
+    return resolved
+
+
+def _dimension_matrix(analyses: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(policies × dimensions) score matrix and current overall scores, NaN where missing"""
+    scores = np.full((len(analyses), len(DIMENSION_NAMES)), np.nan)
+    current = np.full(len(analyses), np.nan)
+    for row, analysis in enumerate(analyses):
+        dims = analysis.get("maturity_dimensions")
+        if isinstance(dims, dict):
+            for col, name in enumerate(DIMENSION_NAMES):
+                dim = dims.get(name)
+                score = dim.get("score") if isinstance(dim, dict) else None
+                if isinstance(score, (int, float)) and not isinstance(score, bool):
+                    scores[row, col] = score
+        key_metrics = _mapping(_mapping(analysis.get("executive_summary")).get("key_metrics"))
+        overall = key_metrics.get("overall_maturity_score")
+        if isinstance(overall, (int, float)) and not isinstance(overall, bool):
+            current[row] = overall
+    return scores, current
+
+
+def rescore_analyses(
+    analyses: Sequence[Dict[str, Any]],
+    weights: Optional[Dict[str, float]] = None,
+    levels: Optional[Sequence[Tuple[float, str]]] = None,
+) -> RescoreResult:
+    """
+    Recompute overall maturity scores and levels for many analyses at once.
+
+    Updates each analysis_data in place (dimension weights, key_metrics
+    overall score and maturity level, _metadata.rescored_at). Analyses
+    without any numeric dimension score are left untouched.
+
+    Args:
+        analyses: Stored analysis_data dicts
+        weights: Dimension weight overrides (default: methodology weights)
+        levels: (min_score, level) thresholds (default: MATURITY_LEVELS)
+
+    Returns:
+        RescoreResult with counts and the indexes whose score or level changed
+    """
+    weight_vector = _resolve_weights(weights)
+    resolved_levels = _resolve_levels(levels)
+    result = RescoreResult(
+        total=len(analyses),
+        weights={name: float(w) for name, w in zip(DIMENSION_NAMES, weight_vector)},
+        levels=resolved_levels,
+    )
+    if not analyses:
+        return result
+
+    scores, current = _dimension_matrix(analyses)
+
+    # Weighted mean over the dimensions each analysis actually has
+    valid = ~np.isnan(scores)
+    weight_totals = (valid * weight_vector).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        overall = np.where(
+            weight_totals > 0,
+            np.round(np.nansum(scores * weight_vector, axis=1) / weight_totals, 1),
+            np.nan,
+        )
+
+    # Maturity level via one digitize against the ascending thresholds
+    ascending = resolved_levels[::-1]
+    bins = np.array([threshold for threshold, _ in ascending])
+    names = ["Initial"] + [name for _, name in ascending]
+    level_index = np.digitize(np.nan_to_num(overall, nan=-1.0), bins)
+
+    rescored = ~np.isnan(overall)
+    result.rescored = int(rescored.sum())
+    result.skipped = result.total - result.rescored
+    result.new_scores = [None if np.isnan(v) else float(v) for v in overall]
+
+    rescored_at = datetime.utcnow().isoformat()
+    for row in np.flatnonzero(rescored):
+        analysis = analyses[row]
+        new_score = float(overall[row])
+        new_level = names[level_index[row]]
+
+        key_metrics = _writable_key_metrics(analysis)
+        if current[row] != new_score or key_metrics.get("maturity_level") != new_level:
+            result.changed_indexes.append(int(row))
+        key_metrics["overall_maturity_score"] = new_score
+        key_metrics["maturity_level"] = new_level
+
+        for col, name in enumerate(DIMENSION_NAMES):
+            dim = analysis["maturity_dimensions"].get(name)
+            if isinstance(dim, dict):
+                dim["weight"] = float(weight_vector[col])
+
+        metadata = analysis.get("_metadata")
+        if not isinstance(metadata, dict):
+            metadata = analysis["_metadata"] = {}
+        metadata["rescored_at"] = rescored_at
+
+    result.changed = len(result.changed_indexes)
+    logger.info(
+        f"🔁 Rescored {result.rescored}/{result.total} analyses "
+        f"({result.changed} changed, {result.skipped} skipped)"
+    )
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Stored analyses (Supabase insurance_policies)
+# ---------------------------------------------------------------------------
+
+def _load_page(supa, tenant_id: Optional[str], start: int, page_size: int) -> List[Dict[str, Any]]:
+    """One page of id + analysis_data for analyzed policies"""
+    query = supa.table("insurance_policies") \
+        .select("id, analysis_data") \
+        .not_.is_("analysis_data", "null")
+    if tenant_id:
+        query = query.eq("tenant_id", tenant_id)
+    return query.order("id").range(start, start + page_size - 1).execute().data or []
+
+
+def _write_row(supa, policy_id: str, analysis_data: Dict[str, Any], score: Optional[float]) -> None:
+    supa.table("insurance_policies") \
+        .update({
+            "analysis_data": analysis_data,
+            "analysis_score": score,
+            "updated_at": datetime.utcnow().isoformat(),
+        }) \
+        .eq("id", policy_id) \
+        .execute()
+
+
+async def rescore_stored_analyses(
+    weights: Optional[Dict[str, float]] = None,
+    levels: Optional[Sequence[Tuple[float, str]]] = None,
+    tenant_id: Optional[str] = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Rescore every stored analysis and write changed scores back.
+
+    Rows are read, rescored and written back PAGE_SIZE at a time, so
+    memory stays bounded by one page. Only rows whose overall score or
+    maturity level changed are written. Writes are per-row updates
+    (insurance_policies has NOT NULL columns a partial upsert would
+    violate), run concurrently off the event loop.
+
+    Raises:
+        RuntimeError: Supabase is not configured
+    """
+    supa = _get_supabase_client()
+    if not supa:
+        raise RuntimeError("Supabase is not configured")
+
+    summary = rescore_analyses([], weights=weights, levels=levels)  # Rejects bad overrides before any reads
+    semaphore = asyncio.Semaphore(WRITE_CONCURRENCY)
+    written = 0
+    failed: List[str] = []
+    changed_policy_ids: List[str] = []
+
+    async def write(policy_id: str, analysis_data: Dict[str, Any], score: Optional[float]):
+        nonlocal written
+        async with semaphore:
+            try:
+                await asyncio.to_thread(_write_row, supa, policy_id, analysis_data, score)
+                written += 1
+            except Exception as e:
+                logger.warning(f"   Failed to write rescored analysis for policy {policy_id}: {e}")
+                failed.append(policy_id)
+
+    start = 0
+    while True:
+        page = await asyncio.to_thread(_load_page, supa, tenant_id, start, PAGE_SIZE)
+        rows = [row for row in page if isinstance(row.get("analysis_data"), dict)]
+        analyses = [row["analysis_data"] for row in rows]
+        result = rescore_analyses(analyses, weights=weights, levels=levels)
+
+        summary.total += result.total
+        summary.rescored += result.rescored
+        summary.skipped += result.skipped
+        summary.changed += result.changed
+        changed_policy_ids.extend(rows[i]["id"] for i in result.changed_indexes)
+        if not dry_run:
+            await asyncio.gather(*(
+                write(rows[i]["id"], analyses[i], result.new_scores[i]) for i in result.changed_indexes
+            ))
+
+        if len(page) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+
+    logger.info(f"🔁 Rescore {'dry run' if dry_run else 'complete'}: {written} rows written, {len(failed)} failed")
+    return {
+        **summary.to_dict(),
+        "dry_run": dry_run,
+        "written": written,
+        "failed": failed,
+        "changed_policy_ids": changed_policy_ids,
+    }
@@ -0,0 +1,269 @@
+"""
+Local Scoring Engine
+Deterministic, NumPy-vectorized maturity scoring for Phase 2 output
+
+In local scoring mode Claude emits only the factor-level facts for each
+coverage item (the five rubric factors in SCORING_METHODOLOGY). This engine
+turns them into item scores, the five maturity dimensions, the weighted
+overall score and the maturity level, so the scores are reproducible and
+Phase 2 does not spend output tokens on arithmetic.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.analysis_schema import maturity_level_for
+
+logger = logging.getLogger(__name__)
+
+SCORING_ENGINE_VERSION = "1.0"
+
+# 5-factor rubric: factor name → maximum points (sums to 10)
+FACTOR_NAMES = ("sublimit_adequacy", "scope", "exclusions_impact", "prior_acts", "conditions")
+FACTOR_MAX = np.array([2.0, 3.0, 2.0, 1.5, 1.5])
+
+# 5-dimension weights from SCORING_METHODOLOGY
+DIMENSION_NAMES = ("coverage_breadth", "coverage_depth", "policy_structure", "risk_management", "financial_strength")
+DIMENSION_WEIGHTS = np.array([1.5, 1.3, 1.0, 1.2, 1.1])
+
+# Factor mix (normalized factor means) for the factor-derived dimensions.
+# Rows: coverage_depth, policy_structure, risk_management; columns: FACTOR_NAMES.
+FACTOR_DIMENSION_MIX = np.array([
+    [0.6, 0.4, 0.0, 0.0, 0.0],  # Depth: sublimits and scope
+    [0.0, 0.0, 0.0, 0.5, 0.5],  # Structure: prior acts and conditions
+    [0.0, 0.0, 0.6, 0.0, 0.4],  # Risk management: exclusions and conditions
+])
+
+# A.M. Best rating → financial strength score (0-10)
+RATING_SCORES = {
+    "A++": 10.0, "A+": 9.5, "A": 9.0, "A-": 8.0,
+    "B++": 6.5, "B+": 6.0, "B": 5.0, "B-": 4.5,
+    "C++": 3.0, "C+": 3.0, "C": 2.0, "C-": 2.0,
+}
+_RATING = re.compile(r"(?<![A-Za-z])([ABC](?:\+\+|\+|-)?)(?![A-Za-z+\-])")
+
+
+@dataclass
+class CarrierScores:
+    """Computed scores for one carrier"""
+    overall_score: Optional[float]
+    maturity_level: Optional[str]
+    dimensions: Dict[str, Optional[float]]
+
+
+@dataclass
+class ScoringResult:
+    """Result of scoring one analysis"""
+    items_scored: int = 0  # Carrier values scored from factors
+    items_unscored: int = 0  # Carrier values without factors (Claude's score kept)
+    primary_carrier: Optional[str] = None
+    carriers: Dict[str, CarrierScores] = field(default_factory=dict)
+
+
+def _rating_score(rating: Any) -> float:
+    """Financial strength score from a rating string, NaN if none is recognizable"""
+    if not isinstance(rating, str):
+        return np.nan
+    match = _RATING.search(rating)
+    return RATING_SCORES.get(match.group(1), np.nan) if match else np.nan
+
+
+def _number(value: Any) -> float:
+    """Float value of a factor or score, NaN if missing or non-numeric"""
+    if isinstance(value, bool) or value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _mapping(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+def _writable_key_metrics(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    executive_summary.key_metrics, ready to write scores into.
+
+    Salvaged or repaired output can leave either as a string or list; a
+    string summary is kept as the overview, anything else is replaced.
+    """
+    exec_summary = analysis_data.get("executive_summary")
+    if not isinstance(exec_summary, dict):
+        exec_summary = analysis_data["executive_summary"] = {"overview": exec_summary} if isinstance(exec_summary, str) else {}
+    metrics = exec_summary.get("key_metrics")
+    if not isinstance(metrics, dict):
+        metrics = exec_summary["key_metrics"] = {}
+    return metrics
+
+
+def _round(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 1)
+
+
+class ScoringEngine:
+    """
+    Computes maturity scores from factor-level facts.
+
+    All carrier values across all sections are gathered into one
+    (entries × factors) matrix, so scoring an analysis is a handful of
+    array operations regardless of how many items it has.
+    """
+
+    def _collect(self, analysis_data: Dict[str, Any]) -> Tuple[List[str], List[Dict[str, Any]], np.ndarray, np.ndarray, np.ndarray]:
+        """Gather every carrier value into (carriers, entries, carrier index, factors, reported scores)"""
+        carriers: List[str] = [c for c in analysis_data.get("carriers") or [] if isinstance(c, str)]
+        entries: List[Dict[str, Any]] = []
+        carrier_index: List[int] = []
+        factor_rows: List[List[float]] = []
+        reported: List[float] = []
+
+        for section in analysis_data.get("sections") or []:
+            items = section.get("items") if isinstance(section, dict) else None
+            for item in items if isinstance(items, list) else []:
+                carrier_values = item.get("carrier_values") if isinstance(item, dict) else None
+                if not isinstance(carrier_values, dict):
+                    continue
+                for carrier, value in carrier_values.items():
+                    if not isinstance(value, dict):
+                        continue
+                    if carrier not in carriers:
+                        carriers.append(carrier)
+                    factors = value.get("factors")
+                    if isinstance(factors, dict):
+                        factor_rows.append([_number(factors.get(name)) for name in FACTOR_NAMES])
+                    else:
+                        factor_rows.append([np.nan] * len(FACTOR_NAMES))
+                    entries.append(value)
+                    carrier_index.append(carriers.index(carrier))
+                    reported.append(_number(value.get("maturity_score")))
+
+        factors = np.array(factor_rows, dtype=float).reshape(-1, len(FACTOR_NAMES))
+        return carriers, entries, np.array(carrier_index, dtype=int), factors, np.array(reported, dtype=float)
+
+    def score(self, analysis_data: Dict[str, Any]) -> ScoringResult:
+        """
+        Score an analysis in place.
+
+        Writes maturity_score on every carrier value that has factors, the
+        primary carrier's maturity_dimensions, and the overall score and
+        maturity level in executive_summary.key_metrics. Per-carrier results
+        are recorded in analysis_data["_scoring"].
+        """
+        carriers, entries, carrier_index, factors, reported = self._collect(analysis_data)
+        result = ScoringResult()
+        if not entries:
+            return result
+
+        n_carriers = len(carriers)
+        has_factors = ~np.isnan(factors).all(axis=1)
+
+        # Item scores: missing factors count as 0 ("not mentioned"), points
+        # clipped to each factor's range and snapped to the 0.5-point rubric grid
+        points = np.clip(np.nan_to_num(factors, nan=0.0), 0.0, FACTOR_MAX)
+        points = np.round(points * 2) / 2
+        item_scores = np.where(has_factors, points.sum(axis=1), reported)
+
+        # Coverage breadth: share of scored items with any coverage, per carrier
+        scored = ~np.isnan(item_scores)
+        totals = np.bincount(carrier_index[scored], minlength=n_carriers)
+        covered = np.bincount(carrier_index[scored & (item_scores > 0)], minlength=n_carriers)
+        # Primary carrier: first listed carrier that actually has scored items
+        primary_index = int(np.argmax(totals > 0))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            breadth = np.where(totals > 0, 10.0 * covered / totals, np.nan)
+
+            # Factor-derived dimensions from per-carrier normalized factor means
+            counts = np.bincount(carrier_index[has_factors], minlength=n_carriers)
+            normalized = points[has_factors] / FACTOR_MAX
+            sums = np.stack([
+                np.bincount(carrier_index[has_factors], weights=normalized[:, k], minlength=n_carriers)
+                for k in range(len(FACTOR_NAMES))
+            ], axis=1)
+            means = np.where(counts[:, None] > 0, sums / counts[:, None], np.nan)
+        derived = 10.0 * means @ FACTOR_DIMENSION_MIX.T  # (carriers × 3)
+
+        # Financial strength from the carrier rating, else Claude's dimension score
+        program_details = _mapping(analysis_data.get("program_details"))
+        financial = np.array([
+            _rating_score(_mapping(program_details.get(carrier)).get("financial_rating"))
+            for carrier in carriers
+        ])
+        if np.isnan(financial[primary_index]):
+            key_metrics = _mapping(_mapping(analysis_data.get("executive_summary")).get("key_metrics"))
+            financial[primary_index] = _rating_score(key_metrics.get("primary_carrier_rating"))
+        if np.isnan(financial[primary_index]):
+            reported_dims = _mapping(analysis_data.get("maturity_dimensions"))
+            financial[primary_index] = _number(_mapping(reported_dims.get("financial_strength")).get("score"))
+
+        dimensions = np.column_stack([breadth, derived, financial])  # (carriers × 5)
+
+        # Weighted overall score, ignoring dimensions that could not be computed
+        valid = ~np.isnan(dimensions)
+        weight_totals = (valid * DIMENSION_WEIGHTS).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            overall = np.where(weight_totals > 0, np.nansum(dimensions * DIMENSION_WEIGHTS, axis=1) / weight_totals, np.nan)
+
+        # Write back
+        for entry, score, factored in zip(entries, item_scores, has_factors):
+            if factored:
+                entry["maturity_score"] = _round(score)
+
+        for c, carrier in enumerate(carriers):
+            overall_score = _round(overall[c])
+            result.carriers[carrier] = CarrierScores(
+                overall_score=overall_score,
+                maturity_level=maturity_level_for(overall_score) if overall_score is not None else None,
+                dimensions={name: _round(dimensions[c, d]) for d, name in enumerate(DIMENSION_NAMES)},
+            )
+
+        result.items_scored = int(has_factors.sum())
+        result.items_unscored = int((~has_factors).sum())
+        result.primary_carrier = carriers[primary_index]
+        primary = result.carriers[result.primary_carrier]
+
+        dims_out = analysis_data.setdefault("maturity_dimensions", {})
+        if not isinstance(dims_out, dict):
+            dims_out = analysis_data["maturity_dimensions"] = {}
+        for d, name in enumerate(DIMENSION_NAMES):
+            dim = dims_out.get(name)
+            if not isinstance(dim, dict):
+                dim = dims_out[name] = {}
+            dim["score"] = primary.dimensions[name]
+            dim["weight"] = float(DIMENSION_WEIGHTS[d])
+
+        if primary.overall_score is not None:
+            metrics = _writable_key_metrics(analysis_data)
+            metrics["overall_maturity_score"] = primary.overall_score
+            metrics["maturity_level"] = primary.maturity_level
+
+        analysis_data["_scoring"] = {
+            "engine": "local",
+            "version": SCORING_ENGINE_VERSION,
+            "items_scored": result.items_scored,
+            "items_unscored": result.items_unscored,
+            "primary_carrier": result.primary_carrier,
+            "carriers": {
+                carrier: {
+                    "overall_score": scores.overall_score,
+                    "maturity_level": scores.maturity_level,
+                    "dimensions": scores.dimensions,
+                }
+                for carrier, scores in result.carriers.items()
+            },
+        }
+
+        logger.info(
+            f"🧮 Local scoring: {result.items_scored} items scored from factors, "
+            f"overall {primary.overall_score} ({primary.maturity_level})"
+        )
+        return result
+
+
+# Module-level instance
+scoring_engine = ScoringEngine()
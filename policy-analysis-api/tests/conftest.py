@@ -4,6 +4,7 @@ Shared test fixtures for the Policy Analysis API test suite.
 
 import os
 import sys
+import tempfile
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 
@@ -16,6 +17,7 @@ os.environ["ANTHROPIC_API_KEY"] = "test-key"
 os.environ["WEBHOOK_SECRET"] = "test-webhook-secret-for-hmac-signing"
 os.environ["SUPABASE_URL"] = ""
 os.environ["SUPABASE_SERVICE_KEY"] = ""
+os.environ["JOB_QUEUE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="policy-jobs-"), "jobs.sqlite3")
 
 
 @pytest.fixture
@@ -79,7 +81,17 @@ def sample_analysis_result(sample_analysis_data):
     mock = MagicMock()
     mock.success = True
     mock.analysis_data = sample_analysis_data
-    mock.tokens_used = {"input": 5000, "output": 3000}
+    mock.tokens_used = 8000
+    mock.usage = {
+        "total_tokens": 8000,
+        "input_tokens": 5000,
+        "output_tokens": 3000,
+        "phases": {
+            "extraction": {"model": "claude-haiku-4-5-20251001", "total_tokens": 3000, "stop_reason": "end_turn"},
+            "analysis": {"model": "claude-sonnet-4-20250514", "total_tokens": 5000, "stop_reason": "end_turn"},
+        },
+    }
+    mock.summary = None
     mock.error = None
     return mock
 
@@ -0,0 +1,85 @@
+"""
+Tests for tenant branding — per-tenant report branding with an LRU cache.
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from services.branding import DEFAULT_BRANDING, BrandingService, branding_from_tenant
+from services.report_generator import compile_template, generator
+from services.report_service import report_cache_key
+
+
+def _tenant(tenant_id, branding=None, name="Acme Brokers"):
+    return {"id": tenant_id, "name": name, "settings": {"branding": branding} if branding is not None else {}}
+
+
+def _supabase(tenants):
+    supa = MagicMock()
+
+    def select_tenant(column, tenant_id):
+        query = MagicMock()
+        query.limit.return_value.execute.return_value.data = [t for t in tenants if t["id"] == tenant_id]
+        return query
+
+    supa.table.return_value.select.return_value.eq.side_effect = select_tenant
+    return supa
+
+
+class TestBrandingFromTenant:
+    def test_tenant_without_branding_uses_default(self):
+        assert branding_from_tenant(_tenant("t1")) is DEFAULT_BRANDING
+
+    def test_branding_block_with_fallbacks(self):
+        branding = branding_from_tenant(_tenant("t1", {"accent_color": "#FF6600", "primary_color": "navy"}))
+
+        assert branding.company_name == "Acme Brokers"  # Tenant name
+        assert branding.accent_color == "#FF6600"
+        assert branding.primary_color == DEFAULT_BRANDING.primary_color  # Invalid color ignored
+
+
+@pytest.mark.asyncio
+class TestBrandingService:
+    async def test_tenant_branding_loaded_once_and_evicted_lru(self):
+        tenants = [_tenant(f"t{n}", {"company_name": f"Broker {n}"}) for n in range(3)]
+        supa = _supabase(tenants)
+        service = BrandingService(max_tenants=2, ttl_seconds=300)
+
+        with patch("services.orchestrator._get_supabase_client", return_value=supa):
+            first = await service.for_tenant("t0")
+            assert await service.for_tenant("t0") is first
+            assert supa.table.call_count == 1
+
+            await service.for_tenant("t1")
+            await service.for_tenant("t2")  # Evicts t0
+            await service.for_tenant("t0")
+
+        assert first.company_name == "Broker 0"
+        assert supa.table.call_count == 4
+
+    async def test_lookup_failure_falls_back_to_default(self):
+        supa = MagicMock()
+        supa.table.side_effect = RuntimeError("connection refused")
+        with patch("services.orchestrator._get_supabase_client", return_value=supa):
+            assert await BrandingService().for_tenant("t1") is DEFAULT_BRANDING
+
+    async def test_no_tenant_is_default(self):
+        assert await BrandingService().for_tenant(None) is DEFAULT_BRANDING
+
+
+class TestTenantTemplates:
+    def test_one_compiled_template_per_branding(self):
+        branding = branding_from_tenant(_tenant("t1", {"company_name": "Acme Brokers", "accent_color": "#FF6600"}))
+        same = branding_from_tenant(_tenant("t1", {"company_name": "Acme Brokers", "accent_color": "#FF6600"}))
+
+        assert compile_template(branding) is compile_template(same)
+        assert compile_template(branding) is not compile_template(DEFAULT_BRANDING)
+
+    def test_cache_key_includes_branding(self):
+        branding = branding_from_tenant(_tenant("t1", {"accent_color": "#FF6600"}))
+        assert report_cache_key({"a": 1}, branding) != report_cache_key({"a": 1})
+
+    @pytest.mark.parametrize("name", ["Smith & Sons <Brokers", "R&D <i>Partners"])
+    def test_markup_characters_in_company_name_render(self, name):
+        branding = branding_from_tenant(_tenant("t1", {"company_name": name}))
+        assert generator.render_pdf({"client_company": "Acme Corp"}, branding).startswith(b"%PDF")
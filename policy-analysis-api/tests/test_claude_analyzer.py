@@ -0,0 +1,508 @@
+"""
+Tests for Claude analyzer output handling — parsing, structured output, enrichment.
+"""
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from services.analysis_schema import (
+    ANALYSIS_TOOL_NAME,
+    analysis_tool_definition,
+    maturity_level_for,
+    parse_structured_output,
+    summarize_analysis,
+)
+from services.claude_analyzer import (
+    ClaudeAnalyzer,
+    HedgePolicy,
+    PhaseUsage,
+    _create_message_hedged,
+    _enrich_analysis,
+    _parse_yaml_or_json,
+    _build_analysis_request,
+    _completion_targets,
+    _validate_analysis,
+    analyze_extracted_data,
+    complete_missing_sections,
+    repair_parse_issues,
+)
+
+
+def _structured_tool_input():
+    """Minimal but complete structured Phase 2 payload"""
+    return {
+        "client_company": "Acme Corp",
+        "sections": [
+            {
+                "name": "Incident Response",
+                "category": "first_party",
+                "items": [
+                    {
+                        "name": "Crisis Management Expenses",
+                        "carrier_values": {
+                            "CNA Epack 3": {"maturity_score": "7", "value": "$1,000,000"},
+                        },
+                    },
+                ],
+            },
+        ],
+        "maturity_dimensions": {"coverage_breadth": {"score": 7, "weight": 1.5}},
+        "executive_summary": {"overview": "Solid program.", "recommendation": "BIND"},
+        "policy_summary": {"strengths": ["Worldwide territory"]},
+        "red_flags": [],
+        "recommendations": {"immediate_actions": [{"priority": 1, "item": "Raise SE sublimit"}]},
+    }
+
+
+def _mock_response(content, stop_reason="end_turn", input_tokens=1000, output_tokens=500):
+    return SimpleNamespace(
+        content=content,
+        stop_reason=stop_reason,
+        usage=SimpleNamespace(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cache_read_input_tokens=None,
+            cache_creation_input_tokens=None,
+        ),
+    )
+
+
+class _FakeStream:
+    """Stands in for the SDK's async MessageStream context manager"""
+
+    def __init__(self, message):
+        self._message = message
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __aiter__(self):
+        yield SimpleNamespace(type="message_start")
+        yield SimpleNamespace(type="content_block_delta")
+
+    async def get_final_message(self):
+        return self._message
+
+
+def _mock_client(*responses):
+    client = MagicMock()
+    client.messages.stream.side_effect = [_FakeStream(r) for r in responses]
+    return client
+
+
+class TestStructuredOutput:
+    def test_tool_definition_uses_schema(self):
+        """Tool definition should expose the analysis model's JSON schema"""
+        tool = analysis_tool_definition()
+        assert tool["name"] == ANALYSIS_TOOL_NAME
+        assert "sections" in tool["input_schema"]["properties"]
+        assert "sections" in tool["input_schema"]["required"]
+
+    def test_parse_normalizes_types(self):
+        """Validated output should coerce scores to numbers and keep only provided fields"""
+        data = parse_structured_output(_structured_tool_input())
+        carrier = data["sections"][0]["items"][0]["carrier_values"]["CNA Epack 3"]
+        assert carrier["maturity_score"] == 7.0
+        assert "notes" not in carrier
+        assert "client_industry" not in data
+
+    def test_parse_keeps_extra_fields(self):
+        """Keys outside the schema should be preserved"""
+        tool_input = _structured_tool_input()
+        tool_input["sections"][0]["items"][0]["carrier_values"]["CNA Epack 3"]["sublimit_pct"] = 50
+        data = parse_structured_output(tool_input)
+        assert data["sections"][0]["items"][0]["carrier_values"]["CNA Epack 3"]["sublimit_pct"] == 50
+
+    def test_parse_invalid_returns_raw_input(self):
+        """Schema violations should not discard the decoded analysis"""
+        tool_input = {"client_company": "Acme Corp", "sections": "not-a-list"}
+        data = parse_structured_output(tool_input)
+        assert data == tool_input
+        assert not data.get("parse_error")
+
+    @pytest.mark.asyncio
+    async def test_phase2_structured_uses_tool_call(self):
+        """Structured Phase 2 should force the tool and decode its input"""
+        client = _mock_client(_mock_response([
+            SimpleNamespace(type="tool_use", name=ANALYSIS_TOOL_NAME, input=_structured_tool_input()),
+        ]))
+
+        data, usage = await analyze_extracted_data(
+            client=client,
+            extracted_data="## DECLARATIONS\nCarrier: CNA",
+            client_name="Acme Corp",
+            structured_output=True,
+        )
+
+        kwargs = client.messages.stream.call_args.kwargs
+        assert kwargs["tool_choice"] == {"type": "tool", "name": ANALYSIS_TOOL_NAME}
+        assert data["executive_summary"]["recommendation"] == "BIND"
+        assert usage.total_tokens == 1500
+
+    @pytest.mark.asyncio
+    async def test_phase2_yaml_mode_parses_text(self):
+        """YAML mode should not send tools and should parse the text block"""
+        client = _mock_client(_mock_response([
+            SimpleNamespace(type="text", text="client_company: Acme Corp\nsections: []\n"),
+        ]))
+
+        data, _ = await analyze_extracted_data(
+            client=client,
+            extracted_data="## DECLARATIONS",
+            client_name="Acme Corp",
+            structured_output=False,
+        )
+
+        assert "tools" not in client.messages.stream.call_args.kwargs
+        assert data["client_company"] == "Acme Corp"
+
+
+@pytest.mark.asyncio
+class TestUsageInstrumentation:
+    async def test_two_phase_records_both_phases(self):
+        """Usage should include Phase 1 and Phase 2, and the total should cover both"""
+        analyzer = ClaudeAnalyzer()
+        analyzer.client = _mock_client(
+            _mock_response(
+                [SimpleNamespace(type="text", text="## DECLARATIONS\nCarrier: CNA")],
+                input_tokens=20000, output_tokens=3000,
+            ),
+            _mock_response(
+                [SimpleNamespace(type="text", text="client_company: Acme Corp\nsections: []\n")],
+                stop_reason="max_tokens", input_tokens=9000, output_tokens=16000,
+            ),
+        )
+
+        with patch("services.claude_analyzer.COMPLETION_ENABLED", False):
+            result = await analyzer.analyze_policy_two_phase(
+                policy_text="--- Page 1 ---\nPolicy text",
+                client_name="Acme Corp",
+            )
+
+        assert result.success
+        assert result.tokens_used == 48000
+        phases = result.usage["phases"]
+        assert phases["extraction"]["total_tokens"] == 23000
+        assert phases["analysis"]["stop_reason"] == "max_tokens"
+        assert phases["analysis"]["time_to_first_token_ms"] is not None
+        assert result.analysis_data["_metadata"]["token_usage"]["total_tokens"] == 48000
+
+
+class TestHedgePolicy:
+    def test_no_delay_until_min_samples(self):
+        """Hedging should stay off while the latency window is warming up"""
+        policy = HedgePolicy(percentile=95, min_samples=3)
+        policy.record(1.0)
+        policy.record(2.0)
+        assert policy.hedge_delay() is None
+
+    def test_percentile_delay(self):
+        """Delay should be the configured percentile of recent latencies"""
+        policy = HedgePolicy(percentile=90, min_samples=10)
+        for latency in range(1, 11):
+            policy.record(float(latency))
+        assert policy.hedge_delay() == 9.0
+
+    def test_window_drops_old_latencies(self):
+        """Only the most recent latencies should count"""
+        policy = HedgePolicy(percentile=100, window=2, min_samples=1)
+        for latency in (30.0, 1.0, 2.0):
+            policy.record(latency)
+        assert policy.hedge_delay() == 2.0
+
+
+@pytest.mark.asyncio
+class TestHedgedRequests:
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        """A primary call past the hedge delay should lose to a fast duplicate"""
+        policy = HedgePolicy(percentile=50, min_samples=1)
+        policy.record(0.01)
+        primary_cancelled = asyncio.Event()
+        calls = []
+
+        async def fake_create(client, phase, **request):
+            calls.append(phase)
+            if len(calls) == 1:
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    primary_cancelled.set()
+                    raise
+            return "hedge-response", PhaseUsage(phase=phase, model="haiku", latency_ms=5.0)
+
+        with patch("services.claude_analyzer._create_message", side_effect=fake_create):
+            response, usage = await _create_message_hedged(MagicMock(), "extraction", policy)
+
+        await asyncio.sleep(0)
+        assert response == "hedge-response"
+        assert usage.hedged is True
+        assert len(calls) == 2
+        assert primary_cancelled.is_set()
+        # Latency runs from the primary's start (hedged after 10 ms), not the duplicate's own 5 ms
+        assert usage.latency_ms >= 10.0
+        assert policy._latencies[-1] >= 0.01
+
+    async def test_fast_primary_is_not_hedged(self):
+        """Calls finishing within the hedge delay should not be duplicated"""
+        policy = HedgePolicy(percentile=50, min_samples=1)
+        policy.record(5.0)
+
+        fake_create = AsyncMock(return_value=("primary", PhaseUsage(phase="extraction", model="haiku", latency_ms=10.0)))
+        with patch("services.claude_analyzer._create_message", fake_create):
+            response, usage = await _create_message_hedged(MagicMock(), "extraction", policy)
+
+        assert response == "primary"
+        assert usage.hedged is False
+        assert fake_create.await_count == 1
+
+
+MALFORMED_OUTPUT = """client_company: "Acme Corp"
+executive_summary:
+  overview: "Solid program with gaps."
+  recommendation: "BIND WITH CONDITIONS"
+sections:
+  - name: "Incident Response"
+    items:
+      - name: "Crisis Management"
+        carrier_values:
+          "CNA":
+            maturity_score: 7
+  - name: "Business Interruption"
+    items:
+      - name: "BI Loss"
+        notes: "Waiting period: "8 hours" applies"
+  - name: "Cyber Crime"
+    items: []
+red_flags:
+  - flag: "Defense costs within limits"
+    severity: HIGH
+policy_summary: {strengths: [unterminated
+recommendations:
+  immediate_actions: []
+"""
+
+
+class TestSalvageParsing:
+    def test_salvages_unbroken_fragments(self):
+        """Only the malformed list item and key should be dropped"""
+        data = _parse_yaml_or_json(MALFORMED_OUTPUT)
+
+        assert not data.get("parse_error")
+        assert data["client_company"] == "Acme Corp"
+        assert [s["name"] for s in data["sections"]] == ["Incident Response", "Cyber Crime"]
+        assert data["red_flags"][0]["severity"] == "HIGH"
+        assert "policy_summary" not in data
+        assert [i["path"] for i in data["_parse_issues"]] == ["sections[1]", "policy_summary"]
+        assert "BI Loss" in data["_parse_issues"][0]["fragment"]
+
+    def test_validation_reports_broken_fragments(self):
+        """Validation should name each fragment that could not be parsed"""
+        warnings = _validate_analysis(_parse_yaml_or_json(MALFORMED_OUTPUT))["warnings"]
+
+        assert any("sections[1]" in w for w in warnings)
+        assert any("policy_summary" in w and "Unparseable" in w for w in warnings)
+
+    def test_mapping_values_are_not_split_as_lists(self):
+        """A broken mapping with nested lists should be reported whole, not turned into a list"""
+        data = _parse_yaml_or_json('client_company: Acme\nexecutive_summary:\n  overview: "bad "quote""\n  critical_action_items:\n    - one\n')
+        assert "executive_summary" not in data
+        assert data["_parse_issues"][0]["path"] == "executive_summary"
+
+    def test_unrecoverable_output_returns_stub(self):
+        """Output with no parseable keys should still produce the MANUAL REVIEW stub"""
+        data = _parse_yaml_or_json("I'm sorry, I can't produce that analysis.")
+        assert data["parse_error"] is True
+
+
+def _text_response(text, input_tokens=300, output_tokens=200):
+    return _mock_response([SimpleNamespace(type="text", text=text)], input_tokens=input_tokens, output_tokens=output_tokens)
+
+
+@pytest.mark.asyncio
+class TestFragmentRepair:
+    async def test_repaired_fragments_are_spliced_in_place(self):
+        """Repaired list items go back at their index and keys are restored"""
+        data = _parse_yaml_or_json(MALFORMED_OUTPUT)
+        client = _mock_client(
+            _text_response('- name: "Business Interruption"\n  items:\n    - name: "BI Loss"\n      notes: "Waiting period: 8 hours applies"\n'),
+            _text_response("policy_summary:\n  strengths: [unterminated]\n"),
+        )
+
+        data, usage = await repair_parse_issues(client, data)
+
+        assert [s["name"] for s in data["sections"]] == ["Incident Response", "Business Interruption", "Cyber Crime"]
+        assert data["policy_summary"]["strengths"] == ["unterminated"]
+        assert "_parse_issues" not in data
+        assert data["_repaired_fragments"] == ["sections[1]", "policy_summary"]
+        assert usage.phase == "repair"
+        assert usage.total_tokens == 1000
+
+        request = client.messages.stream.call_args_list[0].kwargs
+        assert "BI Loss" in request["messages"][0]["content"]
+        assert "Incident Response" not in request["messages"][0]["content"]
+
+    async def test_failed_repair_keeps_issue(self):
+        """A repair that is still unparseable should leave the issue for validation"""
+        data = _parse_yaml_or_json(MALFORMED_OUTPUT)
+        client = _mock_client(
+            _text_response('- name: "still "broken""'),
+            _text_response("policy_summary:\n  strengths: []\n"),
+        )
+
+        data, _ = await repair_parse_issues(client, data)
+
+        assert [i["path"] for i in data["_parse_issues"]] == ["sections[1]"]
+        assert [s["name"] for s in data["sections"]] == ["Incident Response", "Cyber Crime"]
+        assert data["policy_summary"] == {"strengths": []}
+
+    async def test_two_phase_records_repair_usage(self):
+        """The two-phase pipeline should repair before enrichment and count the repair tokens"""
+        analyzer = ClaudeAnalyzer()
+        analyzer.client = _mock_client(
+            _text_response("## DECLARATIONS", input_tokens=1000, output_tokens=1000),
+            _text_response('client_company: Acme Corp\nsections: []\nred_flags:\n  - flag: "bad "quote""\n'),
+            _text_response('- flag: "bad quote"\n'),
+        )
+
+        with patch("services.claude_analyzer.COMPLETION_ENABLED", False):
+            result = await analyzer.analyze_policy_two_phase(policy_text="Policy text", client_name="Acme Corp")
+
+        assert result.analysis_data["red_flags"] == [{"flag": "bad quote"}]
+        assert set(result.usage["phases"]) == {"extraction", "analysis", "repair"}
+        assert result.usage["phases"]["repair"]["model"] == result.usage["extraction_model"]
+
+
+class TestAnalysisSummary:
+    def test_single_pass_counts_and_scores(self):
+        """Summary should compute the weighted score, level and scored-item counts"""
+        data = _structured_tool_input()
+        data["maturity_dimensions"] = {
+            "coverage_breadth": {"score": 8, "weight": 1.5},
+            "coverage_depth": {"score": 6, "weight": 0.5},
+            "policy_structure": "not scored",
+        }
+        data["executive_summary"]["overview"] = ""
+
+        summary = summarize_analysis(data)
+
+        assert summary.computed_score == 7.5
+        assert summary.overall_score == 7.5
+        assert summary.maturity_level == "Managed"
+        assert summary.dimension_scores == {"coverage_breadth": 8.0, "coverage_depth": 6.0}
+        assert (summary.section_count, summary.item_count, summary.scored_items) == (1, 1, 1)
+        assert "Missing executive summary overview" in summary.warnings
+        assert "Only 1 coverage sections found (expected 14+)" in summary.warnings
+        assert not summary.valid
+
+    def test_malformed_shapes_are_treated_as_missing(self):
+        """Wrong types from salvaged output should not raise"""
+        summary = summarize_analysis({"sections": "n/a", "executive_summary": ["x"], "red_flags": None})
+        assert summary.section_count == 0
+        assert summary.overall_score is None
+        assert "Missing binding recommendation" in summary.warnings
+
+    def test_maturity_level_thresholds(self):
+        assert [maturity_level_for(s) for s in (9, 8.5, 7.0, 6, 4, 1)] == [
+            "Optimized", "Optimized", "Managed", "Defined", "Developing", "Initial",
+        ]
+
+    def test_enrich_fills_score_and_returns_summary(self):
+        """Enrichment should fill the computed score and hand back the summary it used"""
+        data = _structured_tool_input()
+        data["maturity_dimensions"] = {"coverage_breadth": {"score": 3, "weight": 1.0}}
+
+        data, summary = _enrich_analysis(data, client_name="Acme Corp", client_industry="Retail", is_renewal=False)
+
+        assert data["executive_summary"]["key_metrics"] == {"overall_maturity_score": 3.0, "maturity_level": "Initial"}
+        assert summary.maturity_level == "Initial"
+        assert _validate_analysis(data, summary)["warnings"] == summary.warnings
+
+
+def _complete_analysis(section_count):
+    """Analysis with every top-level key present and the given number of sections"""
+    data = _structured_tool_input()
+    data["sections"] = [
+        {"name": f"Section {n}", "items": [{"name": "Item", "carrier_values": {"CNA": {"maturity_score": 7}}}] * 3}
+        for n in range(section_count)
+    ]
+    data["maturity_dimensions"] = {"coverage_breadth": {"score": 7, "weight": 1.0}}
+    return data
+
+
+class TestSelectiveCompletion:
+    def test_warnings_map_to_keys(self):
+        """Each completion target should be requested once"""
+        targets = _completion_targets([
+            "Only 4 coverage sections found (expected 14+)",
+            "Missing red flags section",
+            "Missing binding recommendation",
+            "Missing executive summary overview",
+            "Only 2 items have maturity scores (expected 30+)",
+        ])
+        assert targets == ["sections", "red_flags", "executive_summary"]
+
+    @pytest.mark.asyncio
+    async def test_missing_keys_are_requested_and_merged(self):
+        """Follow-ups should extend the cached prefix and merge without overwriting"""
+        data = _complete_analysis(section_count=9)
+        del data["red_flags"]
+        client = _mock_client(
+            _text_response('sections:\n  - name: "Section 0"\n  - name: "Media Liability"\n    items: []\n'),
+            _text_response('red_flags:\n  - flag: "War exclusion lacks cyber carve-back"\n'),
+        )
+        request = _build_analysis_request("## DECLARATIONS", "Acme Corp", "Retail", False, None, False)
+
+        data, usage = await complete_missing_sections(client, data, request)
+
+        assert [s["name"] for s in data["sections"]][-1] == "Media Liability"
+        assert len(data["sections"]) == 10
+        assert data["red_flags"][0]["flag"].startswith("War exclusion")
+        assert data["_completed_sections"] == ["sections", "red_flags"]
+        assert usage.phase == "completion"
+
+        sections_request = client.messages.stream.call_args_list[0].kwargs
+        content = sections_request["messages"][0]["content"]
+        assert content[0] == request["messages"][0]["content"][0]
+        assert content[0]["cache_control"] == {"type": "ephemeral"}
+        assert "- Section 8" in content[1]["text"]
+        assert sections_request["system"] == request["system"]
+
+    @pytest.mark.asyncio
+    async def test_complete_analysis_makes_no_calls(self):
+        """Nothing flagged means no follow-up requests"""
+        client = _mock_client()
+        request = _build_analysis_request("## DECLARATIONS", "Acme Corp", "Retail", False, None, True)
+
+        data, usage = await complete_missing_sections(client, _complete_analysis(section_count=10), request)
+
+        assert usage is None
+        assert client.messages.stream.call_count == 0
+        assert "_completed_sections" not in data
+
+    @pytest.mark.asyncio
+    async def test_structured_follow_up_keeps_cached_prefix(self):
+        """In tool mode the follow-up sends the same tools and tool_choice, and reads the key from the tool call"""
+        data = _complete_analysis(section_count=10)
+        del data["recommendations"]
+        response = _mock_response([SimpleNamespace(type="tool_use", name=ANALYSIS_TOOL_NAME, input={
+            "sections": [], "maturity_dimensions": {}, "executive_summary": {}, "policy_summary": {}, "red_flags": [],
+            "recommendations": {"immediate_actions": [], "renewal_considerations": ["Add BI"]},
+        })])
+        response.usage.cache_read_input_tokens = 900
+        client = _mock_client(response)
+        request = _build_analysis_request("## DECLARATIONS", "Acme Corp", "Retail", False, None, True)
+
+        data, usage = await complete_missing_sections(client, data, request)
+
+        kwargs = client.messages.stream.call_args.kwargs
+        for field in ("system", "tools", "tool_choice"):
+            assert kwargs[field] == request[field]  # Any change here invalidates the cached messages
+        assert kwargs["messages"][0]["content"][0] == request["messages"][0]["content"][0]
+        assert "ONLY the `recommendations` field" in kwargs["messages"][0]["content"][1]["text"]
+        assert data["recommendations"]["renewal_considerations"] == ["Add BI"]
+        assert usage.cache_read_input_tokens == 900
@@ -0,0 +1,330 @@
+"""
+Tests for the durable SQLite job queue.
+"""
+
+import asyncio
+import hmac
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import pytest
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from main import app
+from services.job_queue import DEAD, DONE, QUEUED, RUNNING, JobQueue, job_queue, schedule
+from services.orchestrator import analysis_status_store
+
+
+def _queue(tmp_path, handler, **kwargs):
+    options = {
+        "workers": 2, "urgent_workers": 0, "visibility_timeout": 30, "max_attempts": 2,
+        "retry_delay": 0, "aging_seconds": 600, "poll_interval": 0.01,
+    }
+    return JobQueue(path=str(tmp_path / "jobs.sqlite3"), handler=handler, **{**options, **kwargs})
+
+
+async def _until(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not await condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+async def _count(queue, status, expected):
+    return (await queue.counts())[status] == expected
+
+
+@pytest.mark.asyncio
+class TestJobQueue:
+    async def test_enqueue_is_durable_and_idempotent(self, tmp_path):
+        queue = _queue(tmp_path, handler=None)
+
+        assert await queue.enqueue("job-1", {"client_name": "Test Corp"}) is True
+        assert await queue.enqueue("job-1", {"client_name": "Test Corp"}) is False
+        assert analysis_status_store["job-1"]["status"] == "queued"
+
+        reopened = _queue(tmp_path, handler=None)  # A restarted process sees the same job
+        assert (await reopened.get("job-1"))["status"] == QUEUED
+
+    async def test_workers_run_jobs(self, tmp_path):
+        seen = []
+
+        async def handler(job_id, payload):
+            seen.append((job_id, payload["n"]))
+
+        queue = _queue(tmp_path, handler)
+        await queue.start()
+        try:
+            for n in range(5):
+                await queue.enqueue(f"job-{n}", {"n": n})
+            await _until(lambda: _count(queue, DONE, 5))
+        finally:
+            await queue.shutdown()
+
+        assert sorted(seen) == [(f"job-{n}", n) for n in range(5)]
+
+    async def test_failing_job_retried_then_dead_lettered(self, tmp_path):
+        attempts = []
+
+        async def handler(job_id, payload):
+            attempts.append(job_id)
+            raise RuntimeError("worker crashed")
+
+        queue = _queue(tmp_path, handler)
+        await queue.start()
+        try:
+            await queue.enqueue("job-bad", {})
+            await _until(lambda: _count(queue, DEAD, 1))
+        finally:
+            await queue.shutdown()
+
+        job = await queue.get("job-bad")
+        assert attempts == ["job-bad", "job-bad"]
+        assert (job["attempts"], job["last_error"]) == (2, "RuntimeError: worker crashed")
+        assert await queue.requeue_dead("job-bad") is True
+        assert (await queue.get("job-bad"))["status"] == QUEUED
+
+    async def test_expired_lease_reclaimed(self, tmp_path):
+        """A job whose worker disappeared is picked up again after the visibility timeout"""
+        crashed = _queue(tmp_path, handler=None, visibility_timeout=0.05)
+        await crashed.enqueue("job-orphan", {})
+        assert crashed._claim()[0] == "job-orphan"  # Claimed, then the process dies
+
+        finished = asyncio.Event()
+
+        async def handler(job_id, payload):
+            finished.set()
+
+        survivor = _queue(tmp_path, handler)
+        await survivor.start()
+        try:
+            await asyncio.wait_for(finished.wait(), timeout=5)
+            await _until(lambda: _count(survivor, DONE, 1))
+        finally:
+            await survivor.shutdown()
+        assert (await survivor.get("job-orphan"))["attempts"] == 2
+
+    async def test_shutdown_returns_running_jobs(self, tmp_path):
+        started = asyncio.Event()
+
+        async def handler(job_id, payload):
+            started.set()
+            await asyncio.sleep(60)
+
+        queue = _queue(tmp_path, handler)
+        await queue.start()
+        await queue.enqueue("job-long", {})
+        await asyncio.wait_for(started.wait(), timeout=5)
+        assert (await queue.get("job-long"))["status"] == RUNNING
+
+        await queue.shutdown()
+
+        job = await queue.get("job-long")
+        assert (job["status"], job["attempts"]) == (QUEUED, 0)
+
+    async def test_upload_kept_for_retries_and_removed_when_dead(self, tmp_path):
+        """A queued upload survives failed attempts and is deleted once its job is dead or done"""
+        present = []
+
+        async def handler(job_id, payload):
+            present.append(os.path.exists(payload["_local_file_path"]))
+            if job_id == "job-bad":
+                raise RuntimeError("worker crashed")
+
+        queue = _queue(tmp_path, handler)
+        paths = {}
+        for job_id in ("job-bad", "job-good"):
+            paths[job_id] = queue.upload_path(job_id, "../policy.pdf")
+            with open(paths[job_id], "wb") as f:
+                f.write(b"%PDF-")
+            await queue.enqueue(job_id, {"_local_file_path": paths[job_id], "_queued_upload": True})
+
+        assert os.path.dirname(paths["job-bad"]) == str(tmp_path / "uploads")  # Beside the database
+        await queue.start()
+        try:
+            await _until(lambda: _count(queue, DEAD, 1))
+            await _until(lambda: _count(queue, DONE, 1))
+        finally:
+            await queue.shutdown()
+
+        assert present == [True, True, True]  # Both attempts of job-bad, and job-good
+        assert not any(os.path.exists(path) for path in paths.values())
+
+    async def test_worker_survives_bookkeeping_errors(self, tmp_path):
+        """An error recording a job's outcome is logged and the worker keeps running"""
+        seen = []
+
+        async def handler(job_id, payload):
+            seen.append(job_id)
+
+        queue = _queue(tmp_path, handler, workers=1)
+        finish = queue._finish
+        failures = iter([sqlite3.OperationalError("database is locked")])
+
+        def flaky_finish(*args):
+            for error in failures:
+                raise error
+            return finish(*args)
+
+        queue._finish = flaky_finish
+        await queue.start()
+        try:
+            await queue.enqueue("job-1", {})
+            await _until(lambda: _count(queue, RUNNING, 1))  # Outcome not recorded: waits for its lease
+            await queue.enqueue("job-2", {})
+            await _until(lambda: _count(queue, DONE, 1))
+        finally:
+            await queue.shutdown()
+
+        assert seen == ["job-1", "job-2"]
+
+
+class TestScheduling:
+    def test_priority_then_deadline(self, tmp_path):
+        queue = _queue(tmp_path, handler=None)
+        renewal_soon = (date.today() + timedelta(days=7)).isoformat()  # Due now (7-day lead)
+
+        for job_id, payload in [
+            ("backfill-1", {"priority": "low"}),
+            ("backfill-2", {"priority": "low"}),
+            ("normal-1", {}),
+            ("normal-renewal", {"renewal_date": renewal_soon}),
+            ("urgent-1", {"priority": "urgent"}),
+        ]:
+            queue._insert(job_id, payload)
+
+        order = [queue._claim()[0] for _ in range(5)]
+
+        assert order == ["urgent-1", "normal-renewal", "normal-1", "backfill-1", "backfill-2"]
+
+    def test_renewal_deadline(self):
+        now = time.time()
+        renewal = date.today() + timedelta(days=7)
+        rank, deadline = schedule({"priority": "normal", "renewal_date": renewal.isoformat()}, now)
+
+        due = datetime(renewal.year, renewal.month, renewal.day, tzinfo=timezone.utc) - timedelta(days=7)
+        assert (rank, deadline) == (2, due.timestamp())  # Sooner than the 4-hour normal window
+        assert schedule({"renewal_date": "2099-01-01", "priority": "bogus"}, now) == (2, now + 4 * 3600)
+
+    def test_waiting_jobs_age_past_newer_work(self, tmp_path):
+        queue = _queue(tmp_path, handler=None, aging_seconds=60)
+        queue._insert("old-backfill", {"priority": "low"})
+        queue._execute("UPDATE jobs SET created_at = created_at - 200 WHERE id = ?", ("old-backfill",))  # Aged 3 classes
+        queue._insert("new-high", {"priority": "high"})
+
+        assert queue._claim()[0] == "old-backfill"
+
+    def test_express_worker_only_takes_urgent_jobs(self, tmp_path):
+        queue = _queue(tmp_path, handler=None)
+        queue._insert("normal-1", {})
+        assert queue._claim(max_priority=0) is None
+
+        queue._insert("urgent-1", {"priority": "urgent"})
+        assert queue._claim(max_priority=0)[0] == "urgent-1"
+
+    @pytest.mark.asyncio
+    async def test_urgent_job_starts_while_workers_are_busy(self, tmp_path):
+        release = asyncio.Event()
+        started = []
+
+        async def handler(job_id, payload):
+            started.append(job_id)
+            if payload.get("priority") != "urgent":
+                await release.wait()
+
+        queue = _queue(tmp_path, handler, workers=1, urgent_workers=1)
+        await queue.start()
+        try:
+            for n in range(3):
+                await queue.enqueue(f"backfill-{n}", {"priority": "low"})
+            await _until(lambda: _count(queue, RUNNING, 1))
+
+            await queue.enqueue("urgent-renewal", {"priority": "urgent"})
+            await _until(lambda: _count(queue, DONE, 1), timeout=2)
+        finally:
+            release.set()
+            await queue.shutdown()
+
+        assert started == ["backfill-0", "urgent-renewal"]
+
+    def test_existing_queue_database_migrated(self, tmp_path):
+        path = tmp_path / "jobs.sqlite3"
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE jobs (id TEXT PRIMARY KEY, payload TEXT NOT NULL, status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, available_at REAL NOT NULL, created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL, last_error TEXT)"
+        )
+        conn.execute("INSERT INTO jobs VALUES ('old-job', '{}', 'queued', 0, 0, 0, 0, NULL)")
+        conn.commit()
+        conn.close()
+
+        assert _queue(tmp_path, handler=None)._claim()[0] == "old-job"
+
+
+class TestWebhookQueuesJob:
+    def test_webhook_persists_job_before_responding(self, sample_webhook_payload):
+        raw = json.dumps(sample_webhook_payload).encode()
+        signature = hmac.new(b"test-webhook-secret-for-hmac-signing", raw, hashlib.sha256).hexdigest()
+
+        response = TestClient(app).post(
+            "/webhook/policy-uploaded",
+            content=raw,
+            headers={"Content-Type": "application/json", "X-Webhook-Signature": f"sha256={signature}"},
+        )
+
+        assert response.status_code == 200
+        analysis_id = response.json()["analysis_id"]
+        job = asyncio.run(job_queue.get(analysis_id))
+        assert job["status"] == QUEUED
+        assert analysis_status_store[analysis_id]["status"] == "queued"
+
+    def test_upload_stored_beside_queue(self):
+        """Direct uploads are saved on the queue's volume, not in TEMP_DIR"""
+        response = TestClient(app).post(
+            "/analysis/upload",
+            files={"file": ("policy.pdf", b"%PDF-1.4", "application/pdf")},
+            data={"client_name": "Test Corp"},
+        )
+
+        assert response.status_code == 200
+        analysis_id = response.json()["analysis_id"]
+        [(payload,)] = job_queue._query("SELECT payload FROM jobs WHERE id = ?", (analysis_id,))
+        path = json.loads(payload)["_local_file_path"]
+        assert os.path.dirname(path) == job_queue.upload_dir
+        with open(path, "rb") as f:
+            assert f.read() == b"%PDF-1.4"
+        os.remove(path)
+
+    def test_queued_job_listed(self):
+        """Jobs waiting in the queue have no result yet and still list"""
+        analysis_status_store.pop("job-listed", None)
+        asyncio.run(job_queue.enqueue("job-listed", {"client_name": "Test Corp"}))
+
+        response = TestClient(app).get("/analysis/")
+
+        assert response.status_code == 200
+        listed = {a["analysis_id"]: a for a in response.json()["analyses"]}
+        assert listed["job-listed"]["status"] == "queued"
+        assert listed["job-listed"]["client_name"] == "Unknown"
+
+    def test_dead_job_status_after_restart(self):
+        """A dead-lettered job dropped from memory still reports its state from the queue"""
+        job_queue._insert("job-dead", {})
+        job_queue._execute(
+            "UPDATE jobs SET status = ?, attempts = 3, last_error = ? WHERE id = ?",
+            (DEAD, "RuntimeError: worker crashed", "job-dead"),
+        )
+        analysis_status_store.pop("job-dead", None)  # As after a restart
+
+        response = TestClient(app).get("/analysis/job-dead/status")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["status"], body["error"]) == ("failed", "RuntimeError: worker crashed")
+        assert body["completed_at"] is not None
+        assert TestClient(app).get("/analysis/job-missing/status").status_code == 404
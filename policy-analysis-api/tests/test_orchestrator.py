@@ -2,6 +2,7 @@
 Tests for the analysis orchestrator — full pipeline with mocked services.
 """
 
+import asyncio
 import os
 import json
 import hmac
@@ -18,7 +19,11 @@ from services.orchestrator import (
     _sign_payload,
     _update_status,
     _calculate_duration,
+    _background_reports,
+    _persist_completed,
+    ensure_report,
 )
+from services.report_generator import ReportResult
 
 
 class TestSignPayload:
@@ -76,18 +81,36 @@ class TestCalculateDuration:
         assert duration >= 9.0  # Allow 1s tolerance
 
 
+@pytest.mark.asyncio
+class TestPersistCompleted:
+    @patch("services.orchestrator._get_supabase_client")
+    async def test_tokens_stored_as_flat_numbers(self, mock_supa):
+        """analysis_tokens_used keeps the CRM's Record<string, number> shape with a "total" key"""
+        usage = {
+            "total_tokens": 1500, "input_tokens": 1200, "output_tokens": 300, "latency_ms": 812.5,
+            "phases": {"extraction": {"total_tokens": 900}}, "completion_keys": ["gaps"], "repaired": True,
+        }
+
+        await _persist_completed("policy-001", {"analysis_id": "a-1"}, usage)
+
+        update_data = mock_supa.return_value.table.return_value.update.call_args[0][0]
+        assert update_data["analysis_tokens_used"] == {
+            "total": 1500, "input_tokens": 1200, "output_tokens": 300, "latency_ms": 812.5,
+        }
+
+
 @pytest.mark.asyncio
 class TestRunPolicyAnalysis:
     @patch("services.orchestrator.extractor")
     @patch("services.orchestrator.analyzer")
-    @patch("services.orchestrator.generator")
+    @patch("services.orchestrator.report_service")
     @patch("services.orchestrator._get_supabase_client")
     @patch("services.orchestrator._send_callback", new_callable=AsyncMock)
     async def test_happy_path_no_callback(
         self,
         mock_callback,
         mock_supa,
-        mock_generator,
+        mock_reports,
         mock_analyzer,
         mock_extractor,
         sample_extraction_result,
@@ -98,7 +121,7 @@ class TestRunPolicyAnalysis:
         mock_supa.return_value = None  # No supabase in test
         mock_extractor.extract_from_url = AsyncMock(return_value=sample_extraction_result)
         mock_analyzer.analyze_policy_two_phase = AsyncMock(return_value=sample_analysis_result)
-        mock_generator.generate_report = AsyncMock(return_value=sample_report_result)
+        mock_reports.render = AsyncMock(return_value=sample_report_result)
 
         payload = {
             "policy_id": "policy-happy-001",
@@ -125,14 +148,178 @@ class TestRunPolicyAnalysis:
 
     @patch("services.orchestrator.extractor")
     @patch("services.orchestrator.analyzer")
-    @patch("services.orchestrator.generator")
+    @patch("services.orchestrator.report_service")
+    @patch("services.orchestrator._get_supabase_client")
+    @patch("services.orchestrator._send_callback", new_callable=AsyncMock)
+    async def test_report_bytes_uploaded_without_local_file(
+        self,
+        mock_callback,
+        mock_supa,
+        mock_reports,
+        mock_analyzer,
+        mock_extractor,
+        sample_extraction_result,
+        sample_analysis_result,
+    ):
+        """With storage configured the in-memory PDF is uploaded directly and never written to disk"""
+        supa = MagicMock()
+        mock_supa.return_value = supa
+        mock_extractor.extract_from_url = AsyncMock(return_value=sample_extraction_result)
+        mock_analyzer.analyze_policy_two_phase = AsyncMock(return_value=sample_analysis_result)
+        mock_reports.render = AsyncMock(return_value=ReportResult(
+            success=True, report_bytes=b"%PDF-1.4 test", filename="Test_Corp.pdf",
+        ))
+
+        await run_policy_analysis("analysis-bytes-001", {
+            "policy_id": "policy-bytes-001",
+            "tenant_id": "tenant-001",
+            "client_id": "company-001",
+            "client_name": "Test Corp",
+            "file_url": "https://example.com/test.pdf",
+        })
+
+        storage_path, uploaded = supa.storage.from_.return_value.upload.call_args.args[:2]
+        assert uploaded == b"%PDF-1.4 test"
+        assert storage_path.startswith("tenant-001/company-001/reports/analysis-bytes-001_")
+        mock_reports.save_report.assert_not_called()
+
+        result = analysis_status_store["analysis-bytes-001"]["result"]
+        assert result["report_storage_path"] == storage_path
+        assert result["report_path"] is None
+        assert result["report_size_bytes"] == len(b"%PDF-1.4 test")
+
+    @patch("services.orchestrator.extractor")
+    @patch("services.orchestrator.analyzer")
+    @patch("services.orchestrator.report_service")
+    @patch("services.orchestrator._get_supabase_client")
+    @patch("services.orchestrator._send_callback", new_callable=AsyncMock)
+    async def test_lazy_report_rendered_on_first_request(
+        self,
+        mock_callback,
+        mock_supa,
+        mock_reports,
+        mock_analyzer,
+        mock_extractor,
+        sample_extraction_result,
+        sample_analysis_result,
+    ):
+        """Lazy mode sends the callback without rendering; the first download renders and records it"""
+        mock_supa.return_value = None
+        mock_extractor.extract_from_url = AsyncMock(return_value=sample_extraction_result)
+        mock_analyzer.analyze_policy_two_phase = AsyncMock(return_value=sample_analysis_result)
+        mock_reports.render = AsyncMock(return_value=ReportResult(success=True, report_bytes=b"%PDF-", filename="r.pdf"))
+        mock_reports.save_report.return_value = "/tmp/r.pdf"
+
+        with patch("services.orchestrator.settings.REPORT_RENDER_MODE", "lazy"):
+            await run_policy_analysis("analysis-lazy-001", {
+                "policy_id": "policy-lazy-001",
+                "client_name": "Test Corp",
+                "file_url": "https://example.com/test.pdf",
+                "callback_url": "https://app.example.com/callback",
+            })
+
+        assert mock_callback.call_args.args[1]["report_status"] == "deferred"
+        mock_reports.render.assert_not_called()
+
+        report = await ensure_report("analysis-lazy-001")
+
+        assert report.report_bytes == b"%PDF-"
+        result = analysis_status_store["analysis-lazy-001"]["result"]
+        assert (result["report_status"], result["report_path"]) == ("ready", "/tmp/r.pdf")
+
+    @patch("services.orchestrator.extractor")
+    @patch("services.orchestrator.analyzer")
+    @patch("services.orchestrator.report_service")
+    @patch("services.orchestrator._get_supabase_client")
+    @patch("services.orchestrator._send_callback", new_callable=AsyncMock)
+    async def test_concurrent_first_downloads_publish_once(
+        self,
+        mock_callback,
+        mock_supa,
+        mock_reports,
+        mock_analyzer,
+        mock_extractor,
+        sample_extraction_result,
+        sample_analysis_result,
+    ):
+        """Simultaneous first downloads of a lazy report upload and record it once"""
+        mock_supa.return_value = None
+        mock_extractor.extract_from_url = AsyncMock(return_value=sample_extraction_result)
+        mock_analyzer.analyze_policy_two_phase = AsyncMock(return_value=sample_analysis_result)
+        mock_reports.render = AsyncMock(return_value=ReportResult(success=True, report_bytes=b"%PDF-", filename="r.pdf"))
+
+        with patch("services.orchestrator.settings.REPORT_RENDER_MODE", "lazy"):
+            await run_policy_analysis("analysis-lazy-002", {
+                "policy_id": "policy-lazy-002",
+                "client_name": "Test Corp",
+                "file_url": "https://example.com/test.pdf",
+                "callback_url": "https://app.example.com/callback",
+            })
+
+        supa = mock_supa.return_value = MagicMock()
+
+        async def slow_upload(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            return "tenant/unknown/reports/analysis-lazy-002.pdf"
+
+        with patch("services.orchestrator._upload_report_to_supabase", side_effect=slow_upload) as upload:
+            reports = await asyncio.gather(*(ensure_report("analysis-lazy-002") for _ in range(3)))
+
+        assert all(r.success for r in reports)
+        upload.assert_called_once()
+        assert upload.call_args.kwargs["overwrite"] is True  # A retried job's earlier upload is replaced
+        supa.table.return_value.update.assert_called_once()
+        mock_reports.save_report.assert_not_called()
+        assert analysis_status_store["analysis-lazy-002"]["result"]["report_status"] == "ready"
+
+    @patch("services.orchestrator.extractor")
+    @patch("services.orchestrator.analyzer")
+    @patch("services.orchestrator.report_service")
+    @patch("services.orchestrator._get_supabase_client")
+    @patch("services.orchestrator._send_callback", new_callable=AsyncMock)
+    async def test_background_report_rendered_after_callback(
+        self,
+        mock_callback,
+        mock_supa,
+        mock_reports,
+        mock_analyzer,
+        mock_extractor,
+        sample_extraction_result,
+        sample_analysis_result,
+    ):
+        mock_supa.return_value = None
+        mock_extractor.extract_from_url = AsyncMock(return_value=sample_extraction_result)
+        mock_analyzer.analyze_policy_two_phase = AsyncMock(return_value=sample_analysis_result)
+        mock_reports.save_report.return_value = "/tmp/r.pdf"
+
+        async def render(analysis_data, **kwargs):
+            # Callback has already gone out by the time the report renders
+            mock_callback.assert_called_once()
+            return ReportResult(success=True, report_bytes=b"%PDF-", filename="r.pdf")
+
+        mock_reports.render = render
+
+        with patch("services.orchestrator.settings.REPORT_RENDER_MODE", "background"):
+            await run_policy_analysis("analysis-bg-001", {
+                "client_name": "Test Corp",
+                "file_url": "https://example.com/test.pdf",
+                "callback_url": "https://app.example.com/callback",
+            })
+            assert mock_callback.call_args.args[1]["report_status"] == "pending"
+            await asyncio.gather(*_background_reports)
+
+        assert analysis_status_store["analysis-bg-001"]["result"]["report_status"] == "ready"
+
+    @patch("services.orchestrator.extractor")
+    @patch("services.orchestrator.analyzer")
+    @patch("services.orchestrator.report_service")
     @patch("services.orchestrator._get_supabase_client")
     @patch("services.orchestrator._send_callback", new_callable=AsyncMock)
     async def test_happy_path_with_callback(
         self,
         mock_callback,
         mock_supa,
-        mock_generator,
+        mock_reports,
         mock_analyzer,
         mock_extractor,
         sample_extraction_result,
@@ -143,7 +330,7 @@ class TestRunPolicyAnalysis:
         mock_supa.return_value = None
         mock_extractor.extract_from_url = AsyncMock(return_value=sample_extraction_result)
         mock_analyzer.analyze_policy_two_phase = AsyncMock(return_value=sample_analysis_result)
-        mock_generator.generate_report = AsyncMock(return_value=sample_report_result)
+        mock_reports.render = AsyncMock(return_value=sample_report_result)
 
         payload = {
             "policy_id": "policy-cb-001",
@@ -220,12 +407,12 @@ class TestRunPolicyAnalysis:
 
     @patch("services.orchestrator.extractor")
     @patch("services.orchestrator.analyzer")
-    @patch("services.orchestrator.generator")
+    @patch("services.orchestrator.report_service")
     @patch("services.orchestrator._get_supabase_client")
     async def test_temp_file_cleanup(
         self,
         mock_supa,
-        mock_generator,
+        mock_reports,
         mock_analyzer,
         mock_extractor,
         sample_extraction_result,
@@ -237,7 +424,7 @@ class TestRunPolicyAnalysis:
         mock_supa.return_value = None
         mock_extractor.extract_from_file = AsyncMock(return_value=sample_extraction_result)
         mock_analyzer.analyze_policy_two_phase = AsyncMock(return_value=sample_analysis_result)
-        mock_generator.generate_report = AsyncMock(return_value=sample_report_result)
+        mock_reports.render = AsyncMock(return_value=sample_report_result)
 
         # Create a temp file
         temp_file = tmp_path / "test_policy.pdf"
@@ -0,0 +1,130 @@
+"""
+Tests for the red flag pre-scanner — single-pass pattern matching over Phase 1 output.
+"""
+
+import pytest
+
+from services.analysis_schema import summarize_analysis
+from services.red_flag_scanner import RedFlagScanner
+
+EXTRACTION = """## 1. DECLARATIONS PAGE DATA
+- Aggregate limit: $5,000,000
+- Retroactive date: Same as policy inception (Page 2)
+- Defense costs structure: Within Limits (Page 3)
+
+## 2. INSURING AGREEMENTS
+| Coverage | Sublimit | Waiting Period | Page |
+|---|---|---|---|
+| Business Interruption | $1,000,000 | 48 hours | Page 14 |
+| Cyber Extortion / Ransomware | $50,000 | N/A | Page 15 |
+| Social Engineering | $250,000 | N/A | Page 16 |
+- Contingent Business Interruption: NOT FOUND IN POLICY
+
+--- Page 22 ---
+## 4. EXCLUSIONS
+- War exclusion: excludes any act of war, hostile act, or military action
+- Encryption: excludes loss from any unencrypted portable device
+- Prior Acts Exclusion: does not apply to cyber terrorism (carve-back)
+"""
+
+
+def _ids(candidates):
+    return [c.flag_id for c in candidates]
+
+
+class TestRedFlagScanner:
+    def test_finds_library_flags_with_citations(self):
+        """Each matching library entry should appear once with a page citation"""
+        candidates = {c.flag_id: c for c in RedFlagScanner().scan(EXTRACTION)}
+
+        assert candidates["defense_within_limits"].evidence[0]["page"] == "Page 3"
+        assert candidates["ransomware_sublimit"].evidence[0]["page"] == "Page 15"
+        assert candidates["bi_waiting_period"].severity == "MEDIUM"
+        assert candidates["social_engineering_sublimit"].evidence[0]["page"] == "Page 16"  # $250K of $5M
+        assert candidates["no_prior_acts"].evidence[0]["page"] == "Page 2"
+        assert candidates["dependent_bi"].evidence[0]["text"].startswith("Contingent Business Interruption")
+        # Line has no page citation — falls back to the preceding page marker
+        assert candidates["war_exclusion"].evidence[0]["page"] == "Page 22"
+        assert candidates["unencrypted_data"].evidence[0]["page"] == "Page 22"
+        assert len(candidates["war_exclusion"].evidence) == 1  # Three anchors, one line
+
+    def test_candidates_in_library_order(self):
+        """HIGH severity flags come before MEDIUM"""
+        severities = [c.severity for c in RedFlagScanner().scan(EXTRACTION)]
+        assert severities == sorted(severities, key=lambda s: s != "HIGH")
+
+    def test_line_conditions_suppress_acceptable_terms(self):
+        """Carve-backs, outside-limits defense, short waits and large sublimits are not flagged"""
+        text = "\n".join([
+            "- War exclusion: act of war excluded, with cyber terrorism carve-back",
+            "- Defense costs: Outside limits",
+            "- Waiting period: 8 hours",
+            "- Ransomware sublimit: $1,000,000",
+            "- Aggregate limit: $2,000,000",
+            "- Social engineering: $500,000",
+        ])
+        assert RedFlagScanner().scan(text) == []
+
+    @pytest.mark.parametrize("line, flag_id", [
+        ("War Exclusion: applies; no cyber carve-back", "war_exclusion"),
+        ("No coverage for acts of war or hostile acts.", "war_exclusion"),
+        ("We do not cover losses from nation-state actors.", "nation_state"),
+        ("This policy excludes acts of war.", "war_exclusion"),
+        ("Cyber terrorism: not covered", "cyber_terrorism"),
+    ])
+    def test_exclusion_wording_and_missing_carve_backs_flagged(self, line, flag_id):
+        """Exclusion phrases are not negations, and a negated carve-back does not clear the flag"""
+        assert [c.flag_id for c in RedFlagScanner().scan(line)] == [flag_id]
+
+    def test_schedule_rows_with_retentions_not_flagged(self):
+        """Retentions, restoration periods and negated answers are not read as red flags"""
+        text = "\n".join([
+            "- Aggregate limit: $5,000,000",
+            "| Cyber Extortion / Ransomware | $5,000,000 | Retention $25,000 |",
+            "| Social Engineering | $1,000,000 | Retention $10,000 |",
+            "- Business interruption: waiting period 8 hours … Period of restoration 180 days",
+            "- Ransomware sublimit $1,000,000 with $25,000 deductible",
+            "- Limits are eroding? no",
+            "- Defense costs: non-eroding",
+        ])
+        assert RedFlagScanner().scan(text) == []
+
+        low = "| Cyber Extortion / Ransomware | $50,000 | Retention $25,000 |"
+        assert _ids(RedFlagScanner().scan(low)) == ["ransomware_sublimit"]
+
+    def test_values_read_from_limit_and_waiting_period_columns(self):
+        """Column headers bind unlabelled cells: only the sublimit and waiting-period columns count"""
+        text = "\n".join([
+            "- Aggregate limit: $5,000,000",
+            "| Coverage | Retention | Sublimit | Waiting Period | Period of Restoration |",
+            "|---|---|---|---|---|",
+            "| Ransomware | $25,000 | $2,000,000 | N/A | N/A |",
+            "| Business Interruption | $25,000 | $1,000,000 | 12 hours | 180 days |",
+            "| Social Engineering | $10,000 | $100,000 | N/A | N/A |",
+        ])
+        assert _ids(RedFlagScanner().scan(text)) == ["social_engineering_sublimit"]
+
+    def test_cross_check_and_validation_warning(self):
+        """HIGH candidates missing from Phase 2 should surface as validation warnings"""
+        scanner = RedFlagScanner()
+        candidates = scanner.scan(EXTRACTION)
+        red_flags = [{"flag": "War exclusion without buyback"}, {"flag": "Ransomware sublimit only $50K"}]
+
+        check = scanner.cross_check(candidates, red_flags)
+
+        assert {"war_exclusion", "ransomware_sublimit"} <= set(check["confirmed"])
+        assert "defense_within_limits" in check["unconfirmed"]
+
+        warnings = summarize_analysis({
+            "red_flags": red_flags,
+            "_red_flag_prescan": {"candidates": [c.to_dict() for c in candidates], **check},
+        }).warnings
+        assert any("Defense Costs Within Limits" in w and "Page 3" in w for w in warnings)
+        assert not any("BI Waiting Period" in w for w in warnings)  # MEDIUM — not warned
+
+    def test_hints_render_for_prompt(self):
+        scanner = RedFlagScanner()
+        hints = scanner.format_hints(scanner.scan(EXTRACTION))
+        assert hints.startswith("## PRE-SCAN RED FLAG CANDIDATES")
+        assert "[HIGH] Defense Costs Within Limits (Eroding)" in hints
+        assert scanner.format_hints([]) == ""
@@ -0,0 +1,130 @@
+"""
+Tests for report downloads — signed-URL redirects, storage streaming, ranges and ETags.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from main import app
+from services.orchestrator import analysis_status_store
+from services.report_generator import ReportResult
+
+PDF = b"%PDF-1.4 " + bytes(range(256)) * 4
+STORAGE_PATH = "tenant-001/company-001/reports/analysis-dl-001_Test_Corp_Analysis.pdf"
+
+
+@pytest.fixture
+def client():
+    return TestClient(app, follow_redirects=False)
+
+
+@pytest.fixture
+def completed(request):
+    result = {"report_path": None, "report_storage_path": None, "report_status": "ready", **getattr(request, "param", {})}
+    analysis_status_store["analysis-dl-001"] = {"status": "completed", "result": result}
+    yield result
+    analysis_status_store.pop("analysis-dl-001", None)
+
+
+@pytest.fixture
+def in_memory_report():
+    with patch("routes.analysis.ensure_report", new_callable=AsyncMock) as ensure:
+        ensure.return_value = ReportResult(success=True, report_bytes=PDF, filename="Test_Corp.pdf")
+        yield ensure
+
+
+class _Upstream:
+    def __init__(self, status, body=b"", headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self.content = MagicMock()
+        self.content.iter_chunked = lambda size: self._chunks(body, size)
+        self.release = MagicMock()
+
+    async def _chunks(self, body, size):
+        for start in range(0, len(body), size):
+            yield body[start:start + size]
+
+
+class TestStoredReport:
+    @pytest.mark.parametrize("completed", [{"report_storage_path": STORAGE_PATH}], indirect=True)
+    def test_redirects_to_signed_url(self, client, completed):
+        supa = MagicMock()
+        supa.storage.from_.return_value.create_signed_url.return_value = {"signedURL": "https://storage.example.com/signed"}
+        with patch("services.orchestrator._get_supabase_client", return_value=supa):
+            response = client.get("/analysis/analysis-dl-001/report")
+
+        assert response.status_code == 307
+        assert response.headers["location"] == "https://storage.example.com/signed"
+        path, ttl, options = supa.storage.from_.return_value.create_signed_url.call_args.args
+        assert (path, options) == (STORAGE_PATH, {"download": "analysis-dl-001_Test_Corp_Analysis.pdf"})
+
+    @pytest.mark.parametrize("completed", [{"report_storage_path": STORAGE_PATH}], indirect=True)
+    def test_streams_range_from_storage(self, client, completed):
+        upstream = _Upstream(206, PDF[:100], {"Content-Range": f"bytes 0-99/{len(PDF)}", "ETag": '"abc"'})
+        session = MagicMock()
+        session.get = AsyncMock(return_value=upstream)
+        session.close = AsyncMock()
+
+        with patch("routes.analysis.settings.REPORT_DOWNLOAD_MODE", "stream"), \
+             patch("routes.analysis.signed_report_url", AsyncMock(return_value="https://storage.example.com/signed")), \
+             patch("routes.analysis.aiohttp.ClientSession", return_value=session):
+            response = client.get("/analysis/analysis-dl-001/report", headers={"Range": "bytes=0-99"})
+
+        assert response.status_code == 206
+        assert response.content == PDF[:100]
+        assert response.headers["etag"] == '"abc"'
+        assert session.get.call_args.kwargs["headers"]["range"] == "bytes=0-99"
+        session.close.assert_awaited_once()
+
+    @pytest.mark.parametrize("completed", [{"report_storage_path": STORAGE_PATH}], indirect=True)
+    def test_falls_back_to_render_without_storage(self, client, completed, in_memory_report):
+        with patch("services.orchestrator._get_supabase_client", return_value=None):
+            response = client.get("/analysis/analysis-dl-001/report")
+
+        assert response.status_code == 200
+        assert response.content == PDF
+
+
+class TestRangesAndETags:
+    def test_etag_and_not_modified(self, client, completed, in_memory_report):
+        etag = client.get("/analysis/analysis-dl-001/report").headers["etag"]
+        response = client.get("/analysis/analysis-dl-001/report", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+
+    @pytest.mark.parametrize("header, expected", [
+        ("bytes=0-9", (0, 9)),
+        ("bytes=1000-", (1000, len(PDF) - 1)),
+        ("bytes=-16", (len(PDF) - 16, len(PDF) - 1)),
+    ])
+    def test_partial_content(self, client, completed, in_memory_report, header, expected):
+        response = client.get("/analysis/analysis-dl-001/report", headers={"Range": header})
+
+        start, end = expected
+        assert response.status_code == 206
+        assert response.content == PDF[start:end + 1]
+        assert response.headers["content-range"] == f"bytes {start}-{end}/{len(PDF)}"
+
+    def test_unsatisfiable_and_stale_ranges(self, client, completed, in_memory_report):
+        response = client.get("/analysis/analysis-dl-001/report", headers={"Range": f"bytes={len(PDF)}-"})
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(PDF)}"
+
+        response = client.get("/analysis/analysis-dl-001/report", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+        assert response.status_code == 200
+        assert response.content == PDF
+
+    def test_local_file_served_with_ranges(self, client, completed, tmp_path):
+        path = tmp_path / "Test_Corp.pdf"
+        path.write_bytes(PDF)
+        completed["report_path"] = str(path)
+
+        response = client.get("/analysis/analysis-dl-001/report", headers={"Range": "bytes=0-3"})
+
+        assert response.status_code == 206
+        assert response.content == b"%PDF"
+        assert 'filename="Test_Corp.pdf"' in response.headers["content-disposition"]
@@ -0,0 +1,140 @@
+"""
+Tests for bulk report export — stored analyses rendered into one ZIP.
+"""
+
+import asyncio
+import hmac
+import hashlib
+import json
+import zipfile
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from main import app
+from services.orchestrator import analysis_status_store
+from services.report_export import MANIFEST_NAME, ExportBusy, export_reports
+from services.report_generator import ReportResult
+
+SECRET = "test-webhook-secret-for-hmac-signing"
+
+
+def _completed(analysis_id, tenant_id="tenant-001", client="Test Corp"):
+    analysis_status_store[analysis_id] = {
+        "status": "completed",
+        "result": {"tenant_id": tenant_id, "analysis_data": {"client_company": client}},
+    }
+
+
+@pytest.fixture
+def stored_analyses():
+    with patch.dict(analysis_status_store, clear=True):
+        for n in range(5):
+            _completed(f"analysis-exp-{n}", client=f"Client {n}")
+        _completed("analysis-exp-other", tenant_id="tenant-002")
+        yield
+
+
+@pytest.fixture
+def rendered():
+    """Reports whose PDF body is the client name ('Client 3' fails), tracking peak concurrency"""
+    in_flight, peak = 0, 0
+
+    async def render(analysis_data, **kwargs):
+        nonlocal in_flight, peak
+        assert kwargs["cache"] is False  # Bulk renders stay out of the report cache
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        client = analysis_data["client_company"]
+        if client == "Client 3":
+            return ReportResult(success=False, error="render failed")
+        return ReportResult(success=True, report_bytes=client.encode(), filename=f"{client}.pdf")
+
+    with patch("services.report_export._get_supabase_client", return_value=None), \
+         patch("services.report_export.report_service") as reports:
+        reports.render = render
+        yield lambda: peak
+
+
+@pytest.mark.asyncio
+class TestExportReports:
+    async def test_tenant_reports_zipped_with_manifest(self, tmp_path, stored_analyses, rendered):
+        path = str(tmp_path / "export.zip")
+
+        result = await export_reports(path, "tenant-001", concurrency=2)
+
+        assert sorted(result.exported) == [f"analysis-exp-{n}" for n in (0, 1, 2, 4)]
+        assert result.failed == ["analysis-exp-3"]
+        assert rendered() == 2  # Bounded by concurrency
+        with zipfile.ZipFile(path) as archive:
+            assert archive.read("analysis-exp-0_Client 0.pdf") == b"Client 0"
+            manifest = json.loads(archive.read(MANIFEST_NAME))
+        assert manifest["failed"] == ["analysis-exp-3"]
+        assert not (tmp_path / "export.zip.part").exists()
+
+    async def test_selected_analyses_only(self, tmp_path, stored_analyses, rendered):
+        result = await export_reports(str(tmp_path / "export.zip"), "tenant-001", analysis_ids=["analysis-exp-1", "analysis-exp-2"])
+        assert sorted(result.exported) == ["analysis-exp-1", "analysis-exp-2"]
+
+    async def test_other_tenants_analyses_skipped(self, tmp_path, stored_analyses, rendered):
+        """Selecting another tenant's analysis by ID does not export it"""
+        result = await export_reports(str(tmp_path / "export.zip"), "tenant-001", analysis_ids=["analysis-exp-1", "analysis-exp-other"])
+        assert result.exported == ["analysis-exp-1"]
+        assert result.failed == []
+
+    async def test_second_export_refused_without_waiting(self, tmp_path, stored_analyses, rendered):
+        """Admission claims the slot atomically: of two simultaneous exports exactly one runs"""
+        outcomes = await asyncio.gather(
+            *(export_reports(str(tmp_path / f"export-{n}.zip"), "tenant-001", wait=False) for n in range(2)),
+            return_exceptions=True,
+        )
+
+        assert sum(isinstance(outcome, ExportBusy) for outcome in outcomes) == 1
+        assert (await export_reports(str(tmp_path / "export-2.zip"), "tenant-001", wait=False)).exported  # Slot released
+
+    async def test_stored_rows_paged_from_supabase(self, tmp_path, rendered):
+        supa = MagicMock()
+        query = supa.table.return_value.select.return_value
+        query.eq.return_value.in_.return_value.execute.return_value.data = [
+            {"id": "policy-1", "analysis_id": "analysis-1", "tenant_id": "t1", "analysis_data": {"client_company": "Client 1"}},
+        ]
+        with patch("services.report_export._get_supabase_client", return_value=supa):
+            result = await export_reports(str(tmp_path / "export.zip"), "t1", analysis_ids=["analysis-1"])
+
+        assert result.exported == ["analysis-1"]
+        query.eq.assert_called_once_with("tenant_id", "t1")  # Scoped before the ID filter
+        query.eq.return_value.in_.assert_called_once_with("analysis_id", ["analysis-1"])
+
+
+class TestExportEndpoint:
+    def _post(self, body):
+        raw = json.dumps(body).encode()
+        signature = hmac.new(SECRET.encode(), raw, hashlib.sha256).hexdigest()
+        return TestClient(app).post(
+            "/analysis/reports:export",
+            content=raw,
+            headers={"X-Webhook-Signature": f"sha256={signature}", "Content-Type": "application/json"},
+        )
+
+    def test_requires_tenant(self):
+        assert self._post({}).status_code == 422
+        assert self._post({"analysis_ids": ["analysis-exp-1"]}).status_code == 422
+
+    def test_busy_while_another_export_runs(self):
+        with patch("services.report_export.export_slots") as slots:
+            slots.locked.return_value = True
+            response = self._post({"tenant_id": "tenant-001"})
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "30"
+
+    def test_returns_zip(self, tmp_path, stored_analyses, rendered):
+        with patch("routes.analysis.settings.TEMP_DIR", str(tmp_path)):
+            response = self._post({"tenant_id": "tenant-001"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        assert response.headers["x-reports-exported"] == "4"
+        assert list(tmp_path.iterdir()) == []  # Archive removed after sending
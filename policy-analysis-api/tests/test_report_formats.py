@@ -0,0 +1,77 @@
+"""
+Tests for the HTML and JSON report views.
+"""
+
+import json
+import pytest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from main import app
+from services.orchestrator import analysis_status_store
+from services.report_formats import report_formatter, section_key
+from services.report_generator import ReportBranding, generator
+
+DATA = {
+    "client_company": "Test <Corp>",
+    "executive_summary": {
+        "recommendation": "BIND WITH CONDITIONS",
+        "key_metrics": {"overall_maturity_score": 6.5, "total_coverage_limit": 1000000},
+        "critical_action_items": ["Raise the ransomware sublimit"],
+    },
+    "coverage_analysis": {"first_party": [{"coverage_name": "Ransomware", "maturity_score": 4, "sublimit": "$250K"}]},
+    "sections": [{"name": "Ransomware", "items": [
+        {"name": "Extortion", "carrier_values": {"Carrier A": {"maturity_score": 7, "value": "$1M"}}},
+    ]}],
+    "red_flags": [{"flag": "War exclusion", "severity": "HIGH", "impact": "Nation-state attacks excluded"}],
+}
+
+
+class TestReportFormatter:
+    def test_json_has_every_pdf_section_in_order(self):
+        report = json.loads("".join(report_formatter.render("json", DATA, analysis_id="analysis-fmt-001")))
+
+        assert report["analysis_id"] == "analysis-fmt-001"
+        assert list(report["sections"]) == [section_key(builder) for builder, _ in generator.SECTIONS]
+        assert report["sections"]["cover_page"]["recommendation_tone"] == "warning"
+        assert report["sections"]["executive_summary"]["key_metrics"][2] == ["Total Coverage Limit", "$1,000,000"]
+        assert report["sections"]["coverage_matrix"]["header"] == ["Coverage Item", "Carrier A", "Notes"]
+        assert report["sections"]["coverage_matrix"]["sections"][0]["rows"][0][:2] == ["Extortion", "7/10\n$1M"]
+
+    def test_html_is_escaped_and_branded(self):
+        branding = ReportBranding(company_name="Acme Brokers", primary_color="#112233")
+        chunks = list(report_formatter.render("html", DATA, branding))
+
+        assert len(chunks) == len(generator.SECTIONS) + 2  # Head, one chunk per section, footer
+        page = "".join(chunks)
+        assert "#112233" in chunks[0]
+        assert "Test &lt;Corp&gt;" in page and "Test <Corp>" not in page
+        assert '<section id="red_flags_section">' in page
+        assert "ACME BROKERS" in page
+
+
+class TestFormatEndpoint:
+    @pytest.fixture(autouse=True)
+    def completed(self):
+        with patch.dict(analysis_status_store, {
+            "analysis-fmt-001": {"status": "completed", "result": {"tenant_id": None, "analysis_data": DATA}},
+        }):
+            yield
+
+    def test_json_format(self):
+        response = TestClient(app).get("/analysis/analysis-fmt-001/report?format=json")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json()["sections"]["red_flags_section"]["red_flags"][0]["severity"] == "HIGH"
+
+    def test_html_format(self):
+        response = TestClient(app).get("/analysis/analysis-fmt-001/report?format=html")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/html")
+        assert response.text.endswith("</html>")
+
+    def test_unknown_format_rejected(self):
+        assert TestClient(app).get("/analysis/analysis-fmt-001/report?format=docx").status_code == 422
@@ -2,13 +2,23 @@
 Tests for report generator service.
 """
 
+import asyncio
 import os
+import subprocess
 import sys
+import time
 import pytest
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from services.report_generator import generator
+from services.render_pool import RenderPool, RenderQueueFull, RenderTimeout
+from services.report_generator import ReportBranding, compile_template, generator
+
+
+MINIMAL_DATA = {
+    "client_company": "Acme Corp",
+    "executive_summary": {"recommendation": "Review this policy.", "key_metrics": {"overall_maturity_score": 6.5}},
+}
 
 
 class TestReportGenerator:
@@ -57,3 +67,189 @@ class TestReportGenerator:
         )
         # Should succeed or fail gracefully
         assert isinstance(result.success, bool)
+
+
+class TestInMemoryReport:
+    @pytest.mark.asyncio
+    async def test_in_memory_report_writes_no_file(self, tmp_path, monkeypatch):
+        """Without an output_dir the PDF stays in memory until explicitly saved"""
+        monkeypatch.chdir(tmp_path)
+        result = await generator.generate_report(analysis_data=MINIMAL_DATA, output_dir=None)
+
+        assert result.success
+        assert result.report_path is None
+        assert result.report_bytes.startswith(b"%PDF-")
+        assert list(tmp_path.iterdir()) == []
+
+        path = generator.save_report(result, str(tmp_path / "reports"))
+        with open(path, "rb") as f:
+            assert f.read() == result.report_bytes
+
+    def test_page_streams_compressed(self, monkeypatch):
+        from config import settings
+        compressed = generator.render_pdf(MINIMAL_DATA)
+        monkeypatch.setattr(settings, "REPORT_PDF_COMPRESSION", False)
+        uncompressed = generator.render_pdf(MINIMAL_DATA)
+
+        assert b"/FlateDecode" in compressed
+        assert b"/FlateDecode" not in uncompressed
+        assert len(compressed) < len(uncompressed)
+
+
+class TestCompiledTemplate:
+    def test_template_compiled_once_per_branding(self):
+        default = compile_template(ReportBranding())
+        assert compile_template(ReportBranding()) is default
+        assert generator.styles is default.styles
+
+        other = compile_template(ReportBranding(company_name="Acme Brokers", accent_color="#FF6600"))
+        assert other is not default
+        assert other.styles['subtitle'].textColor.hexval() == "0xff6600"
+
+    def test_page_chrome_is_one_shared_form(self, monkeypatch):
+        """Body pages should reference a single form XObject rather than redraw the chrome"""
+        from config import settings
+        monkeypatch.setattr(settings, "REPORT_PDF_COMPRESSION", False)
+        data = {**MINIMAL_DATA, "red_flags": [{"flag": f"Flag {i}", "impact": "Impact"} for i in range(80)]}
+
+        pdf_bytes = generator.render_pdf(data)
+
+        assert pdf_bytes.count(b"/Subtype /Form") == 1
+        assert pdf_bytes.count(b"/Type /Page\n") - 1 == pdf_bytes.count(b" Do")  # Every page but the cover
+
+    def test_page_chrome_name_stable_across_processes(self):
+        """Identical branding names its form the same in every process (hash() is randomized)"""
+        script = (
+            "from services.report_generator import ReportBranding, compile_template;"
+            "print(compile_template(ReportBranding(company_name='Acme Brokers')).chrome_form)"
+        )
+        src = os.path.join(os.path.dirname(__file__), '..', 'src')
+        names = {
+            subprocess.run(
+                [sys.executable, "-c", script], cwd=src, capture_output=True, text=True, check=True,
+                env={**os.environ, "PYTHONHASHSEED": seed},
+            ).stdout.strip()
+            for seed in ("1", "2")
+        }
+        assert names == {compile_template(ReportBranding(company_name="Acme Brokers")).chrome_form}
+
+
+class TestCoverageMatrix:
+    def _sections(self, items, carriers=("Carrier A", "Carrier B")):
+        return [{
+            "name": "Business Interruption",
+            "items": [
+                {"name": f"Item {n}", "carrier_values": {
+                    c: {"maturity_score": 7, "value": "$1,000,000", "retention": "$25,000"} for c in carriers
+                }}
+                for n in range(items)
+            ],
+        }]
+
+    def test_matrix_chunked_with_precomputed_heights(self):
+        """Large sections are split into fixed-size tables whose row heights are known up front"""
+        from reportlab.platypus import Table
+        from services.report_generator import MATRIX_CHUNK_ROWS
+
+        elements = generator._create_coverage_matrix({"sections": self._sections(MATRIX_CHUNK_ROWS * 2 + 5)}, generator.template)
+        tables = [e for e in elements if isinstance(e, Table)]
+
+        assert len(tables) == 3
+        assert all(table._rowHeights[0] is not None for table in tables)
+        assert tables[0]._cellvalues[0] == ["Coverage Item", "Carrier A", "Carrier B"]
+        assert tables[0]._cellvalues[1][1] == "7/10\n$1,000,000\nRetention $25,000"
+
+    def test_single_carrier_adds_notes_column(self):
+        sections = self._sections(2, carriers=("Carrier A",))
+        sections[0]["items"][0]["carrier_values"]["Carrier A"]["notes"] = "Shared with the aggregate. " * 30
+        elements = generator._create_coverage_matrix({"sections": sections}, generator.template)
+
+        header, first = elements[-1]._cellvalues[:2]
+        assert header[-1] == "Notes"
+        assert first[-1].endswith("...")
+
+    def test_long_cells_capped_and_wrapped(self):
+        """Oversized names and values are wrapped within their column and capped, so the report still lays out"""
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        from services.report_generator import MATRIX_CELL_MAX_LINES, MATRIX_FONT, MATRIX_FONT_SIZE, MATRIX_PADDING
+
+        sections = self._sections(3)
+        item = sections[0]["items"][0]
+        item["name"] = "Business interruption from a dependent provider outage " * 40
+        item["carrier_values"]["Carrier A"]["value"] = "X" * 2000  # One unbreakable word
+        table = generator._create_coverage_matrix({"sections": sections}, generator.template)[-1]
+
+        name, value = table._cellvalues[1][:2]
+        assert len(name.split("\n")) == len(value.split("\n")) == MATRIX_CELL_MAX_LINES
+        assert name.endswith("...")
+        width = generator._matrix_column_widths(2)[1] - 2 * MATRIX_PADDING
+        assert all(stringWidth(line, MATRIX_FONT, MATRIX_FONT_SIZE) <= width for line in value.split("\n"))
+        assert generator.render_pdf({**MINIMAL_DATA, "sections": sections}).startswith(b"%PDF-")
+
+    def test_header_wrapped_in_bold(self):
+        """Header cells are wrapped with the bold font they are drawn in"""
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        from services.report_generator import MATRIX_FONT_SIZE, MATRIX_PADDING
+
+        carriers = ("m" * 26, "Carrier B")  # Fits the column in Helvetica, not in Helvetica-Bold
+        table = generator._create_coverage_matrix({"sections": self._sections(1, carriers)}, generator.template)[-1]
+
+        width = generator._matrix_column_widths(2)[1] - 2 * MATRIX_PADDING
+        assert all(stringWidth(line, "Helvetica-Bold", MATRIX_FONT_SIZE) <= width for line in table._cellvalues[0][1].split("\n"))
+
+    def test_report_with_matrix_renders(self):
+        pdf_bytes = generator.render_pdf({**MINIMAL_DATA, "sections": self._sections(80)})
+        assert pdf_bytes.startswith(b"%PDF-")
+
+
+class TestRenderPool:
+    @pytest.mark.asyncio
+    async def test_worker_processes_return_pdf_bytes(self):
+        """Pre-warmed worker processes should render the same PDF the generator builds inline"""
+        pool = RenderPool(workers=2, queue_size=2, timeout=60)
+        try:
+            pdf_bytes = await pool.render(MINIMAL_DATA)
+        finally:
+            pool.shutdown()
+
+        assert pdf_bytes.startswith(b"%PDF-")
+
+    @pytest.mark.asyncio
+    async def test_render_timeout(self, monkeypatch):
+        monkeypatch.setattr(generator, "render_pdf", lambda *args: time.sleep(0.5) or b"")
+        pool = RenderPool(workers=0, timeout=0.05)
+        with pytest.raises(RenderTimeout):
+            await pool.render(MINIMAL_DATA)
+
+    @pytest.mark.asyncio
+    async def test_timed_out_worker_terminated(self):
+        """A worker still busy when its render times out is killed, not left running"""
+        slow = {**MINIMAL_DATA, "executive_summary": {"recommendation": "Review this policy. " * 10000}}  # Seconds to lay out
+        pool = RenderPool(workers=1, queue_size=0, timeout=60)
+        try:
+            pool.start()
+            executor = pool._executor
+            render = asyncio.create_task(pool.render(slow, timeout=0.5))
+            while not executor._processes:  # Spawned on first submit
+                await asyncio.sleep(0.01)
+            processes = list(executor._processes.values())
+
+            with pytest.raises(RenderTimeout):
+                await render
+
+            for process in processes:
+                process.join(timeout=2)  # Well before the render itself would finish
+            assert processes and not any(process.is_alive() for process in processes)
+            assert pool._executor is None  # The next render starts a fresh pool
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_bounded_queue(self):
+        """Callers beyond workers + queue_size should time out waiting for a slot"""
+        pool = RenderPool(workers=0, queue_size=0, timeout=0.05)
+        slots = pool._get_slots()
+        await slots.acquire()  # Occupy the only slot
+
+        with pytest.raises(RenderQueueFull):
+            await pool.render(MINIMAL_DATA)
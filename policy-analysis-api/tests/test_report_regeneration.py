@@ -0,0 +1,108 @@
+"""
+Tests for report regeneration — re-rendering stored analyses without re-analysis.
+"""
+
+import hmac
+import hashlib
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from main import app
+from services.orchestrator import analysis_status_store
+from services.report_generator import ReportBranding, ReportResult
+from services.report_regeneration import AnalysisNotFound, regenerate_report, regenerate_reports
+
+WEBHOOK_SECRET = "test-webhook-secret-for-hmac-signing"
+
+ROW = {
+    "id": "policy-001",
+    "tenant_id": "tenant-001",
+    "company_id": "company-001",
+    "analysis_id": "analysis-001",
+    "analysis_data": {"client_company": "Acme Corp"},
+    "report_storage_path": "tenant-001/company-001/reports/analysis-001_Acme_Corp_Analysis.pdf",
+}
+
+TENANT_BRANDING = ReportBranding(company_name="Acme Brokers", accent_color="#FF6600")
+
+
+def _rendered():
+    return ReportResult(success=True, report_bytes=b"%PDF-new", filename="Acme.pdf")
+
+
+@pytest.mark.asyncio
+class TestRegenerateReport:
+    async def test_stored_report_overwritten_in_place(self):
+        """The stored analysis is re-rendered and uploaded over the existing object"""
+        supa = MagicMock()
+        table = supa.table.return_value
+        table.select.return_value.eq.return_value.limit.return_value.execute.return_value.data = [ROW]
+
+        with patch("services.report_regeneration._get_supabase_client", return_value=supa), \
+             patch("services.orchestrator._get_supabase_client", return_value=supa), \
+             patch("services.report_regeneration.branding_service") as brandings, \
+             patch("services.report_regeneration.report_service") as reports:
+            brandings.for_tenant = AsyncMock(return_value=TENANT_BRANDING)
+            reports.render = AsyncMock(return_value=_rendered())
+            result = await regenerate_report("analysis-001")
+
+        brandings.for_tenant.assert_awaited_once_with("tenant-001")
+        reports.render.assert_awaited_once_with(ROW["analysis_data"], refresh=True, branding=TENANT_BRANDING)
+        upload = supa.storage.from_.return_value.upload.call_args
+        assert upload.args[:2] == (ROW["report_storage_path"], b"%PDF-new")
+        assert upload.kwargs["file_options"]["upsert"] == "true"
+        assert result["report_storage_path"] == ROW["report_storage_path"]
+        table.update.assert_not_called()  # Path unchanged
+
+    async def test_in_memory_result_without_storage(self, tmp_path):
+        analysis_status_store["analysis-mem-001"] = {
+            "status": "completed",
+            "result": {"analysis_data": {"client_company": "Acme Corp"}, "report_status": "deferred"},
+        }
+        with patch("services.report_regeneration.report_service") as reports, \
+             patch("services.report_regeneration.settings.REPORTS_DIR", str(tmp_path)):
+            reports.render = AsyncMock(return_value=_rendered())
+            reports.save_report.return_value = str(tmp_path / "Acme.pdf")
+            result = await regenerate_report("analysis-mem-001")
+
+        assert result["report_path"] == str(tmp_path / "Acme.pdf")
+        assert analysis_status_store["analysis-mem-001"]["result"]["report_status"] == "ready"
+
+    async def test_unknown_analysis(self):
+        with pytest.raises(AnalysisNotFound):
+            await regenerate_report("analysis-missing")
+
+    async def test_bulk_regeneration_pages_and_counts_failures(self):
+        supa = MagicMock()
+        page = supa.table.return_value.select.return_value.not_.is_.return_value.order.return_value.range.return_value
+        page.execute.return_value.data = [ROW, {**ROW, "id": "policy-002", "analysis_id": "analysis-002"}]
+
+        with patch("services.report_regeneration._get_supabase_client", return_value=supa), \
+             patch("services.report_regeneration._upload_report_to_supabase", new_callable=AsyncMock) as upload, \
+             patch("services.report_regeneration.report_service") as reports:
+            reports.render = AsyncMock(side_effect=[_rendered(), ReportResult(success=False, error="boom")])
+            upload.return_value = ROW["report_storage_path"]
+            result = await regenerate_reports(concurrency=1)
+
+        assert (result["total"], result["regenerated"]) == (2, 1)
+        assert result["failed"] == ["policy-002"]
+
+
+class TestRegenerateEndpoint:
+    def test_rejects_unsigned_request(self):
+        response = TestClient(app).post("/analysis/analysis-001/report:regenerate")
+        assert response.status_code == 401
+
+    def test_signed_request_regenerates(self):
+        signature = hmac.new(WEBHOOK_SECRET.encode(), b"", hashlib.sha256).hexdigest()
+        with patch("routes.analysis.regenerate_report", new_callable=AsyncMock) as regenerate:
+            regenerate.return_value = {"analysis_id": "analysis-001", "size_bytes": 10}
+            response = TestClient(app).post(
+                "/analysis/analysis-001/report:regenerate",
+                headers={"X-Webhook-Signature": signature},
+            )
+
+        assert response.status_code == 200
+        regenerate.assert_awaited_once_with("analysis-001")
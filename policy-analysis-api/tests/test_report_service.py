@@ -0,0 +1,76 @@
+"""
+Tests for the report service — rendered-report cache and single-flight rendering.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from services.report_generator import ReportResult
+from services.report_service import ReportService, report_cache_key
+
+
+def _result(size=10):
+    return ReportResult(success=True, report_bytes=b"%" * size, filename="report.pdf")
+
+
+class TestReportCacheKey:
+    def test_key_ignores_dict_order(self):
+        assert report_cache_key({"a": 1, "b": {"c": 2}}) == report_cache_key({"b": {"c": 2}, "a": 1})
+
+    def test_key_changes_with_content_and_template(self):
+        key = report_cache_key({"a": 1})
+        assert report_cache_key({"a": 2}) != key
+        with patch("services.report_service.TEMPLATE_VERSION", "next"):
+            assert report_cache_key({"a": 1}) != key
+
+
+@pytest.mark.asyncio
+class TestReportService:
+    async def test_repeat_render_served_from_cache(self):
+        service = ReportService()
+        with patch("services.report_service.generator") as generator:
+            generator.generate_report = AsyncMock(return_value=_result())
+            first = await service.render({"a": 1})
+            second = await service.render({"a": 1})
+
+        assert first is second
+        generator.generate_report.assert_awaited_once()
+
+    async def test_concurrent_requests_share_one_render(self):
+        service = ReportService()
+
+        async def slow_render(**kwargs):
+            await asyncio.sleep(0.01)
+            return _result()
+
+        with patch("services.report_service.generator") as generator:
+            generator.generate_report = AsyncMock(side_effect=slow_render)
+            results = await asyncio.gather(*(service.render({"a": 1}) for _ in range(5)))
+
+        assert generator.generate_report.await_count == 1
+        assert all(r is results[0] for r in results)
+
+    async def test_failures_not_cached_and_lru_bounded(self):
+        service = ReportService(max_bytes=25)
+        with patch("services.report_service.generator") as generator:
+            generator.generate_report = AsyncMock(return_value=ReportResult(success=False, error="boom"))
+            await service.render({"a": 0})
+            assert service.cached(report_cache_key({"a": 0})) is None
+
+            generator.generate_report = AsyncMock(return_value=_result(10))
+            for n in range(1, 4):
+                await service.render({"a": n})
+
+        assert service.cached(report_cache_key({"a": 1})) is None  # Evicted
+        assert service.cached(report_cache_key({"a": 3})) is not None
+
+    async def test_uncached_render_reuses_but_does_not_store(self):
+        service = ReportService()
+        with patch("services.report_service.generator") as generator:
+            generator.generate_report = AsyncMock(return_value=_result())
+            await service.render({"a": 1}, cache=False)
+            assert service.cached(report_cache_key({"a": 1})) is None
+
+            cached = await service.render({"a": 2})
+            assert await service.render({"a": 2}, cache=False) is cached
@@ -0,0 +1,180 @@
+"""
+Tests for the rescoring service — methodology changes applied without LLM calls.
+"""
+
+import hmac
+import hashlib
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from main import app
+from services.rescoring import rescore_analyses, rescore_stored_analyses
+
+WEBHOOK_SECRET = "test-webhook-secret-for-hmac-signing"
+
+
+def _analysis(breadth, depth, structure, risk, financial, overall=None, level=None):
+    scores = dict(zip(
+        ("coverage_breadth", "coverage_depth", "policy_structure", "risk_management", "financial_strength"),
+        (breadth, depth, structure, risk, financial),
+    ))
+    return {
+        "maturity_dimensions": {name: {"score": s, "weight": 1.0} for name, s in scores.items() if s is not None},
+        "executive_summary": {"key_metrics": {"overall_maturity_score": overall, "maturity_level": level}},
+    }
+
+
+class TestRescoreAnalyses:
+    def test_applies_methodology_weights_and_levels(self):
+        """Every analysis should get the weighted score and matching level"""
+        analyses = [_analysis(8, 8, 8, 8, 8, overall=8.0, level="Managed"), _analysis(10, 0, 0, 0, 0)]
+
+        result = rescore_analyses(analyses)
+
+        assert result.rescored == 2
+        assert result.changed == 1  # First analysis is unchanged
+        metrics = analyses[1]["executive_summary"]["key_metrics"]
+        assert metrics["overall_maturity_score"] == round(10 * 1.5 / 6.1, 1)
+        assert metrics["maturity_level"] == "Initial"
+        assert analyses[1]["maturity_dimensions"]["coverage_breadth"]["weight"] == 1.5
+        assert "rescored_at" in analyses[1]["_metadata"]
+
+    def test_weight_and_threshold_overrides(self):
+        """Overrides should change the score and level for the whole batch"""
+        analyses = [_analysis(9, 6, None, None, None)]
+
+        result = rescore_analyses(
+            analyses,
+            weights={"coverage_breadth": 1.0, "coverage_depth": 2.0},
+            levels=[(9.0, "Optimized"), (7.5, "Managed"), (6.5, "Defined"), (4.0, "Developing")],
+        )
+
+        metrics = analyses[0]["executive_summary"]["key_metrics"]
+        assert metrics["overall_maturity_score"] == 7.0  # Missing dimensions are ignored
+        assert metrics["maturity_level"] == "Defined"
+        assert result.weights["coverage_depth"] == 2.0
+
+    def test_analyses_without_dimensions_are_skipped(self):
+        analyses = [{"executive_summary": {"key_metrics": {"overall_maturity_score": 6.0}}}]
+        result = rescore_analyses(analyses)
+        assert (result.rescored, result.skipped) == (0, 1)
+        assert analyses[0]["executive_summary"]["key_metrics"]["overall_maturity_score"] == 6.0
+
+    def test_malformed_executive_summary_tolerated(self):
+        """A string or list summary is read as having no score and replaced on write"""
+        analyses = [_analysis(6, 6, 6, 6, 6), _analysis(6, 6, 6, 6, 6)]
+        analyses[0]["executive_summary"] = "Overview text"
+        analyses[1]["executive_summary"] = ["broken"]
+
+        result = rescore_analyses(analyses)
+
+        assert result.changed_indexes == [0, 1]
+        assert analyses[0]["executive_summary"]["overview"] == "Overview text"
+        assert analyses[1]["executive_summary"]["key_metrics"]["overall_maturity_score"] == 6.0
+
+    def test_unknown_dimension_rejected(self):
+        with pytest.raises(ValueError):
+            rescore_analyses([_analysis(5, 5, 5, 5, 5)], weights={"coverage_width": 2.0})
+
+
+@pytest.mark.asyncio
+class TestRescoreStored:
+    async def test_writes_only_changed_rows(self):
+        """Only rows whose score or level changed should be updated"""
+        rows = [
+            {"id": "p1", "analysis_data": _analysis(8, 8, 8, 8, 8, overall=8.0, level="Managed")},
+            {"id": "p2", "analysis_data": _analysis(4, 4, 4, 4, 4, overall=6.0, level="Defined")},
+        ]
+        supa = MagicMock()
+        table = supa.table.return_value
+        table.select.return_value.not_.is_.return_value.order.return_value.range.return_value.execute.return_value.data = rows
+
+        with patch("services.rescoring._get_supabase_client", return_value=supa):
+            result = await rescore_stored_analyses()
+
+        assert result["changed_policy_ids"] == ["p2"]
+        assert result["written"] == 1
+        update = table.update.call_args.args[0]
+        assert update["analysis_score"] == 4.0
+        assert update["analysis_data"]["executive_summary"]["key_metrics"]["maturity_level"] == "Developing"
+        table.update.return_value.eq.assert_called_with("id", "p2")
+
+    async def test_stored_rows_rescored_a_page_at_a_time(self):
+        """Each page is rescored and written before the next is read"""
+        pages = [
+            [{"id": "p1", "analysis_data": _analysis(4, 4, 4, 4, 4, overall=6.0)},
+             {"id": "p2", "analysis_data": _analysis(8, 8, 8, 8, 8, overall=8.0, level="Managed")}],
+            [{"id": "p3", "analysis_data": _analysis(2, 2, 2, 2, 2, overall=6.0)}],
+        ]
+        supa = MagicMock()
+        table = supa.table.return_value
+        ranged = table.select.return_value.not_.is_.return_value.order.return_value.range
+        events = []
+
+        def load(start, end):
+            events.append(("read", start))
+            query = MagicMock()
+            query.execute.return_value.data = pages[start // 2]
+            return query
+
+        ranged.side_effect = load
+        table.update.return_value.eq.side_effect = lambda column, policy_id: events.append(("write", policy_id)) or MagicMock()
+
+        with patch("services.rescoring._get_supabase_client", return_value=supa), \
+             patch("services.rescoring.PAGE_SIZE", 2):
+            result = await rescore_stored_analyses()
+
+        assert events == [("read", 0), ("write", "p1"), ("read", 2), ("write", "p3")]
+        assert (result["total"], result["rescored"], result["changed"]) == (3, 3, 2)
+        assert result["changed_policy_ids"] == ["p1", "p3"]
+        assert result["written"] == 2
+
+    async def test_dry_run_writes_nothing(self):
+        supa = MagicMock()
+        table = supa.table.return_value
+        table.select.return_value.not_.is_.return_value.order.return_value.range.return_value.execute.return_value.data = [
+            {"id": "p1", "analysis_data": _analysis(1, 1, 1, 1, 1, overall=5.0)},
+        ]
+
+        with patch("services.rescoring._get_supabase_client", return_value=supa):
+            result = await rescore_stored_analyses(dry_run=True)
+
+        assert result["changed"] == 1
+        assert result["written"] == 0
+        table.update.assert_not_called()
+
+
+class TestRescoreEndpoint:
+    def test_rejects_unsigned_request(self):
+        response = TestClient(app).post("/analysis/rescore", json={"dry_run": True})
+        assert response.status_code == 401
+
+    def test_signed_request_runs_rescore(self):
+        body = json.dumps({"weights": {"coverage_depth": 1.5}, "levels": {"Optimized": 9.0}, "dry_run": True}).encode()
+        signature = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+        with patch("routes.analysis.rescore_stored_analyses", return_value={"total": 0}) as rescore:
+            response = TestClient(app).post(
+                "/analysis/rescore",
+                content=body,
+                headers={"X-Webhook-Signature": f"sha256={signature}", "Content-Type": "application/json"},
+            )
+
+        assert response.status_code == 200
+        kwargs = rescore.call_args.kwargs
+        assert kwargs["weights"] == {"coverage_depth": 1.5}
+        assert kwargs["levels"] == [(9.0, "Optimized"), (7.0, "Managed"), (5.5, "Defined"), (3.5, "Developing")]
+        assert kwargs["dry_run"] is True
+
+    def test_unknown_level_rejected(self):
+        body = json.dumps({"levels": {"Excellent": 9.0}}).encode()
+        signature = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+        response = TestClient(app).post(
+            "/analysis/rescore",
+            content=body,
+            headers={"X-Webhook-Signature": signature, "Content-Type": "application/json"},
+        )
+        assert response.status_code == 422
@@ -0,0 +1,117 @@
+"""
+Tests for the local scoring engine — factor points to item, dimension and overall scores.
+"""
+
+import pytest
+
+from services.scoring_engine import ScoringEngine
+
+
+def _item(name, **carriers):
+    return {"name": name, "carrier_values": {c: v for c, v in carriers.items()}}
+
+
+def _factors(sublimit, scope, exclusions, prior_acts, conditions):
+    return {"factors": {
+        "sublimit_adequacy": sublimit,
+        "scope": scope,
+        "exclusions_impact": exclusions,
+        "prior_acts": prior_acts,
+        "conditions": conditions,
+    }}
+
+
+@pytest.fixture
+def factor_analysis():
+    """Two carriers, three items, factor points only"""
+    return {
+        "carriers": ["CNA", "Coalition"],
+        "program_details": {
+            "CNA": {"financial_rating": "A (Excellent)"},
+            "Coalition": {"financial_rating": "AM Best A-"},
+        },
+        "sections": [
+            {"name": "Incident Response", "items": [
+                _item("Breach Counsel", CNA=_factors(2, 3, 2, 1.5, 1.5), Coalition=_factors(1, 2, 1, 0.5, 1)),
+                _item("Forensics", CNA=_factors(1, 2, 1, 1, 1), Coalition=_factors(0, 0, 0, 0, 0)),
+            ]},
+            {"name": "Cyber Crime", "items": [
+                _item("Social Engineering", CNA=_factors(0.5, 1, 0.5, 0, 0.5), Coalition=_factors(2, 3, 2, 1.5, 1.5)),
+            ]},
+        ],
+        "maturity_dimensions": {"coverage_breadth": {"notes": "Broad"}},
+        "executive_summary": {"recommendation": "BIND"},
+    }
+
+
+class TestScoringEngine:
+    def test_item_scores_sum_factors(self, factor_analysis):
+        """Item scores should be the sum of the factor points"""
+        ScoringEngine().score(factor_analysis)
+        items = factor_analysis["sections"][0]["items"]
+        assert items[0]["carrier_values"]["CNA"]["maturity_score"] == 10.0
+        assert items[1]["carrier_values"]["CNA"]["maturity_score"] == 6.0
+        assert items[1]["carrier_values"]["Coalition"]["maturity_score"] == 0.0
+
+    def test_factors_are_clipped_and_snapped(self):
+        """Out-of-range or off-grid points should not inflate the score"""
+        data = {"sections": [{"name": "S", "items": [
+            _item("I", CNA=_factors(5, 2.8, -1, 1.2, None)),
+        ]}]}
+        ScoringEngine().score(data)
+        # 2 (clipped) + 3.0 (snapped) + 0 (clipped) + 1.0 (snapped) + 0 (missing)
+        assert data["sections"][0]["items"][0]["carrier_values"]["CNA"]["maturity_score"] == 6.0
+
+    def test_dimensions_and_overall_for_primary_carrier(self, factor_analysis):
+        """Primary carrier dimensions and overall score go into the analysis"""
+        result = ScoringEngine().score(factor_analysis)
+
+        dims = factor_analysis["maturity_dimensions"]
+        assert dims["coverage_breadth"] == {"notes": "Broad", "score": 10.0, "weight": 1.5}
+        assert dims["financial_strength"]["score"] == 9.0
+        assert result.primary_carrier == "CNA"
+        assert result.carriers["Coalition"].dimensions["coverage_breadth"] == 6.7
+        assert result.carriers["Coalition"].dimensions["financial_strength"] == 8.0
+
+        metrics = factor_analysis["executive_summary"]["key_metrics"]
+        assert metrics["overall_maturity_score"] == result.carriers["CNA"].overall_score
+        assert metrics["maturity_level"] == result.carriers["CNA"].maturity_level
+        assert factor_analysis["_scoring"]["items_scored"] == 6
+
+    @pytest.mark.parametrize("summary, kept", [
+        ("Broad program with a low SE sublimit.", {"overview": "Broad program with a low SE sublimit."}),
+        (["not", "a", "mapping"], {}),
+        ({"recommendation": "BIND", "key_metrics": "8/10"}, {"recommendation": "BIND"}),
+    ])
+    def test_malformed_executive_summary_is_replaced(self, factor_analysis, summary, kept):
+        """Salvaged output with a non-dict summary or key_metrics still gets scored"""
+        factor_analysis["executive_summary"] = summary
+        result = ScoringEngine().score(factor_analysis)
+
+        exec_summary = factor_analysis["executive_summary"]
+        assert exec_summary["key_metrics"]["overall_maturity_score"] == result.carriers["CNA"].overall_score
+        assert {k: v for k, v in exec_summary.items() if k != "key_metrics"} == kept
+
+    def test_scores_are_reproducible(self, factor_analysis):
+        """Scoring the same facts twice should give identical results"""
+        engine = ScoringEngine()
+        first = engine.score(factor_analysis)
+        second = engine.score(factor_analysis)
+        assert first == second
+
+    def test_items_without_factors_keep_reported_score(self):
+        """Carrier values Claude scored directly should count but not be rewritten"""
+        data = {"sections": [{"name": "S", "items": [
+            _item("Scored", CNA={"maturity_score": 4}),
+            _item("Factored", CNA=_factors(2, 3, 2, 1.5, 1.5)),
+        ]}]}
+        result = ScoringEngine().score(data)
+        assert data["sections"][0]["items"][0]["carrier_values"]["CNA"]["maturity_score"] == 4
+        assert (result.items_scored, result.items_unscored) == (1, 1)
+        assert data["maturity_dimensions"]["coverage_breadth"]["score"] == 10.0
+
+    def test_empty_analysis_is_untouched(self):
+        data = {"sections": []}
+        result = ScoringEngine().score(data)
+        assert result.items_scored == 0
+        assert data == {"sections": []}